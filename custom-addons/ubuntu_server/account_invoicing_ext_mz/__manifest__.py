@@ -5,17 +5,36 @@
     "category": "Accounting",
     "license": "LGPL-3",
     "author": "Tropigalia SA",
-    "depends": ["account", "analytic", "web"],
+    "depends": ["account", "analytic", "web", "bus"],
     "pre_init_hook": "pre_init_hook",
     "post_init_hook": "post_init_hook",
     "data": [
         "security/ir.model.access.csv",
         "views/account_menu_ext.xml",
         "views/asset_views.xml",
-        "views/balance_sheet_views.xml"
+        "views/balance_sheet_views.xml",
+        "views/ledger_export_views.xml",
+        "views/consolidation_views.xml",
+        "views/reconcile_batch_views.xml",
+        "views/deferral_views.xml",
+        "views/fx_revaluation_views.xml",
+        "views/invoice_analysis_views.xml",
+        "views/hash_verification_views.xml",
+        "data/ir_cron.xml"
     ],
     "assets": {
         "web.assets_backend": [
+            "/account_invoicing_ext_mz/static/src/utils/columnar.js",
+            "/account_invoicing_ext_mz/static/src/services/report_cache.js",
+            "/account_invoicing_ext_mz/static/src/services/report_data_service.js",
+            "/account_invoicing_ext_mz/static/src/report_actions_loader.js"
+        ],
+        # Loaded on first use of a report client action (see report_actions_loader.js)
+        "account_invoicing_ext_mz.assets_reports": [
+            "/account_invoicing_ext_mz/static/src/utils/ledger_deltas.js",
+            "/account_invoicing_ext_mz/static/src/utils/consolidation.js",
+            "/account_invoicing_ext_mz/static/src/components/virtual_table/virtual_table.js",
+            "/account_invoicing_ext_mz/static/src/components/virtual_table/virtual_table.xml",
             "/account_invoicing_ext_mz/static/src/components/balance_sheet/balance_sheet.js",
             "/account_invoicing_ext_mz/static/src/components/balance_sheet/balance_sheet.xml",
             "/account_invoicing_ext_mz/static/src/components/profit_loss/profit_loss.js",
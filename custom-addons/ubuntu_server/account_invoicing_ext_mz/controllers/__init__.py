@@ -1,2 +1,3 @@
 from . import balance_sheet_controller
-from . import profit_loss_controller
\ No newline at end of file
+from . import profit_loss_controller
+from . import report_controller
\ No newline at end of file
@@ -13,9 +13,13 @@ class ProfitLossController(http.Controller):
                             comparison=False, comparison_date_from=None, comparison_date_to=None,
                             comparison_mode='none', only_posted=True, include_draft=False,
                             include_simulations=False, hide_zero=False, analytic_accounts=None,
-                            analytic_plans=None, partners=None, **kwargs):
+                            analytic_plans=None, partners=None, lazy=False,
+                            company_ids=None, currency_id=None, analytic_breakdown=False, **kwargs):
         """
-        Fetch profit and loss data via AJAX
+        Fetch profit and loss data via AJAX (``lazy``: section totals only, see /account/reports/unfold)
+
+        ``company_ids``/``currency_id`` consolidate several companies in one currency;
+        ``analytic_breakdown`` adds one column per analytic account.
         """
         if not request.env.user.has_group('account.group_account_user'):
             return {'error': 'Access denied'}
@@ -47,7 +51,11 @@ class ProfitLossController(http.Controller):
                 comparison_mode=comparison_mode,
                 analytic_accounts=analytic_accounts,
                 analytic_plans=analytic_plans,
-                include_simulations=include_simulations
+                include_simulations=include_simulations,
+                lazy=lazy,
+                company_ids=company_ids,
+                currency_id=currency_id,
+                analytic_breakdown=analytic_breakdown,
             )
                 
             return {
@@ -63,71 +71,33 @@ class ProfitLossController(http.Controller):
             }
     
     @http.route('/account/profit_loss/expand_line', type='json', auth='user')
-    def expand_line(self, line_id, date_from=None, date_to=None, journals=None, company_id=None):
+    def expand_line(self, line_id, date_from=None, date_to=None, journals=None, company_id=None,
+                    only_posted=True, include_draft=False, analytic_accounts=None, **kwargs):
         """
         Expand a specific line to get detailed accounts
+
+        Kept for older callers: the children are read from the stored lazy
+        response while ``unfold_key`` is kept, otherwise they come from the
+        same computation as the report itself (not stored), so they add up to
+        the parent line.
         """
         if not request.env.user.has_group('account.group_account_user'):
             return {'error': 'Access denied'}
-            
+
         try:
-            # Map line_id to account types
-            account_type_map = {
-                'operating_income': ['income'],
-                'other_income': ['income_other'],
-                'cost_of_revenue': ['expense_direct_cost'],
-                'operating_expenses': ['expense'],
-                'depreciation': ['expense_depreciation'],
-            }
-            
-            if line_id not in account_type_map:
-                return {'sub_lines': []}
-                
-            # Get detailed accounts
-            domain = [
-                ('account_type', 'in', account_type_map[line_id]),
-                ('company_id', '=', company_id or request.env.company.id)
-            ]
-            
-            if date_from:
-                if isinstance(date_from, str):
-                    date_from = datetime.strptime(date_from, '%Y-%m-%d').date()
-                domain.append(('date', '>=', date_from))
-                
-            if date_to:
-                if isinstance(date_to, str):
-                    date_to = datetime.strptime(date_to, '%Y-%m-%d').date()
-                domain.append(('date', '<=', date_to))
-                
-            if journals:
-                domain.append(('journal_id', 'in', journals))
-                
-            # Get account lines
-            move_lines = request.env['account.move.line'].search(domain)
-            
-            # Group by account
-            accounts = {}
-            for line in move_lines:
-                acc_id = line.account_id.id
-                if acc_id not in accounts:
-                    accounts[acc_id] = {
-                        'id': f'account_{acc_id}',
-                        'code': line.account_id.code,
-                        'name': f"{line.account_id.code} {line.account_id.name}",
-                        'balance': 0.0,
-                        'level': 3,
-                        'unfoldable': False
-                    }
-                # For P&L, income is credit - debit, expenses are debit - credit
-                if line.account_id.account_type in ['income', 'income_other']:
-                    accounts[acc_id]['balance'] -= line.balance
-                else:
-                    accounts[acc_id]['balance'] += line.balance
-                
-            sub_lines = list(accounts.values())
-            sub_lines = [acc for acc in sub_lines if acc['balance'] != 0]  # Filter zero balances
-            sub_lines.sort(key=lambda x: x['code'])
-            
+            sub_lines, _stored = request.env['account.report.aggregate']._get_line_children(
+                'profit_loss', kwargs.get('unfold_key'), line_id,
+                lambda: request.env['account.profit.loss.report'].get_profit_loss_data(
+                    date_from=date_from,
+                    date_to=date_to,
+                    journals=journals,
+                    company_id=company_id,
+                    only_posted=only_posted,
+                    include_draft=include_draft,
+                    analytic_accounts=analytic_accounts,
+                )['lines'],
+            )
+
             return {
                 'success': True,
                 'sub_lines': sub_lines
@@ -0,0 +1,242 @@
+from odoo import http, fields
+from odoo.exceptions import AccessError
+from odoo.http import request
+from datetime import date
+import gzip
+import inspect
+import json
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Line-heavy reports that support the columnar payload (when enabled by
+# COLUMNAR_REPORTS_PARAM, see ir.http session_info): report key -> (model, method)
+COLUMNAR_REPORTS = {
+    'general_ledger': ('account.general.ledger.report', 'get_general_ledger_data'),
+    'partner_ledger': ('account.partner.ledger.report', 'get_partner_ledger_data'),
+    'aged_receivable': ('account.aged.receivable.report', 'get_aged_receivable_data'),
+    'aged_payable': ('account.aged.payable.report', 'get_aged_payable_data'),
+    'journal_audit': ('account.journal.audit.report', 'get_journal_audit_data'),
+    'asset_register': ('account.asset.register.report', 'get_asset_register_data'),
+    'deferral': ('account.deferral.report', 'get_deferral_report_data'),
+}
+
+# Hierarchical reports answering /account/reports/unfold: report key -> (model, method)
+UNFOLD_REPORTS = {
+    'balance_sheet': ('account.balance.sheet.report', 'get_balance_sheet_data'),
+    'profit_loss': ('account.profit.loss.report', 'get_profit_loss_data'),
+}
+
+# Report filters the unfold route recomputes a line with when its stored data expired
+UNFOLD_PARAMS = ('date_from', 'date_to', 'journals', 'company_id', 'company_ids', 'currency_id', 'only_posted',
+                 'include_draft', 'include_simulations', 'hide_zero', 'analytic_accounts', 'analytic_plans',
+                 'account_groups', 'partners')
+
+# Reports that can share one per-account aggregate in the batch route
+BATCH_REPORTS = {
+    'balance_sheet': ('account.balance.sheet.report', 'get_balance_sheet_data'),
+    'profit_loss': ('account.profit.loss.report', 'get_profit_loss_data'),
+    'executive_summary': ('account.executive.summary.report', 'get_executive_summary_data'),
+}
+
+
+class ReportController(http.Controller):
+
+    def _json_response(self, payload, status=200):
+        """Serialize compactly and gzip when the browser accepts it"""
+        body = json.dumps(payload, separators=(',', ':'), default=str).encode()
+        headers = [('Content-Type', 'application/json'), ('Cache-Control', 'no-store')]
+        if 'gzip' in request.httprequest.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body, compresslevel=5)
+            headers.append(('Content-Encoding', 'gzip'))
+        headers.append(('Content-Length', str(len(body))))
+        return request.make_response(body, headers=headers, status=status)
+
+    def _get_line_report(self, report, kwargs, company_ids, columnar=False):
+        """
+        Run a COLUMNAR_REPORTS report for the companies selected in the web client
+
+        Only the named parameters of the report method are passed on; the
+        companies are checked and become the allowed companies of the call.
+        """
+        model_name, method = COLUMNAR_REPORTS[report]
+        company_ids = [int(company_id) for company_id in company_ids or []] or request.env.companies.ids
+        checked_ids = company_ids + ([int(kwargs['company_id'])] if kwargs.get('company_id') else [])
+        request.env['account.report.aggregate']._check_company_access(checked_ids)
+
+        model = request.env[model_name].with_context(allowed_company_ids=company_ids)
+        parameters = inspect.signature(getattr(type(model), method)).parameters
+        kwargs = {
+            key: value for key, value in kwargs.items()
+            if key in parameters and key not in ('self', 'format')
+            and parameters[key].kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
+        }
+        if columnar:
+            kwargs['format'] = 'columnar'
+        return getattr(model, method)(**kwargs)
+
+    @http.route('/account/reports/columnar/<string:report>', type='http', auth='user', methods=['GET'])
+    def get_columnar_report(self, report, kwargs=None, company_ids=None, **params):
+        """
+        Fetch a line-heavy report in the columnar format, gzip-compressed
+
+        ``kwargs`` and ``company_ids`` (the allowed companies of the web
+        client) are JSON-encoded: a GET carries no user context.
+        """
+        if not request.env.user.has_group('account.group_account_user'):
+            return self._json_response({'error': 'Access denied'}, status=403)
+        if report not in COLUMNAR_REPORTS:
+            return self._json_response({'error': f'Unknown report {report}'}, status=404)
+
+        try:
+            data = self._get_line_report(
+                report,
+                json.loads(kwargs) if kwargs else {},
+                json.loads(company_ids) if company_ids else None,
+                columnar=True,
+            )
+            return self._json_response(data)
+
+        except AccessError as e:
+            return self._json_response({'error': str(e)}, status=403)
+        except Exception as e:
+            _logger.error(f"Error generating columnar {report}: {str(e)}")
+            return self._json_response({'error': str(e)}, status=500)
+
+    @http.route('/account/reports/data/<string:report>', type='json', auth='user')
+    def get_line_report(self, report, kwargs=None, company_ids=None):
+        """
+        Fetch a line-heavy report in the regular format (columnar payloads not enabled)
+        """
+        if not request.env.user.has_group('account.group_account_user'):
+            return {'error': 'Access denied'}
+        if report not in COLUMNAR_REPORTS:
+            return {'error': f'Unknown report {report}'}
+
+        try:
+            return self._get_line_report(report, kwargs or {}, company_ids)
+
+        except Exception as e:
+            _logger.error(f"Error generating {report}: {str(e)}")
+            return {'error': str(e)}
+
+    @http.route('/account/reports/batch', type='json', auth='user')
+    def get_report_batch(self, reports, date_from=None, date_to=None, company_id=None,
+                         company_ids=None, currency_id=None, **kwargs):
+        """
+        Compute several reports for the same period from one ledger pass
+
+        ``reports`` is a list of report keys or {'report', 'key', 'kwargs'} dicts;
+        shared filters (journals, only_posted, ...) go in the remaining kwargs.
+        ``company_ids``/``currency_id`` consolidate several companies in one currency.
+        """
+        if not request.env.user.has_group('account.group_account_user'):
+            return {'error': 'Access denied'}
+
+        try:
+            aggregate_model = request.env['account.report.aggregate']
+            if not company_id:
+                company_id = request.env.company.id
+            aggregate_model._check_company_access([company_id] + list(company_ids or []))
+            if not date_to:
+                date_to = fields.Date.today()
+            date_to = fields.Date.to_date(date_to)
+            date_from = fields.Date.to_date(date_from) if date_from else date(date_to.year, 1, 1)
+
+            aggregates = {}
+            results = {}
+            for spec in reports:
+                if isinstance(spec, str):
+                    spec = {'report': spec}
+                report = spec['report']
+                key = spec.get('key', report)
+                if report not in BATCH_REPORTS:
+                    results[key] = {'error': f'Unknown report {report}'}
+                    continue
+
+                report_kwargs = dict(kwargs, **spec.get('kwargs', {}))
+                if report == 'executive_summary':
+                    # The summary only ever reads posted entries of every journal
+                    states, journals, analytic = ('posted',), None, None
+                else:
+                    states = aggregate_model._states_for(report_kwargs.get('only_posted', True),
+                                                         report_kwargs.get('include_draft', False))
+                    journals = report_kwargs.get('journals') or None
+                    analytic = report_kwargs.get('analytic_accounts') or None
+
+                # Same filters -> same aggregate, computed once for the whole batch
+                aggregate_key = (states, tuple(sorted(journals or ())), tuple(sorted(analytic or ())))
+                if aggregate_key not in aggregates:
+                    aggregates[aggregate_key] = aggregate_model._get_report_aggregate(
+                        company_id,
+                        report=report,
+                        company_ids=company_ids,
+                        currency_id=currency_id,
+                        date_from=date_from,
+                        date_to=date_to,
+                        states=states,
+                        journal_ids=journals,
+                        analytic_account_ids=analytic,
+                    )
+
+                model_name, method = BATCH_REPORTS[report]
+                if report == 'executive_summary':
+                    report_kwargs = {'comparison': report_kwargs.get('comparison')}
+                results[key] = getattr(request.env[model_name], method)(
+                    date_from=date_from,
+                    date_to=date_to,
+                    company_id=company_id,
+                    company_ids=company_ids,
+                    currency_id=currency_id,
+                    aggregate=aggregates[aggregate_key],
+                    **report_kwargs,
+                )
+
+            return {
+                'success': True,
+                'results': results,
+                'ledger_passes': len(aggregates),
+            }
+
+        except Exception as e:
+            _logger.error(f"Error generating report batch: {str(e)}")
+            return {'error': str(e)}
+
+    @http.route('/account/reports/unfold', type='json', auth='user')
+    def unfold_report_line(self, report, unfold_key, line_id, params=None):
+        """
+        Children of a lazily unfolded line, from the response stored under ``unfold_key``
+
+        The stored children are those computed with the parent totals, so they
+        always add up to the parent line. Once expired they are recomputed
+        from the report filters in ``params`` (``stored`` is then false),
+        without storing anything; without ``params`` ``expired`` asks the
+        client to reload.
+        """
+        if not request.env.user.has_group('account.group_account_user'):
+            return {'error': 'Access denied'}
+        if report not in UNFOLD_REPORTS:
+            return {'success': False, 'error': f'Unknown report {report}'}
+
+        try:
+            if params is None:
+                children = request.env['account.report.aggregate.store']._get_children(report, unfold_key, line_id)
+                if children is None:
+                    return {'success': False, 'expired': True, 'error': 'Report data expired, please reload'}
+                stored = True
+            else:
+                model_name, method = UNFOLD_REPORTS[report]
+                report_params = {key: value for key, value in params.items() if key in UNFOLD_PARAMS}
+                children, stored = request.env['account.report.aggregate']._get_line_children(
+                    report, unfold_key, line_id,
+                    lambda: getattr(request.env[model_name], method)(**report_params)['lines'])
+            return {
+                'success': True,
+                'line_id': line_id,
+                'sub_lines': children,
+                'stored': stored,
+            }
+
+        except Exception as e:
+            _logger.error(f"Error unfolding {report} line {line_id}: {str(e)}")
+            return {'success': False, 'error': str(e)}
@@ -1,4 +1,19 @@
 from . import account_asset_simple
+from . import account_asset_depreciation_line
+from . import account_asset_register
+from . import account_move
+from . import account_reconcile_batch
+from . import account_account
+from . import account_deferral
+from . import account_deferral_report
+from . import account_fx_revaluation
+from . import account_invoice_analysis
+from . import product_template
+from . import account_hash_verification
+from . import account_report_aggregate
+from . import account_report_aggregate_store
+from . import account_report_usage
+from . import account_consolidation_elimination
 from . import account_balance_sheet
 from . import account_profit_loss
 from . import account_cash_flow
@@ -10,3 +25,6 @@ from . import account_journal_audit
 from . import account_partner_ledger
 from . import account_aged_receivable
 from . import account_aged_payable
+from . import account_ledger_export
+from . import ir_websocket
+from . import ir_http
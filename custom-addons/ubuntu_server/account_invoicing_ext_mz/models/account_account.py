@@ -0,0 +1,32 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+
+
+class AccountAccount(models.Model):
+    _inherit = 'account.account'
+
+    # Deferral engine (account.deferral.line): posted items of a deferral
+    # account are recognized in the recognition account month by month
+    deferral_type = fields.Selection([
+        ('expense', 'Deferred Expense'),
+        ('revenue', 'Deferred Revenue'),
+    ], help="Recognize the journal items of this account over the following months.")
+    deferral_months = fields.Integer(default=12, help="Months over which an item is recognized, "
+                                                      "starting with the month of its date.")
+    deferral_recognition_account_id = fields.Many2one('account.account', string='Recognition Account',
+                                                      help="Expense or income account the deferred amounts "
+                                                           "are recognized in.")
+
+    def write(self, vals):
+        res = super().write(vals)
+        if vals.get('deferral_type') or vals.get('deferral_months') or vals.get('deferral_recognition_account_id'):
+            # Plan the items already posted on the new deferral accounts
+            for company in self.filtered('deferral_type').company_id:
+                self.env['account.deferral.line'].sudo()._generate_deferral_schedule(company)
+        return res
+
+    @api.constrains('deferral_type', 'deferral_months', 'deferral_recognition_account_id')
+    def _check_deferral(self):
+        for account in self.filtered('deferral_type'):
+            if account.deferral_months <= 0 or not account.deferral_recognition_account_id:
+                raise ValidationError(_('A deferral account needs a number of months and a recognition account.'))
@@ -2,6 +2,8 @@ from odoo import models, fields, api
 from datetime import datetime, timedelta, date
 import logging
 
+from ..tools import columnar
+
 _logger = logging.getLogger(__name__)
 
 class AccountAgedPayable(models.TransientModel):
@@ -11,7 +13,7 @@ class AccountAgedPayable(models.TransientModel):
     @api.model
     def get_aged_payable_data(self, as_of_date=None, account_type='payable', 
                               partner_ids=None, period_length=30, 
-                              posted_entries=True, company_id=None):
+                              posted_entries=True, company_id=None, format='rows'):
         """Get aged payable data for the report"""
         try:
             if not company_id:
@@ -163,7 +165,7 @@ class AccountAgedPayable(models.TransientModel):
             else:
                 as_of_date_str = ''
             
-            return {
+            result = {
                 'partners': partners_list,
                 'totals': totals,
                 'periods': [
@@ -183,6 +185,10 @@ class AccountAgedPayable(models.TransientModel):
                 'period_length': period_length,
                 'unposted_warning': not posted_entries
             }
+            if format == 'columnar':
+                return columnar.encode_report(result, 'partners', 'lines',
+                                              ('date', 'account_code', 'account_name'))
+            return result
             
         except Exception as e:
             _logger.error(f"Error getting aged payable data: {str(e)}")
@@ -2,6 +2,8 @@ from odoo import models, fields, api
 from datetime import datetime, timedelta, date
 import logging
 
+from ..tools import columnar
+
 _logger = logging.getLogger(__name__)
 
 class AccountAgedReceivable(models.TransientModel):
@@ -11,7 +13,7 @@ class AccountAgedReceivable(models.TransientModel):
     @api.model
     def get_aged_receivable_data(self, as_of_date=None, account_type='receivable', 
                                  partner_ids=None, period_length=30, 
-                                 posted_entries=True, company_id=None):
+                                 posted_entries=True, company_id=None, format='rows'):
         """Get aged receivable data for the report"""
         try:
             if not company_id:
@@ -165,7 +167,7 @@ class AccountAgedReceivable(models.TransientModel):
             else:
                 as_of_date_str = ''
             
-            return {
+            result = {
                 'partners': partners_list,
                 'totals': totals,
                 'periods': [
@@ -185,6 +187,10 @@ class AccountAgedReceivable(models.TransientModel):
                 'period_length': period_length,
                 'unposted_warning': not posted_entries
             }
+            if format == 'columnar':
+                return columnar.encode_report(result, 'partners', 'lines',
+                                              ('date', 'account_code', 'account_name'))
+            return result
             
         except Exception as e:
             _logger.error(f"Error getting aged receivable data: {str(e)}")
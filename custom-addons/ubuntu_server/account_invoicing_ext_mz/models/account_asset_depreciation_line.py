@@ -0,0 +1,40 @@
+from odoo import models, fields
+
+
+class AccountAssetDepreciationLine(models.Model):
+    _name = "account.asset.depreciation.line"
+    _description = "Asset Depreciation Schedule (MZ)"
+    _order = "asset_id, date"
+
+    asset_id = fields.Many2one("account.asset.simple", required=True, readonly=True, ondelete="cascade")
+    company_id = fields.Many2one("res.company", required=True, readonly=True)
+    currency_id = fields.Many2one(related="asset_id.currency_id")
+    date = fields.Date(required=True, readonly=True, help="End of the depreciated period")
+    amount = fields.Monetary(readonly=True)
+    depreciated = fields.Monetary(readonly=True, help="Accumulated depreciation at the end of the period")
+    value_net = fields.Monetary(readonly=True, help="Net book value at the end of the period")
+    move_id = fields.Many2one("account.move", readonly=True, ondelete="set null",
+                              help="Depreciation entry; empty while the period is only planned, and for the "
+                                   "periods depreciated before the asset had a schedule")
+
+    # Also the (asset_id, date) index of the as-of lookups
+    _sql_constraints = [
+        ("asset_date_uniq", "unique(asset_id, date)", "An asset has one depreciation line per period."),
+    ]
+
+    def init(self):
+        super().init()
+        # Plan the assets that have no schedule yet, and give the assets
+        # depreciated before they had one their history (existing assets on upgrade)
+        self.env.cr.execute("""
+            SELECT a.id
+              FROM account_asset_simple a
+             WHERE NOT EXISTS (SELECT 1
+                                 FROM account_asset_depreciation_line l
+                                WHERE l.asset_id = a.id
+                                  AND (a.last_depreciation_date IS NULL OR l.date <= a.last_depreciation_date))
+               AND (a.state = 'open' OR a.accumulated_depr > 0)
+        """)
+        asset_ids = [row[0] for row in self.env.cr.fetchall()]
+        if asset_ids:
+            self.env["account.asset.simple"].browse(asset_ids)._generate_depreciation_schedule()
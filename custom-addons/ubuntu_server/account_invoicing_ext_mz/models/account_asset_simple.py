@@ -1,4 +1,19 @@
-from odoo import models, fields, _
+from odoo import models, fields, api, Command, _
+from odoo.tools import date_utils
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Assets per depreciation entry: one entry per journal and period, split so
+# that no single entry carries more lines than this many assets
+DEPRECIATION_MOVE_MAX_ASSETS = 1000
+
+# Asset fields the depreciation schedule is generated from
+DEPRECIATION_SCHEDULE_FIELDS = {
+    "original_value", "currency_id", "acquisition_date", "depreciation_months",
+    "accumulated_depr", "last_depreciation_date", "state", "company_id",
+}
+
 
 class AccountAssetSimple(models.Model):
     _name = "account.asset.simple"
@@ -6,36 +21,320 @@ class AccountAssetSimple(models.Model):
     _order = "acquisition_date desc, id desc"
 
     name = fields.Char(required=True)
+    company_id = fields.Many2one("res.company", required=True, default=lambda self: self.env.company)
     acquisition_date = fields.Date(required=True, default=fields.Date.context_today)
     original_value = fields.Monetary(required=True)
     currency_id = fields.Many2one("res.currency", required=True, default=lambda self: self.env.company.currency_id.id)
     depreciation_months = fields.Integer(required=True, default=12)
     accumulated_depr = fields.Monetary(default=0.0)
     value_net = fields.Monetary(compute="_compute_value_net", store=True)
+    last_depreciation_date = fields.Date(readonly=True, copy=False,
+                                         help="End of the last period depreciated; a period is never posted twice")
     expense_account_id = fields.Many2one("account.account", required=True, domain=[("internal_type","=","other")])
     asset_account_id = fields.Many2one("account.account", required=True, domain=[("internal_type","=","other")])
     journal_id = fields.Many2one("account.journal", required=True, domain=[("type","=","general")])
     state = fields.Selection([("open","Running"),("closed","Closed")], default="open")
+    depreciation_line_ids = fields.One2many("account.asset.depreciation.line", "asset_id", readonly=True)
+
+    def init(self):
+        super().init()
+        # Assets depreciated by hand before the month-end run existed
+        self.env.cr.execute("""
+            SELECT id
+              FROM account_asset_simple
+             WHERE last_depreciation_date IS NULL
+               AND accumulated_depr > 0
+        """)
+        asset_ids = [row[0] for row in self.env.cr.fetchall()]
+        if asset_ids:
+            self.browse(asset_ids)._backfill_last_depreciation_date()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._generate_depreciation_schedule()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if DEPRECIATION_SCHEDULE_FIELDS.intersection(vals):
+            self._generate_depreciation_schedule()
+        return res
 
     def action_post_month(self):
-        for rec in self.filtered(lambda r: r.state == "open"):
-            monthly = (rec.original_value / rec.depreciation_months) if rec.depreciation_months else 0.0
-            if monthly <= 0:
+        """Depreciate the selected assets for the current month"""
+        period_end = date_utils.end_of(fields.Date.context_today(self), "month")
+        for company in self.company_id:
+            self.filtered(lambda r: r.company_id == company).with_company(company)._post_depreciation(period_end)
+
+    @api.model
+    def _cron_post_depreciation(self):
+        """Month-end run: depreciate every open asset of every company for the previous month"""
+        period_end = date_utils.start_of(fields.Date.context_today(self), "month") - date_utils.relativedelta(days=1)
+        for company in self.env["res.company"].search([]):
+            assets = self.with_company(company).search([
+                ("company_id", "=", company.id),
+                ("state", "=", "open"),
+            ])
+            try:
+                moves = assets._post_depreciation(period_end)
+                self.env.cr.commit()
+                _logger.info(f"Depreciation {period_end}: {len(moves)} entries posted for {company.name}")
+            except Exception as e:
+                self.env.cr.rollback()
+                _logger.error(f"Error posting the depreciation of {period_end} for {company.name}: {str(e)}")
+
+    def _post_depreciation(self, period_end):
+        """
+        Post one period of depreciation for the assets in ``self`` (one company)
+
+        Amounts of all assets are computed together; one entry per journal
+        (split every DEPRECIATION_MOVE_MAX_ASSETS assets) dated
+        ``period_end`` is created in a single create and posted in a single
+        call, and the assets are updated in one statement. Assets already
+        depreciated for the period are skipped, and the rows are locked
+        while posting, so reruns and concurrent runs never post a period
+        twice. Returns the posted entries.
+        """
+        if not self:
+            return self.env["account.move"]
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT id
+              FROM account_asset_simple
+             WHERE id IN %s
+               AND state = 'open'
+               AND acquisition_date <= %s
+               AND (last_depreciation_date IS NULL OR last_depreciation_date < %s)
+             ORDER BY journal_id, id
+               FOR UPDATE SKIP LOCKED
+        """, [tuple(self.ids), period_end, period_end])
+        assets = self.browse([row[0] for row in self.env.cr.fetchall()])
+        assets.fetch(["name", "original_value", "accumulated_depr", "depreciation_months", "currency_id",
+                      "expense_account_id", "asset_account_id", "journal_id"])
+
+        amounts = {}
+        closes = {}
+        for asset in assets:
+            remaining = asset.original_value - asset.accumulated_depr
+            monthly = asset.original_value / asset.depreciation_months if asset.depreciation_months else 0.0
+            amount = asset.currency_id.round(min(monthly, remaining))
+            if amount <= 0:
                 continue
-            move = self.env["account.move"].create({
-                "move_type": "entry",
-                "date": fields.Date.today(),
-                "journal_id": rec.journal_id.id,
-                "line_ids": [
-                    (0,0,{"name": _("Depreciation %s") % rec.name, "account_id": rec.expense_account_id.id, "debit": monthly, "credit": 0.0}),
-                    (0,0,{"name": _("Depreciation %s") % rec.name, "account_id": rec.asset_account_id.id, "debit": 0.0, "credit": monthly}),
-                ]
-            })
-            move.action_post()
-            rec.accumulated_depr += monthly
-            if rec.original_value - rec.accumulated_depr <= 0.0001:
-                rec.state = "closed"
+            amounts[asset.id] = amount
+            closes[asset.id] = asset.currency_id.is_zero(remaining - amount)
+        if not amounts:
+            return self.env["account.move"]
+
+        label = _("Depreciation %s", period_end.strftime("%m/%Y"))
+        move_vals = []
+        move_assets = []
+        depreciated = assets.filtered(lambda asset: asset.id in amounts)
+        for journal in depreciated.journal_id:
+            journal_assets = depreciated.filtered(lambda asset: asset.journal_id == journal)
+            for start in range(0, len(journal_assets), DEPRECIATION_MOVE_MAX_ASSETS):
+                line_ids = []
+                move_assets.append(journal_assets[start:start + DEPRECIATION_MOVE_MAX_ASSETS])
+                for asset in move_assets[-1]:
+                    name = _("Depreciation %s", asset.name)
+                    amount = amounts[asset.id]
+                    line_ids += [
+                        Command.create({"name": name, "account_id": asset.expense_account_id.id, "debit": amount, "credit": 0.0}),
+                        Command.create({"name": name, "account_id": asset.asset_account_id.id, "debit": 0.0, "credit": amount}),
+                    ]
+                move_vals.append({
+                    "move_type": "entry",
+                    "date": period_end,
+                    "journal_id": journal.id,
+                    "company_id": self.env.company.id,
+                    "ref": label,
+                    "line_ids": line_ids,
+                })
+        moves = self.env["account.move"].create(move_vals)
+        moves.action_post()
+
+        asset_ids = list(amounts)
+        self.env.cr.execute("""
+            UPDATE account_asset_simple a
+               SET accumulated_depr = a.accumulated_depr + v.amount,
+                   value_net = a.original_value - (a.accumulated_depr + v.amount),
+                   state = CASE WHEN v.closes THEN 'closed' ELSE a.state END,
+                   last_depreciation_date = %(period_end)s,
+                   write_uid = %(uid)s,
+                   write_date = %(now)s
+              FROM unnest(%(ids)s::int[], %(amounts)s::numeric[], %(closes)s::bool[]) AS v(id, amount, closes)
+             WHERE a.id = v.id
+        """, {
+            "ids": asset_ids,
+            "amounts": [amounts[asset_id] for asset_id in asset_ids],
+            "closes": [closes[asset_id] for asset_id in asset_ids],
+            "period_end": period_end,
+            "uid": self.env.uid,
+            "now": fields.Datetime.now(),
+        })
+        self.browse(asset_ids).invalidate_recordset([
+            "accumulated_depr", "value_net", "state", "last_depreciation_date", "write_uid", "write_date",
+        ])
+
+        # The posted period replaces its planned line, and the rest of the
+        # schedule is planned again from the new accumulated depreciation
+        move_of = {asset.id: move.id for move, move_batch in zip(moves, move_assets) for asset in move_batch}
+        self.env.cr.execute("""
+            INSERT INTO account_asset_depreciation_line (asset_id, company_id, date, amount, depreciated, value_net,
+                                                         move_id, create_uid, create_date, write_uid, write_date)
+            SELECT a.id, a.company_id, %(period_end)s, v.amount, a.accumulated_depr, a.value_net,
+                   v.move_id, %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM unnest(%(ids)s::int[], %(amounts)s::numeric[], %(move_ids)s::int[]) AS v(id, amount, move_id)
+              JOIN account_asset_simple a ON a.id = v.id
+                ON CONFLICT (asset_id, date) DO UPDATE
+               SET amount = EXCLUDED.amount,
+                   depreciated = EXCLUDED.depreciated,
+                   value_net = EXCLUDED.value_net,
+                   move_id = EXCLUDED.move_id,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+        """, {
+            "ids": asset_ids,
+            "amounts": [amounts[asset_id] for asset_id in asset_ids],
+            "move_ids": [move_of[asset_id] for asset_id in asset_ids],
+            "period_end": period_end,
+            "uid": self.env.uid,
+            "now": fields.Datetime.now(),
+        })
+        self.browse(asset_ids)._generate_depreciation_schedule()
+        return moves
+
+    def _backfill_last_depreciation_date(self):
+        """
+        Set the last depreciated period of assets depreciated without one
+
+        The period is the later of the month of the last depreciation entry
+        of the asset (the former per-asset button posted "Depreciation
+        <asset>" entries in its journal, dated the day it was pressed) and
+        the month reached by ``accumulated_depr`` counted in monthly amounts
+        from the acquisition month. Without it the month-end run would
+        depreciate those periods again. The entries are matched on their
+        whole label, untranslated or in the language of the user.
+        """
+        if not self.ids:
+            return
+        labels = list({"Depreciation %s", _("Depreciation %s")})
+        self.flush_model()
+        self.env["account.move.line"].flush_model(["name", "account_id", "move_id", "parent_state"])
+        self.env.cr.execute("""
+            UPDATE account_asset_simple a
+               SET last_depreciation_date = GREATEST(
+                       (SELECT (date_trunc('month', MAX(l.date)) + interval '1 month' - interval '1 day')::date
+                          FROM account_move_line l
+                         WHERE l.account_id = a.expense_account_id
+                           AND l.journal_id = a.journal_id
+                           AND l.parent_state = 'posted'
+                           AND l.debit > 0
+                           AND l.name IN (SELECT replace(label, '%%s', a.name)
+                                            FROM unnest(%(labels)s::text[]) AS label)),
+                       (date_trunc('month', a.acquisition_date)
+                        + make_interval(months => GREATEST(ROUND(a.accumulated_depr / NULLIF(ROUND(
+                              a.original_value / NULLIF(a.depreciation_months, 0), c.decimal_places), 0))::int, 1))
+                        - interval '1 day')::date)
+              FROM res_currency c
+             WHERE c.id = a.currency_id
+               AND a.id IN %(asset_ids)s
+               AND a.last_depreciation_date IS NULL
+               AND a.accumulated_depr > 0
+        """, {"asset_ids": tuple(self.ids), "labels": labels})
+        self.invalidate_recordset(["last_depreciation_date"])
+
+    def _generate_depreciation_schedule(self):
+        """
+        Plan the remaining periods of the assets in ``self``, in bulk
+
+        Planned lines are replaced by one line per month from the month after
+        the last depreciated period (or the acquisition month) until the
+        asset is fully depreciated, with the amounts the month-end run posts:
+        the rounded monthly amount, capped by what remains. Lines of the
+        depreciated periods are kept; an asset depreciated before it had a
+        schedule first gets its history, ``accumulated_depr`` spread evenly
+        from the acquisition month to its last depreciated period. Every
+        line carries the accumulated depreciation and net book value at the
+        end of its period.
+        """
+        if not self.ids:
+            return
+        self._backfill_last_depreciation_date()
+        self.flush_model()
+        params = {
+            "ids": tuple(self.ids),
+            "uid": self.env.uid,
+            "now": fields.Datetime.now(),
+        }
+        self.env.cr.execute("""
+            DELETE FROM account_asset_depreciation_line l
+             USING account_asset_simple a
+             WHERE a.id = l.asset_id
+               AND l.asset_id IN %(ids)s
+               AND l.move_id IS NULL
+               AND (a.last_depreciation_date IS NULL OR l.date > a.last_depreciation_date)
+        """, params)
+        self.env.cr.execute("""
+            INSERT INTO account_asset_depreciation_line (asset_id, company_id, date, amount, depreciated, value_net,
+                                                         create_uid, create_date, write_uid, write_date)
+            SELECT a.id,
+                   a.company_id,
+                   (date_trunc('month', a.acquisition_date) + make_interval(months => k) - interval '1 day')::date,
+                   h.depreciated - h.previous,
+                   h.depreciated,
+                   a.original_value - h.depreciated,
+                   %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM account_asset_simple a
+              JOIN res_currency c ON c.id = a.currency_id
+             CROSS JOIN LATERAL (
+                   SELECT ((EXTRACT(YEAR FROM a.last_depreciation_date) - EXTRACT(YEAR FROM a.acquisition_date)) * 12
+                           + EXTRACT(MONTH FROM a.last_depreciation_date) - EXTRACT(MONTH FROM a.acquisition_date)
+                           + 1)::int AS periods
+                   ) n
+             CROSS JOIN LATERAL generate_series(1, n.periods) AS k
+             CROSS JOIN LATERAL (
+                   SELECT CASE WHEN k = n.periods THEN a.accumulated_depr
+                               ELSE ROUND(a.accumulated_depr * k / n.periods, c.decimal_places) END AS depreciated,
+                          ROUND(a.accumulated_depr * (k - 1) / n.periods, c.decimal_places) AS previous
+                   ) h
+             WHERE a.id IN %(ids)s
+               AND a.accumulated_depr > 0
+               AND a.last_depreciation_date IS NOT NULL
+               AND NOT EXISTS (SELECT 1
+                                 FROM account_asset_depreciation_line l
+                                WHERE l.asset_id = a.id
+                                  AND l.date <= a.last_depreciation_date)
+                ON CONFLICT (asset_id, date) DO NOTHING
+        """, params)
+        self.env.cr.execute("""
+            INSERT INTO account_asset_depreciation_line (asset_id, company_id, date, amount, depreciated, value_net,
+                                                         create_uid, create_date, write_uid, write_date)
+            SELECT a.id,
+                   a.company_id,
+                   (date_trunc('month', s.last_period) + make_interval(months => k + 1) - interval '1 day')::date,
+                   LEAST(k * s.monthly, s.remaining) - LEAST((k - 1) * s.monthly, s.remaining),
+                   s.accumulated + LEAST(k * s.monthly, s.remaining),
+                   s.remaining - LEAST(k * s.monthly, s.remaining),
+                   %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM account_asset_simple a
+              JOIN res_currency c ON c.id = a.currency_id
+             CROSS JOIN LATERAL (
+                   SELECT COALESCE(a.last_depreciation_date,
+                                   (date_trunc('month', a.acquisition_date) - interval '1 day')::date) AS last_period,
+                          ROUND(a.original_value / NULLIF(a.depreciation_months, 0), c.decimal_places) AS monthly,
+                          COALESCE(a.accumulated_depr, 0) AS accumulated,
+                          a.original_value - COALESCE(a.accumulated_depr, 0) AS remaining
+                   ) s
+             CROSS JOIN LATERAL generate_series(1, CEIL(s.remaining / NULLIF(s.monthly, 0))::int) AS k
+             WHERE a.id IN %(ids)s
+               AND a.state = 'open'
+                ON CONFLICT (asset_id, date) DO NOTHING
+        """, params)
+        self.env["account.asset.depreciation.line"].invalidate_model()
+        self.invalidate_recordset(["depreciation_line_ids"])
 
+    @api.depends("original_value", "accumulated_depr")
     def _compute_value_net(self):
         for rec in self:
             rec.value_net = rec.original_value - (rec.accumulated_depr or 0.0)
@@ -12,9 +12,23 @@ class AccountBalanceSheet(models.TransientModel):
     def get_balance_sheet_data(self, date_from=None, date_to=None, journals=None, company_id=None, 
                               only_posted=True, include_draft=False, hide_zero=False,
                               comparison=False, comparison_date=None, comparison_mode='none',
-                              analytic_accounts=None, analytic_plans=None, **kwargs):
+                              analytic_accounts=None, analytic_plans=None, aggregate=None, lazy=False,
+                              company_ids=None, currency_id=None, analytic_breakdown=False, account_groups=False,
+                              **kwargs):
         """
         Generate Balance Sheet data with hierarchical structure
+
+        ``aggregate`` may carry a per-account aggregate already computed for
+        the same filters (see account.report.aggregate), e.g. by the batch route.
+        With ``lazy`` only section lines are returned; account lines are
+        fetched through /account/reports/unfold with the returned ``unfold_key``.
+        With ``company_ids`` the selected companies are consolidated in
+        ``currency_id``, after intercompany eliminations.
+        With ``analytic_accounts`` amounts are weighted by their analytic
+        distribution; ``analytic_breakdown`` adds one column per analytic
+        account (``analytic_columns``, ``analytic_balances`` on each line).
+        With ``account_groups`` the accounts of each section are nested in
+        their account.group hierarchy, with subtotals per group.
         """
         if not date_to:
             date_to = fields.Date.today()
@@ -24,29 +38,137 @@ class AccountBalanceSheet(models.TransientModel):
             date_from = date(date_to.year, 1, 1)
         if not company_id:
             company_id = self.env.company.id
+        self.env['account.report.aggregate']._check_company_access([company_id])
+        # Before computing: the stored children must not be newer than their key
+        ledger_version = self.env['account.move.line'].get_ledger_version() if lazy else None
             
-        domain = [
-            ('date', '<=', date_to),
-            ('company_id', '=', company_id),
-        ]
+        # Per-account balances at date_to, from one grouped ledger query
+        aggregate_model = self.env['account.report.aggregate']
+        analytic_aggregates = None
+        if aggregate is None and analytic_breakdown and analytic_accounts and not company_ids:
+            aggregate, analytic_aggregates = aggregate_model._get_analytic_aggregate(
+                company_id,
+                analytic_accounts,
+                date_to=date_to,
+                states=aggregate_model._states_for(only_posted, include_draft),
+                journal_ids=journals,
+            )
+        elif aggregate is None:
+            aggregate = aggregate_model._get_report_aggregate(
+                company_id,
+                report='balance_sheet',
+                company_ids=company_ids,
+                currency_id=currency_id,
+                date_to=date_to,
+                states=aggregate_model._states_for(only_posted, include_draft),
+                journal_ids=journals,
+                analytic_account_ids=analytic_accounts,
+            )
         
-        # Filter by posted state
-        if only_posted and not include_draft:
-            domain.append(('parent_state', '=', 'posted'))
-        elif not only_posted or include_draft:
-            domain.append(('parent_state', 'in', ['posted', 'draft']))
+        # Build hierarchical structure
+        balance_sheet = {
+            'date': date_to.strftime('%d/%m/%Y'),
+            'company': self.env.company.name,
+            'currency': self.env.company.currency_id.symbol,
+            'lines': []
+        }
+        if company_ids:
+            balance_sheet['company'], currency = self.env['account.report.aggregate']._get_consolidation_header(
+                company_ids, currency_id)
+            balance_sheet['currency'] = currency.symbol
+            balance_sheet['consolidated'] = True
+            balance_sheet['eliminated'] = sum(row.get('eliminated', 0.0) for row in aggregate.values())
+
+        lines = self._get_balance_sheet_lines(aggregate)
         
-        if journals:
-            domain.append(('journal_id', 'in', journals))
+        if account_groups:
+            aggregate_model._nest_account_lines(company_id, lines)
+            balance_sheet['account_groups'] = True
+
+        balance_sheet['lines'] = lines
+        
+        # Check if there are unposted entries
+        unposted_moves = self.env['account.move'].search_count([
+            ('state', '=', 'draft'),
+            ('date', '<=', date_to),
+            ('company_id', 'in', company_ids or [company_id])
+        ])
         
-        # Apply analytic filtering if provided
-        if analytic_accounts:
-            domain.append(('analytic_account_id', 'in', analytic_accounts))
+        balance_sheet['has_unposted'] = unposted_moves > 0
+        totals = {line['id']: line['balance'] for line in lines}
+        balance_sheet['total_balance'] = totals['assets'] == totals['total_liabilities_equity']
+        
+        # Add comparison data if requested
+        if comparison and comparison_date:
+            comparison_date_obj = fields.Date.from_string(comparison_date) if isinstance(comparison_date, str) else comparison_date
+            comparison_data = self.get_balance_sheet_data(
+                date_from=date_from,
+                date_to=comparison_date_obj,
+                journals=journals,
+                company_id=company_id,
+                only_posted=only_posted,
+                include_draft=include_draft,
+                hide_zero=hide_zero,
+                company_ids=company_ids,
+                currency_id=currency_id,
+                account_groups=account_groups,
+                comparison=False  # Avoid recursive comparison
+            )
+            balance_sheet['comparison'] = {
+                'date': comparison_date_obj.strftime('%d/%m/%Y'),
+                'lines': comparison_data.get('lines', [])
+            }
             
-        move_lines = self.env['account.move.line'].search(domain)
+            # Map comparison balances to main lines
+            def map_comparison_balances(main_lines, comp_lines):
+                comp_dict = {line['id']: line for line in comp_lines}
+                for main_line in main_lines:
+                    comp_line = comp_dict.get(main_line['id'], {})
+                    main_line['comparison_balance'] = comp_line.get('balance', 0.0)
+                    if 'raw_balance' in comp_line:
+                        main_line['comparison_raw_balance'] = comp_line['raw_balance']
+                    if main_line.get('children'):
+                        comp_children = next((cl['children'] for cl in comp_lines if cl['id'] == main_line['id']), [])
+                        if comp_children:
+                            map_comparison_balances(main_line['children'], comp_children)
+            
+            if balance_sheet.get('comparison'):
+                map_comparison_balances(lines, balance_sheet['comparison']['lines'])
+        
+        if analytic_aggregates is not None:
+            # Same lines from each per-analytic aggregate of the single analytic query
+            lines_by_analytic = {}
+            for analytic_id, analytic_aggregate in analytic_aggregates.items():
+                lines_by_analytic[analytic_id] = self._get_balance_sheet_lines(analytic_aggregate)
+                if account_groups:
+                    aggregate_model._nest_account_lines(company_id, lines_by_analytic[analytic_id])
+            balance_sheet['analytic_columns'] = aggregate_model._add_analytic_balances(lines, lines_by_analytic)
+
+        if lazy:
+            params = {
+                'date_from': date_from,
+                'date_to': date_to,
+                'journals': journals,
+                'only_posted': only_posted,
+                'include_draft': include_draft,
+                'analytic_accounts': analytic_accounts,
+                'analytic_breakdown': analytic_breakdown,
+                'account_groups': account_groups,
+                'comparison_date': comparison_date if comparison else None,
+                'company_ids': company_ids,
+                'currency_id': currency_id,
+            }
+            balance_sheet['unfold_key'] = aggregate_model._defer_account_lines(
+                'balance_sheet', params, company_id, lines, ledger_version)
+            if balance_sheet.get('comparison'):
+                aggregate_model._strip_account_lines(balance_sheet['comparison']['lines'])
         
+        return balance_sheet
+    
+    @api.model
+    def _get_balance_sheet_lines(self, aggregate):
+        """Report lines (sections, subtotals and accounts) of a per-account aggregate"""
         # Group accounts by type with details
-        account_balances = {}
         accounts_detail = {
             'asset_cash': [],
             'liability_credit_card': [],
@@ -66,28 +188,15 @@ class AccountBalanceSheet(models.TransientModel):
             'expense_depreciation': []
         }
         
-        for line in move_lines:
-            account = line.account_id
-            key = account.id
-            if key not in account_balances:
-                account_balances[key] = {
-                    'account': account,
-                    'balance': 0.0,
-                    'name': account.name,
-                    'code': account.code,
-                    'account_type': account.account_type
-                }
-            account_balances[key]['balance'] += line.balance
-        
         # Organize accounts by type for detail view
-        for acc_id, acc_data in account_balances.items():
+        for acc_id, acc_data in aggregate.items():
             acc_type = acc_data['account_type']
-            if acc_type in accounts_detail and acc_data['balance'] != 0:
+            if acc_type in accounts_detail and acc_data['end_balance'] != 0:
                 accounts_detail[acc_type].append({
                     'id': f'account_{acc_id}',
                     'code': acc_data['code'],
                     'name': f"{acc_data['code']} {acc_data['name']}" if acc_data['code'] else acc_data['name'],
-                    'balance': acc_data['balance'],
+                    'balance': acc_data['end_balance'],
                     'level': 3,
                     'unfoldable': False,
                     'account_type': acc_type
@@ -97,14 +206,6 @@ class AccountBalanceSheet(models.TransientModel):
         for acc_type in accounts_detail:
             accounts_detail[acc_type].sort(key=lambda x: x.get('code', ''))
             
-        # Build hierarchical structure
-        balance_sheet = {
-            'date': date_to.strftime('%d/%m/%Y'),
-            'company': self.env.company.name,
-            'currency': self.env.company.currency_id.symbol,
-            'lines': []
-        }
-        
         # Calculate totals
         # Bank and Cash
         bank_cash_accounts = accounts_detail.get('asset_cash', []) + accounts_detail.get('liability_credit_card', [])
@@ -254,6 +355,7 @@ class AccountBalanceSheet(models.TransientModel):
                                 'level': 2,
                                 'unfoldable': True,  # Now expandable
                                 'balance': current_liabilities_total,
+                                'raw_balance': sum(acc['balance'] for acc in current_liabilities_accounts),
                                 'account_type': 'liability_current',
                                 'children': current_liabilities_accounts  # Add account details
                             },
@@ -263,6 +365,7 @@ class AccountBalanceSheet(models.TransientModel):
                                 'level': 2,
                                 'unfoldable': True if payables_accounts else False,
                                 'balance': payables_total,
+                                'raw_balance': sum(acc['balance'] for acc in payables_accounts),
                                 'account_type': 'liability_payable',
                                 'children': payables_accounts
                             }
@@ -274,6 +377,7 @@ class AccountBalanceSheet(models.TransientModel):
                         'level': 1,
                         'unfoldable': True if non_current_liabilities_accounts else False,
                         'balance': non_current_liabilities_total,
+                        'raw_balance': sum(acc['balance'] for acc in non_current_liabilities_accounts),
                         'account_type': 'liability_non_current',
                         'children': non_current_liabilities_accounts
                     }
@@ -358,51 +462,7 @@ class AccountBalanceSheet(models.TransientModel):
                 'children': []
             }
         ]
-        
-        balance_sheet['lines'] = lines
-        
-        # Check if there are unposted entries
-        unposted_moves = self.env['account.move'].search_count([
-            ('state', '=', 'draft'),
-            ('date', '<=', date_to),
-            ('company_id', '=', company_id)
-        ])
-        
-        balance_sheet['has_unposted'] = unposted_moves > 0
-        balance_sheet['total_balance'] = assets_total == (liabilities_total + equity_total)
-        
-        # Add comparison data if requested
-        if comparison and comparison_date:
-            comparison_date_obj = fields.Date.from_string(comparison_date) if isinstance(comparison_date, str) else comparison_date
-            comparison_data = self.get_balance_sheet_data(
-                date_from=date_from,
-                date_to=comparison_date_obj,
-                journals=journals,
-                company_id=company_id,
-                only_posted=only_posted,
-                include_draft=include_draft,
-                hide_zero=hide_zero,
-                comparison=False  # Avoid recursive comparison
-            )
-            balance_sheet['comparison'] = {
-                'date': comparison_date_obj.strftime('%d/%m/%Y'),
-                'lines': comparison_data.get('lines', [])
-            }
-            
-            # Map comparison balances to main lines
-            def map_comparison_balances(main_lines, comp_lines):
-                comp_dict = {line['id']: line['balance'] for line in comp_lines}
-                for main_line in main_lines:
-                    main_line['comparison_balance'] = comp_dict.get(main_line['id'], 0.0)
-                    if main_line.get('children'):
-                        comp_children = next((cl['children'] for cl in comp_lines if cl['id'] == main_line['id']), [])
-                        if comp_children:
-                            map_comparison_balances(main_line['children'], comp_children)
-            
-            if balance_sheet.get('comparison'):
-                map_comparison_balances(lines, balance_sheet['comparison']['lines'])
-        
-        return balance_sheet
+        return lines
     
     @api.model
     def export_to_excel(self, data):
@@ -4,6 +4,27 @@ import logging
 
 _logger = logging.getLogger(__name__)
 
+CASH_BEGINNING_BALANCE_QUERY = """
+    SELECT COALESCE(SUM(aml.balance), 0) AS balance
+      FROM account_move_line aml
+     WHERE aml.company_id = %(company_id)s
+       AND aml.parent_state = 'posted'
+       AND aml.account_id = ANY(%(account_ids)s)
+       AND aml.date < %(date_from)s
+"""
+
+CASH_PERIOD_LINES_QUERY = """
+    SELECT aml.id, aml.account_id, aml.balance, aj.type AS journal_type
+      FROM account_move_line aml
+      JOIN account_journal aj ON aj.id = aml.journal_id
+     WHERE aml.company_id = %(company_id)s
+       AND aml.parent_state = 'posted'
+       AND aml.account_id = ANY(%(account_ids)s)
+       AND aml.date BETWEEN %(date_from)s AND %(date_to)s
+       {journal_filter}
+  ORDER BY aml.date DESC, aml.move_name DESC, aml.id
+"""
+
 class AccountCashFlow(models.TransientModel):
     _name = 'account.cash.flow.report'
     _description = 'Cash Flow Statement Report'
@@ -31,38 +52,32 @@ class AccountCashFlow(models.TransientModel):
                 if isinstance(date_from, str):
                     date_from = fields.Date.from_string(date_from)
             
-            # Build domain for account.move.line
-            domain = [
-                ('company_id', '=', company_id),
-                ('date', '>=', date_from),
-                ('date', '<=', date_to),
-                ('parent_state', '=', 'posted')
-            ]
-            
-            if journals:
-                domain.append(('journal_id', 'in', journals))
-            
-            # Get all move lines
-            move_lines = self.env['account.move.line'].search(domain)
-            
             # Get cash and cash equivalent accounts (typically bank and cash accounts)
             cash_accounts = self.env['account.account'].search([
                 ('company_id', '=', company_id),
                 ('account_type', 'in', ['asset_cash', 'asset_bank'])
             ])
             
-            # Calculate beginning balance (balance at start of period)
-            beginning_domain = [
-                ('company_id', '=', company_id),
-                ('date', '<', date_from),
-                ('parent_state', '=', 'posted'),
-                ('account_id', 'in', cash_accounts.ids)
-            ]
-            beginning_lines = self.env['account.move.line'].search(beginning_domain)
-            beginning_balance = sum(beginning_lines.mapped('balance'))
-            
-            # Calculate cash flows during the period
-            period_lines = move_lines.filtered(lambda l: l.account_id.id in cash_accounts.ids)
+            # Beginning balance and period cash lines are independent: read them concurrently
+            params = {
+                'company_id': company_id,
+                'account_ids': cash_accounts.ids,
+                'date_from': date_from,
+                'date_to': date_to,
+                'journal_ids': list(journals or []),
+            }
+            period_query = CASH_PERIOD_LINES_QUERY.format(
+                journal_filter='AND aml.journal_id = ANY(%(journal_ids)s)' if journals else '')
+            results = self.env['account.report.aggregate']._fetch_report_rows_concurrently({
+                'beginning': (CASH_BEGINNING_BALANCE_QUERY, params),
+                'period': (period_query, params),
+            })
+            beginning_balance = results['beginning'][0]['balance']
+            period_lines = results['period']
+            account_names = {
+                account.id: (account.code, account.name)
+                for account in self.env['account.account'].browse(list({line['account_id'] for line in period_lines}))
+            }
             
             # Categorize cash flows
             operating_cash = 0.0
@@ -80,58 +95,59 @@ class AccountCashFlow(models.TransientModel):
             unclassified_cash_out = []
             
             for line in period_lines:
-                amount = line.balance
-                account_name = f"{line.account_id.code} {line.account_id.name}"
+                amount = line['balance']
+                account_code, account_label = account_names[line['account_id']]
+                account_name = f"{account_code} {account_label}"
                 
                 # Categorize based on journal type and account type
                 # This is simplified - in real implementation, you'd have more sophisticated categorization
-                if line.journal_id.type in ['sale', 'purchase']:
+                if line['journal_type'] in ['sale', 'purchase']:
                     # Operating activities
                     operating_cash += amount
                     if amount > 0:
                         operating_cash_in.append({
-                            'id': f'operating_in_{line.id}',
+                            'id': f'operating_in_{line["id"]}',
                             'name': account_name,
                             'amount': amount,
                             'level': 4
                         })
                     else:
                         operating_cash_out.append({
-                            'id': f'operating_out_{line.id}',
+                            'id': f'operating_out_{line["id"]}',
                             'name': account_name,
                             'amount': abs(amount),
                             'level': 4
                         })
-                elif line.journal_id.type == 'bank':
+                elif line['journal_type'] == 'bank':
                     # Check if it's investment or financing based on account
-                    if 'loan' in line.account_id.name.lower() or 'financing' in line.account_id.name.lower():
+                    if 'loan' in account_label.lower() or 'financing' in account_label.lower():
                         financing_cash += amount
                         if amount > 0:
                             financing_cash_in.append({
-                                'id': f'financing_in_{line.id}',
+                                'id': f'financing_in_{line["id"]}',
                                 'name': account_name,
                                 'amount': amount,
                                 'level': 4
                             })
                         else:
                             financing_cash_out.append({
-                                'id': f'financing_out_{line.id}',
+                                'id': f'financing_out_{line["id"]}',
                                 'name': account_name,
                                 'amount': abs(amount),
                                 'level': 4
                             })
-                    elif 'investment' in line.account_id.name.lower() or 'asset' in line.account_id.name.lower():
+                    elif 'investment' in account_label.lower() or 'asset' in account_label.lower():
                         investing_cash += amount
                         if amount > 0:
                             investing_cash_in.append({
-                                'id': f'investing_in_{line.id}',
+                                'id': f'investing_in_{line["id"]}',
                                 'name': account_name,
                                 'amount': amount,
                                 'level': 4
                             })
                         else:
                             investing_cash_out.append({
-                                'id': f'investing_out_{line.id}',
+                                'id': f'investing_out_{line["id"]}',
                                 'name': account_name,
                                 'amount': abs(amount),
                                 'level': 4
@@ -141,14 +157,14 @@ class AccountCashFlow(models.TransientModel):
                         unclassified_cash += amount
                         if amount > 0:
                             unclassified_cash_in.append({
-                                'id': f'unclassified_in_{line.id}',
+                                'id': f'unclassified_in_{line["id"]}',
                                 'name': account_name,
                                 'amount': amount,
                                 'level': 4
                             })
                         else:
                             unclassified_cash_out.append({
-                                'id': f'unclassified_out_{line.id}',
+                                'id': f'unclassified_out_{line["id"]}',
                                 'name': account_name,
                                 'amount': abs(amount),
                                 'level': 4
@@ -158,14 +174,14 @@ class AccountCashFlow(models.TransientModel):
                     unclassified_cash += amount
                     if amount > 0:
                         unclassified_cash_in.append({
-                            'id': f'unclassified_in_{line.id}',
+                            'id': f'unclassified_in_{line["id"]}',
                             'name': account_name,
                             'amount': amount,
                             'level': 4
                         })
                     else:
                         unclassified_cash_out.append({
-                            'id': f'unclassified_out_{line.id}',
+                            'id': f'unclassified_out_{line["id"]}',
                             'name': account_name,
                             'amount': abs(amount),
                             'level': 4
@@ -0,0 +1,41 @@
+from odoo import models, fields, api
+
+
+class AccountConsolidationElimination(models.Model):
+    _name = 'account.consolidation.elimination'
+    _description = 'Intercompany Elimination Rule'
+    _order = 'sequence, id'
+
+    name = fields.Char(required=True)
+    active = fields.Boolean(default=True)
+    sequence = fields.Integer(default=10)
+    rule_type = fields.Selection([
+        ('partner', 'Intercompany Partners'),
+        ('account', 'Accounts'),
+    ], required=True, default='partner',
+        help="Partners: eliminate the journal items booked against these partners "
+             "(typically the partners of the group companies). "
+             "Accounts: eliminate every journal item of these accounts.")
+    partner_ids = fields.Many2many('res.partner', string='Partners')
+    account_ids = fields.Many2many('account.account', string='Accounts')
+    company_ids = fields.Many2many('res.company', string='Companies',
+                                   help="Companies whose journal items the rule applies to; all when empty.")
+
+    @api.model
+    def _get_elimination_filters(self, company_ids):
+        """
+        Journal items eliminated when consolidating ``company_ids``
+
+        Returns ``(account_ids, company_partner_pairs)``: items of these
+        accounts, or of these (company, partner) pairs, are eliminated.
+        """
+        account_ids = set()
+        pairs = set()
+        for rule in self.sudo().search([]):
+            companies = [company_id for company_id in company_ids
+                         if not rule.company_ids or company_id in rule.company_ids.ids]
+            if rule.rule_type == 'account':
+                account_ids.update(rule.account_ids.filtered(lambda account: account.company_id.id in companies).ids)
+            else:
+                pairs.update((company_id, partner_id) for company_id in companies for partner_id in rule.partner_ids.ids)
+        return sorted(account_ids), sorted(pairs)
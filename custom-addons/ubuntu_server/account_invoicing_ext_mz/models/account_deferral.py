@@ -0,0 +1,214 @@
+from odoo import models, fields, api, Command, _
+from odoo.tools import date_utils
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Recognition schedule of the posted items of the deferral accounts that have
+# no planned month: one line per month from the month of the item, the rounded
+# monthly share, the last month taking what rounding left. Months already
+# recognized by a cut-off entry stay: an item posted again (e.g. edited in
+# draft) only plans what they left, over the months after the last of them.
+DEFERRAL_SCHEDULE_QUERY = """
+    WITH recognized AS (
+        SELECT source_line_id, SUM(amount) AS amount, MAX(date) AS last_date
+          FROM account_deferral_line
+         WHERE company_id = %(company_id)s
+           AND move_id IS NOT NULL
+         GROUP BY source_line_id
+    )
+    INSERT INTO account_deferral_line (source_line_id, company_id, deferral_type, account_id, recognition_account_id,
+                                       partner_id, date, amount, remaining,
+                                       create_uid, create_date, write_uid, write_date)
+    SELECT aml.id, aml.company_id, a.deferral_type, a.id, a.deferral_recognition_account_id,
+           aml.partner_id,
+           (date_trunc('month', aml.date) + make_interval(months => o.done + k) - interval '1 day')::date,
+           s.planned - s.previous,
+           o.to_plan - s.planned,
+           %(uid)s, %(now)s, %(uid)s, %(now)s
+      FROM account_move_line aml
+      JOIN account_account a ON a.id = aml.account_id
+      JOIN res_company co ON co.id = aml.company_id
+      JOIN res_currency cur ON cur.id = co.currency_id
+ LEFT JOIN recognized r ON r.source_line_id = aml.id
+     CROSS JOIN LATERAL (
+           -- months of the schedule up to the last cut-off of the item
+           SELECT GREATEST(COALESCE((date_part('year', r.last_date) - date_part('year', aml.date)) * 12
+                                    + date_part('month', r.last_date) - date_part('month', aml.date) + 1, 0),
+                           0)::int AS done,
+                  aml.balance - COALESCE(r.amount, 0) AS to_plan
+           ) o
+     CROSS JOIN LATERAL (SELECT GREATEST(a.deferral_months - o.done, 1) AS months) n
+     CROSS JOIN LATERAL generate_series(1, n.months) AS k
+     CROSS JOIN LATERAL (SELECT ROUND(o.to_plan / n.months, cur.decimal_places) AS monthly) m
+     CROSS JOIN LATERAL (
+           SELECT CASE WHEN k = n.months THEN o.to_plan ELSE k * m.monthly END AS planned,
+                  (k - 1) * m.monthly AS previous
+           ) s
+     WHERE aml.company_id = %(company_id)s
+       AND aml.parent_state = 'posted'
+       AND o.to_plan != 0
+       AND a.deferral_type IS NOT NULL
+       AND a.deferral_months > 0
+       AND a.deferral_recognition_account_id IS NOT NULL
+       AND NOT EXISTS (SELECT 1 FROM account_deferral_line d WHERE d.source_line_id = aml.id AND d.move_id IS NULL)
+       -- the cut-off entries themselves are not deferred again
+       AND NOT EXISTS (SELECT 1 FROM account_deferral_line d WHERE d.move_id = aml.move_id)
+       {where}
+        ON CONFLICT (source_line_id, date) DO NOTHING
+"""
+
+
+class AccountDeferralLine(models.Model):
+    _name = 'account.deferral.line'
+    _description = 'Deferral Recognition Schedule'
+    _order = 'date, source_line_id'
+
+    source_line_id = fields.Many2one('account.move.line', string='Deferred Item', required=True, readonly=True,
+                                     ondelete='cascade')
+    company_id = fields.Many2one('res.company', required=True, readonly=True)
+    currency_id = fields.Many2one(related='company_id.currency_id')
+    deferral_type = fields.Selection([
+        ('expense', 'Deferred Expense'),
+        ('revenue', 'Deferred Revenue'),
+    ], required=True, readonly=True)
+    account_id = fields.Many2one('account.account', string='Deferral Account', required=True, readonly=True)
+    recognition_account_id = fields.Many2one('account.account', required=True, readonly=True)
+    partner_id = fields.Many2one('res.partner', readonly=True)
+    date = fields.Date(required=True, readonly=True, help="End of the month the amount is recognized in")
+    amount = fields.Monetary(readonly=True, help="Balance moved from the deferral account to the recognition account")
+    remaining = fields.Monetary(readonly=True, help="Balance still deferred at the end of the month")
+    move_id = fields.Many2one('account.move', string='Cut-off Entry', readonly=True, index=True, ondelete='set null',
+                              help="Empty while the month is only planned")
+
+    # Also the (source_line_id, date) index of the as-of lookups
+    _sql_constraints = [
+        ('source_date_uniq', 'unique(source_line_id, date)', 'A deferred item has one line per month.'),
+    ]
+
+    @api.model
+    def _generate_deferral_schedule(self, company, lines=None):
+        """
+        Plan the new deferred items of ``company`` (only ``lines`` when given)
+        in one statement; drop the plans of unposted items
+
+        The planned months of ``lines`` are dropped first: they may be those
+        of an earlier version of the items, reset to draft and edited since.
+
+        Run when items are posted, when an account becomes a deferral
+        account, and before each cut-off; the reports only read the schedule.
+        """
+        self.env['account.move.line'].flush_model()
+        self.flush_model()
+        params = {
+            'company_id': company.id,
+            'uid': self.env.uid,
+            'now': fields.Datetime.now(),
+        }
+        where = ''
+        if lines is not None:
+            if not lines:
+                return
+            where = 'AND aml.id IN %(line_ids)s'
+            params['line_ids'] = tuple(lines.ids)
+            self.env.cr.execute("""
+                DELETE FROM account_deferral_line
+                 WHERE source_line_id IN %s
+                   AND move_id IS NULL
+            """, [params['line_ids']])
+        else:
+            self.env.cr.execute("""
+                DELETE FROM account_deferral_line d
+                 USING account_move_line aml
+                 WHERE aml.id = d.source_line_id
+                   AND d.company_id = %s
+                   AND d.move_id IS NULL
+                   AND aml.parent_state != 'posted'
+            """, [company.id])
+        self.env.cr.execute(DEFERRAL_SCHEDULE_QUERY.format(where=where), params)
+        self.invalidate_model()
+
+    @api.model
+    def _schedule_posted_moves(self, moves):
+        """Plan the items of deferral accounts among the journal items of these just posted moves"""
+        lines = moves.line_ids.filtered(lambda line: line.account_id.deferral_type)
+        for company in lines.company_id:
+            self.sudo()._generate_deferral_schedule(company, lines.filtered(lambda line: line.company_id == company))
+
+    @api.model
+    def _post_deferrals(self, period_end):
+        """
+        Post the cut-off entry of the current company up to ``period_end``
+
+        Every planned month ended by then (including months a previous run
+        missed) is recognized in a single entry dated ``period_end``, with
+        one line per deferral and recognition account. Returns the entry.
+        """
+        company = self.env.company
+        self._generate_deferral_schedule(company)
+        self.env.cr.execute("""
+            SELECT id
+              FROM account_deferral_line
+             WHERE company_id = %s
+               AND date <= %s
+               AND move_id IS NULL
+               FOR UPDATE SKIP LOCKED
+        """, [company.id, period_end])
+        line_ids = [row[0] for row in self.env.cr.fetchall()]
+        if not line_ids:
+            return self.env['account.move']
+        self.env.cr.execute("""
+            SELECT account_id, recognition_account_id, SUM(amount)
+              FROM account_deferral_line
+             WHERE id IN %s
+             GROUP BY account_id, recognition_account_id
+             ORDER BY account_id, recognition_account_id
+        """, [tuple(line_ids)])
+
+        label = _('Deferral cut-off %s', period_end.strftime('%m/%Y'))
+        move_lines = []
+        for account_id, recognition_account_id, amount in self.env.cr.fetchall():
+            if company.currency_id.is_zero(amount):
+                continue
+            move_lines += [
+                Command.create({'name': label, 'account_id': recognition_account_id, 'balance': float(amount)}),
+                Command.create({'name': label, 'account_id': account_id, 'balance': -float(amount)}),
+            ]
+        move = self.env['account.move']
+        if move_lines:
+            journal = company.automatic_entry_default_journal_id or self.env['account.journal'].search([
+                ('company_id', '=', company.id),
+                ('type', '=', 'general'),
+            ], limit=1)
+            move = move.create({
+                'move_type': 'entry',
+                'date': period_end,
+                'journal_id': journal.id,
+                'company_id': company.id,
+                'ref': label,
+                'line_ids': move_lines,
+            })
+
+        # Linked before posting: posting schedules new deferral items, and
+        # the cut-off entry is told apart from them by its lines
+        self.env.cr.execute("""
+            UPDATE account_deferral_line
+               SET move_id = %s, write_uid = %s, write_date = %s
+             WHERE id IN %s
+        """, [move.id or None, self.env.uid, fields.Datetime.now(), tuple(line_ids)])
+        self.invalidate_model(['move_id', 'write_uid', 'write_date'])
+        move.action_post()
+        return move
+
+    @api.model
+    def _cron_post_deferrals(self):
+        """Month-end cut-off of every company, for the month just closed"""
+        period_end = date_utils.start_of(fields.Date.context_today(self), 'month') - date_utils.relativedelta(days=1)
+        for company in self.env['res.company'].search([]):
+            try:
+                move = self.with_company(company)._post_deferrals(period_end)
+                self.env.cr.commit()
+                _logger.info(f"Deferral cut-off {period_end} for {company.name}: {move.name or 'nothing to post'}")
+            except Exception as e:
+                self.env.cr.rollback()
+                _logger.error(f"Error posting the deferral cut-off of {period_end} for {company.name}: {str(e)}")
@@ -0,0 +1,130 @@
+from odoo import models, fields, api
+import logging
+
+from ..tools import columnar
+
+_logger = logging.getLogger(__name__)
+
+# Balance still deferred as of the date for every scheduled item: the
+# remaining of the last month ended by then, found through the
+# (source_line_id, date) index, or the whole item before its first month
+DEFERRAL_REPORT_QUERY = """
+    SELECT aml.id,
+           aml.move_id,
+           aml.move_name,
+           aml.date,
+           aml.name AS label,
+           partner.name AS partner_name,
+           a.id AS account_id,
+           a.code AS account_code,
+           COALESCE(a.name->>%(lang)s, a.name->>'en_US') AS account_name,
+           aml.balance AS original,
+           COALESCE(l.remaining, aml.balance) AS remaining
+      FROM (SELECT DISTINCT source_line_id
+              FROM account_deferral_line
+             WHERE company_id = %(company_id)s
+               AND deferral_type = %(deferral_type)s) s
+      JOIN account_move_line aml ON aml.id = s.source_line_id
+      JOIN account_account a ON a.id = aml.account_id
+ LEFT JOIN res_partner partner ON partner.id = aml.partner_id
+ LEFT JOIN LATERAL (
+           SELECT l.remaining
+             FROM account_deferral_line l
+            WHERE l.source_line_id = aml.id
+              AND l.date <= %(as_of_date)s
+              AND (l.move_id IS NOT NULL OR NOT %(posted_only)s)
+            ORDER BY l.date DESC
+            LIMIT 1
+           ) l ON TRUE
+     WHERE aml.date <= %(as_of_date)s
+       AND aml.parent_state = 'posted'
+       AND COALESCE(l.remaining, aml.balance) != 0
+     ORDER BY a.code, aml.date, aml.id
+"""
+
+DEFERRAL_FIELDS = ('original', 'remaining')
+
+
+class AccountDeferralReport(models.TransientModel):
+    _name = 'account.deferral.report'
+    _description = 'Deferral Report'
+
+    @api.model
+    def get_deferral_report_data(self, as_of_date=None, deferral_type='expense', posted_entries=True,
+                                 company_id=None, format='rows'):
+        """
+        Balances still deferred as of ``as_of_date``, per deferral account
+
+        Read from the recognition schedule: only posted cut-offs count
+        unless ``posted_entries`` is False, in which case the planned months
+        up to the date count as well.
+        """
+        try:
+            if not company_id:
+                company_id = self.env.company.id
+            self.env['account.report.aggregate']._check_company_access([company_id])
+            as_of_date = fields.Date.to_date(as_of_date) or fields.Date.today()
+            company = self.env['res.company'].browse(company_id)
+
+            self.env['account.move.line'].flush_model()
+            self.env['account.deferral.line'].flush_model()
+            self.env.cr.execute(DEFERRAL_REPORT_QUERY, {
+                'as_of_date': as_of_date,
+                'deferral_type': deferral_type,
+                'posted_only': bool(posted_entries),
+                'company_id': company_id,
+                'lang': self.env.lang or 'en_US',
+            })
+
+            accounts = {}
+            totals = dict.fromkeys(DEFERRAL_FIELDS, 0.0)
+            for row in self.env.cr.dictfetchall():
+                account = accounts.get(row['account_id'])
+                if account is None:
+                    account = accounts[row['account_id']] = {
+                        'id': row['account_id'],
+                        'code': row['account_code'],
+                        'name': row['account_name'],
+                        'lines': [],
+                        **dict.fromkeys(DEFERRAL_FIELDS, 0.0),
+                    }
+                for field in DEFERRAL_FIELDS:
+                    row[field] = float(row[field] or 0.0)
+                    account[field] += row[field]
+                    totals[field] += row[field]
+                account['lines'].append({
+                    'id': row['id'],
+                    'move_id': row['move_id'],
+                    'move_name': row['move_name'],
+                    'date': row['date'].strftime('%Y-%m-%d'),
+                    'label': row['label'] or '',
+                    'partner_name': row['partner_name'] or '',
+                    'account_code': row['account_code'],
+                    **{field: row[field] for field in DEFERRAL_FIELDS},
+                })
+
+            result = {
+                'accounts': list(accounts.values()),
+                'totals': totals,
+                'company_name': company.name,
+                'currency_symbol': company.currency_id.symbol,
+                'as_of_date': as_of_date.strftime('%Y-%m-%d'),
+                'deferral_type': deferral_type,
+                'unposted_warning': not posted_entries,
+            }
+            if format == 'columnar':
+                return columnar.encode_report(result, 'accounts', 'lines', ('date', 'partner_name', 'account_code'))
+            return result
+
+        except Exception as e:
+            _logger.error(f"Error getting deferral report data: {str(e)}")
+            return {
+                'accounts': [],
+                'totals': dict.fromkeys(DEFERRAL_FIELDS, 0.0),
+                'company_name': '',
+                'currency_symbol': '',
+                'as_of_date': '',
+                'deferral_type': deferral_type,
+                'unposted_warning': False,
+                'error': str(e),
+            }
@@ -9,11 +9,18 @@ class AccountExecutiveSummary(models.TransientModel):
     _description = 'Executive Summary Report'
     
     @api.model
-    def get_executive_summary_data(self, date_from=None, date_to=None, comparison=None, company_id=None):
-        """Get executive summary data for the report"""
+    def get_executive_summary_data(self, date_from=None, date_to=None, comparison=None, company_id=None,
+                                   aggregate=None, company_ids=None, currency_id=None):
+        """
+        Get executive summary data for the report (``aggregate``: precomputed posted per-account aggregate)
+
+        With ``company_ids`` the selected companies are consolidated in
+        ``currency_id``, after intercompany eliminations.
+        """
         try:
             if not company_id:
                 company_id = self.env.company.id
+            self.env['account.report.aggregate']._check_company_access([company_id])
             
             # Set default dates if not provided
             if not date_to:
@@ -32,127 +39,69 @@ class AccountExecutiveSummary(models.TransientModel):
             # Get currency
             currency = self.env.company.currency_id
             currency_symbol = 'MZN'  # Metical for Mozambique
-            
-            # Build domain for account.move.line
-            domain = [
-                ('company_id', '=', company_id),
-                ('date', '>=', date_from),
-                ('date', '<=', date_to),
-                ('parent_state', '=', 'posted')
-            ]
-            
-            # Get all move lines for the period
-            move_lines = self.env['account.move.line'].search(domain)
+            company_name = self.env.company.name
+            if company_ids:
+                company_name, currency = self.env['account.report.aggregate']._get_consolidation_header(
+                    company_ids, currency_id)
+                currency_symbol = currency.name
+            
+            # Per-account period movements and end balances, from one grouped ledger query
+            aggregate_model = self.env['account.report.aggregate']
+            if aggregate is None:
+                aggregate = aggregate_model._get_report_aggregate(
+                    company_id,
+                    report='executive_summary',
+                    company_ids=company_ids,
+                    currency_id=currency_id,
+                    date_from=date_from,
+                    date_to=date_to,
+                    states=('posted',),
+                )
+            
+            def period_sum(account_types, field='balance'):
+                return aggregate_model._sum_by_types(aggregate, account_types, field)
+            
+            def end_balance(account_types):
+                return aggregate_model._sum_by_types(aggregate, account_types, 'end_balance')
             
             # CASH SECTION
-            # Get cash and bank accounts
-            cash_accounts = self.env['account.account'].search([
-                ('company_id', '=', company_id),
-                ('account_type', 'in', ['asset_cash', 'asset_bank'])
-            ])
+            # Cash and bank accounts
+            cash_types = ['asset_cash', 'asset_bank']
             
             # Calculate cash flows
-            cash_lines = move_lines.filtered(lambda l: l.account_id.id in cash_accounts.ids)
-            cash_received = sum(l.credit for l in cash_lines)
-            cash_spent = sum(l.debit for l in cash_lines)
+            cash_received = period_sum(cash_types, 'credit')
+            cash_spent = period_sum(cash_types, 'debit')
             cash_surplus = cash_received - cash_spent
             
             # Calculate closing bank balance
-            closing_balance_domain = [
-                ('company_id', '=', company_id),
-                ('date', '<=', date_to),
-                ('parent_state', '=', 'posted'),
-                ('account_id', 'in', cash_accounts.ids)
-            ]
-            closing_lines = self.env['account.move.line'].search(closing_balance_domain)
-            closing_bank_balance = sum(closing_lines.mapped('balance'))
+            closing_bank_balance = end_balance(cash_types)
             
             # PROFITABILITY SECTION
             # Revenue accounts (income)
-            revenue_accounts = self.env['account.account'].search([
-                ('company_id', '=', company_id),
-                ('account_type', 'in', ['income', 'income_other'])
-            ])
-            revenue_lines = move_lines.filtered(lambda l: l.account_id.id in revenue_accounts.ids)
-            revenue = abs(sum(revenue_lines.mapped('balance')))
+            revenue = abs(period_sum(['income', 'income_other']))
             
             # Cost of Revenue (COGS)
-            cogs_accounts = self.env['account.account'].search([
-                ('company_id', '=', company_id),
-                ('account_type', '=', 'expense_direct_cost')
-            ])
-            cogs_lines = move_lines.filtered(lambda l: l.account_id.id in cogs_accounts.ids)
-            cost_of_revenue = sum(cogs_lines.mapped('balance'))
+            cost_of_revenue = period_sum(['expense_direct_cost'])
             
             # Gross profit
             gross_profit = revenue - cost_of_revenue
             
             # Operating expenses
-            expense_accounts = self.env['account.account'].search([
-                ('company_id', '=', company_id),
-                ('account_type', 'in', ['expense', 'expense_depreciation'])
-            ])
-            expense_lines = move_lines.filtered(lambda l: l.account_id.id in expense_accounts.ids)
-            expenses = sum(expense_lines.mapped('balance'))
+            expenses = period_sum(['expense', 'expense_depreciation'])
             
             # Net profit
             net_profit = gross_profit - expenses
             
             # BALANCE SHEET SECTION
             # Receivables
-            receivable_accounts = self.env['account.account'].search([
-                ('company_id', '=', company_id),
-                ('account_type', '=', 'asset_receivable')
-            ])
-            receivable_domain = [
-                ('company_id', '=', company_id),
-                ('date', '<=', date_to),
-                ('parent_state', '=', 'posted'),
-                ('account_id', 'in', receivable_accounts.ids)
-            ]
-            receivable_lines = self.env['account.move.line'].search(receivable_domain)
-            receivables = sum(receivable_lines.mapped('balance'))
+            receivables = end_balance(['asset_receivable'])
             
             # Payables
-            payable_accounts = self.env['account.account'].search([
-                ('company_id', '=', company_id),
-                ('account_type', '=', 'liability_payable')
-            ])
-            payable_domain = [
-                ('company_id', '=', company_id),
-                ('date', '<=', date_to),
-                ('parent_state', '=', 'posted'),
-                ('account_id', 'in', payable_accounts.ids)
-            ]
-            payable_lines = self.env['account.move.line'].search(payable_domain)
-            payables = abs(sum(payable_lines.mapped('balance')))
+            payables = abs(end_balance(['liability_payable']))
             
             # Net assets (Total assets - Total liabilities)
-            asset_accounts = self.env['account.account'].search([
-                ('company_id', '=', company_id),
-                ('account_type', 'in', ['asset_fixed', 'asset_current', 'asset_non_current', 'asset_prepayments', 'asset_receivable', 'asset_cash', 'asset_bank'])
-            ])
-            asset_domain = [
-                ('company_id', '=', company_id),
-                ('date', '<=', date_to),
-                ('parent_state', '=', 'posted'),
-                ('account_id', 'in', asset_accounts.ids)
-            ]
-            asset_lines = self.env['account.move.line'].search(asset_domain)
-            total_assets = sum(asset_lines.mapped('balance'))
-            
-            liability_accounts = self.env['account.account'].search([
-                ('company_id', '=', company_id),
-                ('account_type', 'in', ['liability_payable', 'liability_credit_card', 'liability_current', 'liability_non_current'])
-            ])
-            liability_domain = [
-                ('company_id', '=', company_id),
-                ('date', '<=', date_to),
-                ('parent_state', '=', 'posted'),
-                ('account_id', 'in', liability_accounts.ids)
-            ]
-            liability_lines = self.env['account.move.line'].search(liability_domain)
-            total_liabilities = abs(sum(liability_lines.mapped('balance')))
+            total_assets = end_balance(['asset_fixed', 'asset_current', 'asset_non_current', 'asset_prepayments', 'asset_receivable', 'asset_cash', 'asset_bank'])
+            total_liabilities = abs(end_balance(['liability_payable', 'liability_credit_card', 'liability_current', 'liability_non_current']))
             
             net_assets = total_assets - total_liabilities
             
@@ -176,29 +125,8 @@ class AccountExecutiveSummary(models.TransientModel):
             short_term_cash = closing_bank_balance + receivables - payables
             
             # Current ratio (current assets / current liabilities)
-            current_asset_accounts = self.env['account.account'].search([
-                ('company_id', '=', company_id),
-                ('account_type', 'in', ['asset_current', 'asset_receivable', 'asset_cash', 'asset_bank', 'asset_prepayments'])
-            ])
-            current_asset_lines = self.env['account.move.line'].search([
-                ('company_id', '=', company_id),
-                ('date', '<=', date_to),
-                ('parent_state', '=', 'posted'),
-                ('account_id', 'in', current_asset_accounts.ids)
-            ])
-            current_assets = sum(current_asset_lines.mapped('balance'))
-            
-            current_liability_accounts = self.env['account.account'].search([
-                ('company_id', '=', company_id),
-                ('account_type', 'in', ['liability_current', 'liability_payable', 'liability_credit_card'])
-            ])
-            current_liability_lines = self.env['account.move.line'].search([
-                ('company_id', '=', company_id),
-                ('date', '<=', date_to),
-                ('parent_state', '=', 'posted'),
-                ('account_id', 'in', current_liability_accounts.ids)
-            ])
-            current_liabilities = abs(sum(current_liability_lines.mapped('balance')))
+            current_assets = end_balance(['asset_current', 'asset_receivable', 'asset_cash', 'asset_bank', 'asset_prepayments'])
+            current_liabilities = abs(end_balance(['liability_current', 'liability_payable', 'liability_credit_card']))
             
             current_ratio = current_assets / current_liabilities if current_liabilities > 0 else 0
             
@@ -291,7 +219,7 @@ class AccountExecutiveSummary(models.TransientModel):
             
             return {
                 'sections': sections,
-                'company_name': self.env.company.name,
+                'company_name': company_name,
                 'currency_symbol': currency_symbol,
                 'date_from': date_from_str,
                 'date_to': date_to_str
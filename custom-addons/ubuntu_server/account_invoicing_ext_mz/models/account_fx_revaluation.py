@@ -0,0 +1,178 @@
+from odoo import models, fields, api, Command, _
+from odoo.exceptions import UserError
+from datetime import timedelta
+import logging
+
+from ..tools import rate_table
+
+_logger = logging.getLogger(__name__)
+
+# Open foreign-currency items as of the date, per account and currency: the
+# current residuals plus what partials reconciled after the date took off
+OPEN_FX_ITEMS_QUERY = """
+    WITH later AS (
+        SELECT line_id, SUM(amount) AS amount, SUM(amount_currency) AS amount_currency
+          FROM (SELECT debit_move_id AS line_id, amount, debit_amount_currency AS amount_currency
+                  FROM account_partial_reconcile
+                 WHERE company_id = %(company_id)s AND max_date > %(date)s
+                 UNION ALL
+                SELECT credit_move_id, -amount, -credit_amount_currency
+                  FROM account_partial_reconcile
+                 WHERE company_id = %(company_id)s AND max_date > %(date)s) p
+         GROUP BY line_id
+    )
+    SELECT aml.account_id,
+           aml.currency_id,
+           COUNT(*) AS item_count,
+           SUM(aml.amount_residual_currency + COALESCE(later.amount_currency, 0)) AS residual_currency,
+           SUM(aml.amount_residual + COALESCE(later.amount, 0)) AS residual
+      FROM account_move_line aml
+      JOIN account_account a ON a.id = aml.account_id
+      JOIN res_company co ON co.id = aml.company_id
+ LEFT JOIN later ON later.line_id = aml.id
+     WHERE aml.company_id = %(company_id)s
+       AND aml.parent_state = 'posted'
+       AND aml.date <= %(date)s
+       AND a.reconcile
+       AND aml.currency_id != co.currency_id
+       AND (aml.amount_residual_currency != 0 OR later.line_id IS NOT NULL)
+     GROUP BY aml.account_id, aml.currency_id
+    HAVING SUM(aml.amount_residual_currency + COALESCE(later.amount_currency, 0)) != 0
+     ORDER BY aml.account_id, aml.currency_id
+"""
+
+
+class AccountFxRevaluation(models.TransientModel):
+    _name = 'account.fx.revaluation'
+    _description = 'Unrealized Currency Gains/Losses'
+
+    company_id = fields.Many2one('res.company', required=True, default=lambda self: self.env.company)
+    currency_id = fields.Many2one(related='company_id.currency_id')
+    date = fields.Date(required=True, default=fields.Date.context_today)
+    reversal_date = fields.Date(help="Date of the reversal entry; the day after the revaluation by default.")
+    journal_id = fields.Many2one('account.journal', domain=[('type', '=', 'general')],
+                                 default=lambda self: self.env.company.automatic_entry_default_journal_id)
+    gain_account_id = fields.Many2one(
+        'account.account', default=lambda self: self.env.company.income_currency_exchange_account_id)
+    loss_account_id = fields.Many2one(
+        'account.account', default=lambda self: self.env.company.expense_currency_exchange_account_id)
+    line_ids = fields.One2many('account.fx.revaluation.line', 'wizard_id', readonly=True)
+    total_adjustment = fields.Monetary(compute='_compute_total_adjustment')
+    move_id = fields.Many2one('account.move', readonly=True)
+    reversal_move_id = fields.Many2one('account.move', readonly=True)
+
+    @api.depends('line_ids.adjustment')
+    def _compute_total_adjustment(self):
+        for wizard in self:
+            wizard.total_adjustment = sum(wizard.line_ids.mapped('adjustment'))
+
+    def action_compute(self):
+        """Revalue the open items per account and currency at the rates of the date"""
+        self.ensure_one()
+        # The query bypasses the record rules
+        self.env['account.report.aggregate']._check_company_access([self.company_id.id])
+        self.env['account.move.line'].flush_model()
+        self.env['account.partial.reconcile'].flush_model()
+        self.env.cr.execute(OPEN_FX_ITEMS_QUERY, {'company_id': self.company_id.id, 'date': self.date})
+        rows = self.env.cr.dictfetchall()
+
+        # One rate table per currency, from the rates read in a single query
+        currencies = self.env['res.currency'].browse({row['currency_id'] for row in rows})
+        aggregate = self.env['account.report.aggregate'].with_company(self.company_id)
+        rates = aggregate._get_currency_rates(currencies | self.currency_id, self.date)
+        tables = {
+            currency.id: rate_table.RateTable(
+                rate_table.conversion_segments(rates[currency.id], rates[self.currency_id.id]))
+            for currency in currencies
+        }
+
+        line_commands = [Command.clear()]
+        for row in rows:
+            residual = float(row['residual'])
+            revalued = tables[row['currency_id']].convert(float(row['residual_currency']), self.date)
+            revalued = self.currency_id.round(revalued)
+            line_commands.append(Command.create({
+                'account_id': row['account_id'],
+                'foreign_currency_id': row['currency_id'],
+                'item_count': row['item_count'],
+                'residual_currency': float(row['residual_currency']),
+                'residual': residual,
+                'revalued': revalued,
+                'adjustment': revalued - residual,
+            }))
+        self.write({'line_ids': line_commands, 'move_id': False, 'reversal_move_id': False})
+        return self._reopen()
+
+    def action_post(self):
+        """Post the revaluation and its reversal"""
+        self.ensure_one()
+        if self.move_id:
+            raise UserError(_('This revaluation is already posted.'))
+        if not self.journal_id or not self.gain_account_id or not self.loss_account_id:
+            raise UserError(_('Set the journal and the exchange gain and loss accounts.'))
+        lines = self.line_ids.filtered(lambda line: not self.currency_id.is_zero(line.adjustment))
+        if not lines:
+            raise UserError(_('Nothing to revalue.'))
+
+        label = _('Unrealized exchange difference %s', self.date.strftime('%d/%m/%Y'))
+        gain = sum(line.adjustment for line in lines if line.adjustment > 0)
+        loss = sum(line.adjustment for line in lines if line.adjustment < 0)
+        line_vals = [
+            Command.create({
+                'name': f'{label} ({line.foreign_currency_id.name})',
+                'account_id': line.account_id.id,
+                'currency_id': line.foreign_currency_id.id,
+                'amount_currency': 0.0,
+                'balance': line.adjustment,
+            })
+            for line in lines
+        ]
+        if gain:
+            line_vals.append(Command.create({'name': label, 'account_id': self.gain_account_id.id, 'balance': -gain}))
+        if loss:
+            line_vals.append(Command.create({'name': label, 'account_id': self.loss_account_id.id, 'balance': -loss}))
+
+        move = self.env['account.move'].create({
+            'move_type': 'entry',
+            'date': self.date,
+            'journal_id': self.journal_id.id,
+            'company_id': self.company_id.id,
+            'ref': label,
+            'line_ids': line_vals,
+        })
+        move.action_post()
+        reversal_date = self.reversal_date or self.date + timedelta(days=1)
+        reversal = move._reverse_moves([{
+            'date': reversal_date,
+            'ref': _('Reversal of: %s', label),
+        }])
+        reversal.action_post()
+        self.write({'move_id': move.id, 'reversal_move_id': reversal.id})
+        _logger.info(f"FX revaluation {self.date} for {self.company_id.name}: {move.name}, reversed by {reversal.name}")
+        return self._reopen()
+
+    def _reopen(self):
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'current',
+        }
+
+
+class AccountFxRevaluationLine(models.TransientModel):
+    _name = 'account.fx.revaluation.line'
+    _description = 'Unrealized Currency Gains/Losses Line'
+    _order = 'account_id, foreign_currency_id'
+
+    wizard_id = fields.Many2one('account.fx.revaluation', required=True, ondelete='cascade')
+    currency_id = fields.Many2one(related='wizard_id.currency_id')
+    account_id = fields.Many2one('account.account', readonly=True)
+    foreign_currency_id = fields.Many2one('res.currency', string='Currency', readonly=True)
+    item_count = fields.Integer(string='Open Items', readonly=True)
+    residual_currency = fields.Monetary(currency_field='foreign_currency_id', string='Open Amount in Currency',
+                                        readonly=True)
+    residual = fields.Monetary(string='Book Value', readonly=True)
+    revalued = fields.Monetary(string='Revalued', readonly=True)
+    adjustment = fields.Monetary(readonly=True)
@@ -2,6 +2,8 @@ from odoo import models, fields, api
 from datetime import datetime, timedelta, date
 import logging
 
+from ..tools import columnar
+
 _logger = logging.getLogger(__name__)
 
 class AccountGeneralLedger(models.TransientModel):
@@ -10,8 +12,21 @@ class AccountGeneralLedger(models.TransientModel):
     
     @api.model
     def get_general_ledger_data(self, date_from=None, date_to=None, journals=None, 
-                                analytic=None, posted_entries=True, company_id=None):
-        """Get general ledger data for the report"""
+                                analytic=None, posted_entries=True, company_id=None, format='rows',
+                                search=None, amount_min=None, amount_max=None, include_lines=True,
+                                currency_id=None):
+        """
+        Get general ledger data for the report (format='columnar' for the compact payload)
+
+        ``search`` (account, partner, entry number, reference) and the amount
+        range are applied in the database; only matching lines are returned,
+        and the initial balances only sum the matching earlier lines.
+        With ``include_lines=False`` accounts only carry ``line_count`` and the
+        lines are paged through get_general_ledger_lines.
+        With ``currency_id`` amounts are converted to that currency at the rate
+        of their date; accounts always carry ``amount_currency`` subtotals per
+        transaction currency.
+        """
         try:
             if not company_id:
                 company_id = self.env.company.id
@@ -31,81 +46,22 @@ class AccountGeneralLedger(models.TransientModel):
                 if isinstance(date_from, str):
                     date_from = fields.Date.from_string(date_from)
             
-            # Build domain for account.move.line
-            domain = [
-                ('company_id', '=', company_id),
-                ('date', '>=', date_from),
-                ('date', '<=', date_to)
-            ]
-            
-            if posted_entries:
-                domain.append(('parent_state', '=', 'posted'))
+            domain = self._get_lines_domain(company_id, date_from, date_to, journals, posted_entries,
+                                            search, amount_min, amount_max)
             
-            if journals and journals != 'all':
-                domain.append(('journal_id', 'in', journals))
-            
-            # Get all accounts with movements in the period
-            move_lines = self.env['account.move.line'].search(domain, order='account_id, date, id')
-            
-            # Group by account
-            accounts_data = {}
-            for line in move_lines:
-                account = line.account_id
-                account_key = account.id
-                
-                if account_key not in accounts_data:
-                    # Calculate initial balance (before date_from)
-                    initial_domain = [
-                        ('company_id', '=', company_id),
-                        ('date', '<', date_from),
-                        ('account_id', '=', account.id)
-                    ]
-                    if posted_entries:
-                        initial_domain.append(('parent_state', '=', 'posted'))
-                    
-                    initial_lines = self.env['account.move.line'].search(initial_domain)
-                    initial_balance = sum(initial_lines.mapped('balance'))
-                    
-                    accounts_data[account_key] = {
-                        'id': f'account_{account.id}',
-                        'code': account.code,
-                        'name': account.name,
-                        'account_type': account.account_type,
-                        'initial_balance': initial_balance,
-                        'debit': 0.0,
-                        'credit': 0.0,
-                        'balance': initial_balance,
-                        'has_children': True,
-                        'expanded': False,
-                        'lines': []
-                    }
-                
-                # Add line details
-                line_data = {
-                    'id': f'line_{line.id}',
-                    'date': line.date.strftime('%d/%m/%Y'),
-                    'move_name': line.move_id.name,
-                    'ref': line.ref or '',
-                    'partner': line.partner_id.name if line.partner_id else '',
-                    'currency': line.currency_id.name if line.currency_id else 'MZN',
-                    'debit': line.debit,
-                    'credit': line.credit,
-                    'balance': 0.0,  # Will calculate running balance
-                    'communication': line.name or '',
-                    'journal_items': f"{line.move_id.name} - {line.name}" if line.name else line.move_id.name
-                }
-                
-                accounts_data[account_key]['lines'].append(line_data)
-                accounts_data[account_key]['debit'] += line.debit
-                accounts_data[account_key]['credit'] += line.credit
-                accounts_data[account_key]['balance'] += line.balance
+            search_domain = self.env['account.move.line']._get_ledger_search_domain(search, amount_min, amount_max)
+            rates = self.env['account.report.aggregate']._get_rate_table(company_id, currency_id, date_to)
+            if include_lines:
+                accounts_data = self._get_accounts_with_lines(domain, company_id, date_from, posted_entries, rates,
+                                                              search_domain)
+            else:
+                accounts_data = self._get_accounts_summary(domain, company_id, date_from, posted_entries, rates,
+                                                           search_domain)
             
-            # Calculate running balances for each account's lines
-            for account_data in accounts_data.values():
-                running_balance = account_data['initial_balance']
-                for line in account_data['lines']:
-                    running_balance += line['debit'] - line['credit']
-                    line['balance'] = running_balance
+            AccountMoveLine = self.env['account.move.line']
+            currency_totals = AccountMoveLine._get_amount_currency_totals(domain, 'account_id')
+            for account_id, account_data in accounts_data.items():
+                account_data['currency_totals'] = currency_totals.get(account_id, [])
             
             # Convert to list and sort by account code
             accounts_list = list(accounts_data.values())
@@ -131,17 +87,24 @@ class AccountGeneralLedger(models.TransientModel):
             else:
                 date_to_str = ''
             
-            return {
+            result = {
                 'accounts': accounts_list,
                 'total_debit': total_debit,
                 'total_credit': total_credit,
                 'total_balance': total_balance,
+                'currency_totals': AccountMoveLine._merge_amount_currency_totals(currency_totals),
+                'company_currency': self.env['res.company'].browse(company_id).currency_id.name,
                 'company_name': self.env.company.name,
-                'currency_symbol': 'MZN',
+                'currency_symbol': self.env['res.currency'].browse(currency_id).name if rates else 'MZN',
                 'date_from': date_from_str,
                 'date_to': date_to_str,
-                'unposted_warning': not posted_entries
+                'unposted_warning': not posted_entries,
+                'search': search or ''
             }
+            if format == 'columnar':
+                return columnar.encode_report(result, 'accounts', 'lines',
+                                              ('date', 'partner', 'currency', 'move_name'))
+            return result
             
         except Exception as e:
             _logger.error(f"Error getting general ledger data: {str(e)}")
@@ -156,4 +119,199 @@ class AccountGeneralLedger(models.TransientModel):
                 'date_to': '',
                 'unposted_warning': False,
                 'error': str(e)
-            }
\ No newline at end of file
+            }
+
+    @api.model
+    def get_general_ledger_lines(self, account_id, offset=0, limit=200, date_from=None, date_to=None,
+                                 journals=None, posted_entries=True, company_id=None,
+                                 search=None, amount_min=None, amount_max=None, currency_id=None):
+        """One page of an account's lines, with the running balance carried over from earlier pages"""
+        try:
+            if not company_id:
+                company_id = self.env.company.id
+            date_to = fields.Date.to_date(date_to) if date_to else fields.Date.today()
+            date_from = fields.Date.to_date(date_from) if date_from else date(date_to.year, 1, 1)
+
+            domain = self._get_lines_domain(company_id, date_from, date_to, journals, posted_entries,
+                                            search, amount_min, amount_max)
+            domain.append(('account_id', '=', account_id))
+
+            rates = self.env['account.report.aggregate']._get_rate_table(company_id, currency_id, date_to)
+            search_domain = self.env['account.move.line']._get_ledger_search_domain(search, amount_min, amount_max)
+            initial_balances = self._get_initial_balances(company_id, date_from, posted_entries, [account_id], rates,
+                                                          search_domain)
+            running_balance = initial_balances.get(account_id, 0.0) + \
+                self.env['account.move.line']._get_balance_before(domain, offset, rates=rates)
+
+            move_lines = self.env['account.move.line'].search(domain, order='date, id', offset=offset, limit=limit)
+            lines = []
+            for line in move_lines:
+                line_data = self._line_data(line, rates.factor(line.date) if rates else 1.0)
+                running_balance += line_data['debit'] - line_data['credit']
+                line_data['balance'] = running_balance
+                lines.append(line_data)
+
+            return {
+                'account_id': account_id,
+                'offset': offset,
+                'lines': lines,
+            }
+
+        except Exception as e:
+            _logger.error(f"Error getting general ledger lines: {str(e)}")
+            return {
+                'account_id': account_id,
+                'offset': offset,
+                'lines': [],
+                'error': str(e)
+            }
+
+    @api.model
+    def _get_lines_domain(self, company_id, date_from, date_to, journals=None, posted_entries=True,
+                          search=None, amount_min=None, amount_max=None):
+        """Domain of the journal items shown in the report period"""
+        domain = [
+            ('company_id', '=', company_id),
+            ('date', '>=', date_from),
+            ('date', '<=', date_to)
+        ]
+        
+        if posted_entries:
+            domain.append(('parent_state', '=', 'posted'))
+        
+        if journals and journals != 'all':
+            domain.append(('journal_id', 'in', journals))
+        
+        domain += self.env['account.move.line']._get_ledger_search_domain(search, amount_min, amount_max)
+        return domain
+
+    @api.model
+    def _get_initial_balances(self, company_id, date_from, posted_entries, account_ids, rates=None,
+                              search_domain=None):
+        """
+        Balance before date_from for each account, in one grouped query (per day when converting)
+
+        ``search_domain`` (see account.move.line._get_ledger_search_domain)
+        restricts it to the lines matching the search of the report.
+        """
+        domain = [
+            ('company_id', '=', company_id),
+            ('date', '<', date_from),
+            ('account_id', 'in', list(account_ids))
+        ]
+        if posted_entries:
+            domain.append(('parent_state', '=', 'posted'))
+        domain += search_domain or []
+        if rates:
+            balances = {}
+            for account, day, balance in self.env['account.move.line']._read_group(
+                domain, ['account_id', 'date:day'], ['balance:sum']
+            ):
+                balances[account.id] = balances.get(account.id, 0.0) + rates.convert(balance, day)
+            return balances
+        groups = self.env['account.move.line']._read_group(domain, ['account_id'], ['balance:sum'])
+        return {account.id: balance for account, balance in groups}
+
+    @api.model
+    def _account_data(self, account, initial_balance):
+        return {
+            'id': f'account_{account.id}',
+            'account_id': account.id,
+            'code': account.code,
+            'name': account.name,
+            'account_type': account.account_type,
+            'initial_balance': initial_balance,
+            'debit': 0.0,
+            'credit': 0.0,
+            'balance': initial_balance,
+            'line_count': 0,
+            'has_children': True,
+            'expanded': False,
+            'lines': []
+        }
+
+    @api.model
+    def _line_data(self, line, factor=1.0):
+        return {
+            'id': f'line_{line.id}',
+            'date': line.date.strftime('%d/%m/%Y'),
+            'move_name': line.move_id.name,
+            'ref': line.ref or '',
+            'partner': line.partner_id.name if line.partner_id else '',
+            'currency': line.currency_id.name if line.currency_id else 'MZN',
+            'debit': line.debit * factor,
+            'credit': line.credit * factor,
+            'amount_currency': line.amount_currency,
+            'balance': 0.0,  # Will calculate running balance
+            'communication': line.name or '',
+            'journal_items': f"{line.move_id.name} - {line.name}" if line.name else line.move_id.name
+        }
+
+    @api.model
+    def _get_accounts_with_lines(self, domain, company_id, date_from, posted_entries, rates=None,
+                                 search_domain=None):
+        """Accounts with every line of the period and running balances"""
+        move_lines = self.env['account.move.line'].search(domain, order='account_id, date, id')
+        initial_balances = self._get_initial_balances(company_id, date_from, posted_entries,
+                                                      move_lines.account_id.ids, rates, search_domain)
+        
+        # Group by account
+        accounts_data = {}
+        for line in move_lines:
+            account = line.account_id
+            if account.id not in accounts_data:
+                accounts_data[account.id] = self._account_data(account, initial_balances.get(account.id, 0.0))
+            
+            account_data = accounts_data[account.id]
+            line_data = self._line_data(line, rates.factor(line.date) if rates else 1.0)
+            account_data['lines'].append(line_data)
+            account_data['line_count'] += 1
+            account_data['debit'] += line_data['debit']
+            account_data['credit'] += line_data['credit']
+            account_data['balance'] += line_data['debit'] - line_data['credit']
+        
+        # Calculate running balances for each account's lines
+        for account_data in accounts_data.values():
+            running_balance = account_data['initial_balance']
+            for line in account_data['lines']:
+                running_balance += line['debit'] - line['credit']
+                line['balance'] = running_balance
+        return accounts_data
+
+    @api.model
+    def _get_accounts_summary(self, domain, company_id, date_from, posted_entries, rates=None,
+                              search_domain=None):
+        """Account headers and line counts only, without reading the lines"""
+        if rates:
+            groups = self._convert_daily_groups(domain, rates)
+        else:
+            groups = self.env['account.move.line']._read_group(
+                domain, ['account_id'], ['debit:sum', 'credit:sum', 'balance:sum', '__count'])
+        initial_balances = self._get_initial_balances(company_id, date_from, posted_entries,
+                                                      [account.id for account, *_rest in groups], rates,
+                                                      search_domain)
+        
+        accounts_data = {}
+        for account, debit, credit, balance, count in groups:
+            account_data = self._account_data(account, initial_balances.get(account.id, 0.0))
+            account_data['debit'] = debit
+            account_data['credit'] = credit
+            account_data['balance'] += balance
+            account_data['line_count'] = count
+            accounts_data[account.id] = account_data
+        return accounts_data
+
+    @api.model
+    def _convert_daily_groups(self, domain, rates):
+        """Per-account debit/credit/balance/count sums, converted per day with ``rates``"""
+        totals = {}
+        for account, day, debit, credit, balance, count in self.env['account.move.line']._read_group(
+            domain, ['account_id', 'date:day'], ['debit:sum', 'credit:sum', 'balance:sum', '__count']
+        ):
+            factor = rates.factor(day)
+            row = totals.setdefault(account, [0.0, 0.0, 0.0, 0])
+            row[0] += debit * factor
+            row[1] += credit * factor
+            row[2] += balance * factor
+            row[3] += count
+        return [(account, *row) for account, row in totals.items()]
@@ -0,0 +1,212 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from datetime import timedelta
+import logging
+
+try:
+    from odoo.addons.account.models.account_move import MAX_HASH_VERSION
+except ImportError:
+    MAX_HASH_VERSION = 1
+
+_logger = logging.getLogger(__name__)
+
+# Moves read, verified and committed together
+HASH_VERIFICATION_BATCH = 1000
+# A verification that made no progress for this long was interrupted (its worker died)
+HASH_VERIFICATION_TIMEOUT = timedelta(hours=1)
+
+
+class AccountHashCheckpoint(models.Model):
+    _name = 'account.hash.checkpoint'
+    _description = 'Inalterability Hash Checkpoint'
+    _order = 'company_id, journal_id'
+
+    journal_id = fields.Many2one('account.journal', required=True, readonly=True, ondelete='cascade')
+    company_id = fields.Many2one(related='journal_id.company_id', store=True)
+    move_id = fields.Many2one('account.move', string='Last Verified Entry', readonly=True, ondelete='set null')
+    secure_sequence_number = fields.Integer(readonly=True)
+    inalterable_hash = fields.Char(readonly=True)
+    hash_version = fields.Integer(readonly=True)
+    verified_on = fields.Datetime(readonly=True)
+
+    _sql_constraints = [
+        ('journal_uniq', 'unique(journal_id)', 'A journal has one hash checkpoint.'),
+    ]
+
+
+class AccountHashVerification(models.Model):
+    _name = 'account.hash.verification'
+    _description = 'Inalterability Hash Verification'
+    _order = 'id desc'
+
+    company_id = fields.Many2one('res.company', required=True, readonly=True, default=lambda self: self.env.company)
+    full = fields.Boolean(string='From the First Entry', readonly=True,
+                          help="Ignore the checkpoints and verify every hashed entry again.")
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Verified'),
+        ('broken', 'Broken Chain'),
+        ('failed', 'Failed'),
+    ], default='queued', readonly=True)
+    journal_count = fields.Integer(string='Journals', readonly=True)
+    journals_done = fields.Integer(string='Journals Verified', readonly=True)
+    moves_checked = fields.Integer(string='Entries Verified', readonly=True)
+    progress = fields.Float(compute='_compute_progress')
+    date_start = fields.Datetime(readonly=True)
+    date_end = fields.Datetime(readonly=True)
+    broken_journal_id = fields.Many2one('account.journal', readonly=True)
+    broken_move_id = fields.Many2one('account.move', string='First Broken Entry', readonly=True)
+    message = fields.Text(readonly=True)
+
+    @api.depends('journal_count', 'journals_done')
+    def _compute_progress(self):
+        for run in self:
+            run.progress = 100.0 * run.journals_done / run.journal_count if run.journal_count else 0.0
+
+    def action_verify(self):
+        """Verify the entries hashed since the last checkpoints"""
+        return self._queue_verification()
+
+    def action_verify_full(self):
+        """Verify every hashed entry again, from the first one"""
+        return self._queue_verification(full=True)
+
+    @api.model
+    def _queue_verification(self, full=False):
+        """Queue a verification of the current company and start the background job"""
+        self._fail_interrupted_runs()
+        if self.search_count([('company_id', '=', self.env.company.id), ('state', 'in', ('queued', 'running'))]):
+            raise UserError(_('A verification of this company is already running.'))
+        run = self.create({'company_id': self.env.company.id, 'full': full})
+        self.env.ref('account_invoicing_ext_mz.ir_cron_hash_verification')._trigger()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': run.id,
+            'view_mode': 'form',
+        }
+
+    @api.model
+    def _fail_interrupted_runs(self):
+        """Fail the runs left running without progress for HASH_VERIFICATION_TIMEOUT, so others can be queued"""
+        interrupted = self.search([
+            ('state', '=', 'running'),
+            ('write_date', '<', fields.Datetime.now() - HASH_VERIFICATION_TIMEOUT),
+        ])
+        if interrupted:
+            interrupted.write({
+                'state': 'failed',
+                'date_end': fields.Datetime.now(),
+                'message': _('The verification was interrupted before it finished; the verified entries are kept.'),
+            })
+            _logger.warning(f"Hash verifications interrupted while running: {interrupted.ids}")
+
+    @api.model
+    def _cron_run_verifications(self):
+        """Background job: run the queued verifications, and a daily one per company with hashed journals"""
+        self._fail_interrupted_runs()
+        companies = self.env['account.journal'].sudo().search([('restrict_mode_hash_table', '=', True)]).company_id
+        recent = self.search([
+            '|', ('state', 'in', ('queued', 'running')),
+            ('create_date', '>', fields.Datetime.now() - timedelta(hours=20)),
+        ])
+        for company in companies - recent.company_id:
+            self.create({'company_id': company.id})
+        self.env.cr.commit()
+
+        for run in self.search([('state', '=', 'queued')], order='id'):
+            run.write({'state': 'running', 'date_start': fields.Datetime.now()})
+            self.env.cr.commit()
+            try:
+                run.with_company(run.company_id)._run()
+            except Exception as e:
+                self.env.cr.rollback()
+                run.write({'state': 'failed', 'message': str(e)})
+                _logger.error(f"Error verifying the hash chain of {run.company_id.name}: {str(e)}")
+            run.date_end = fields.Datetime.now()
+            self.env.cr.commit()
+
+    def _run(self):
+        """Verify every hashed journal of the company from its checkpoint, stopping at the first broken link"""
+        self.ensure_one()
+        journals = self.env['account.journal'].sudo().search([
+            ('company_id', '=', self.company_id.id),
+            ('restrict_mode_hash_table', '=', True),
+        ], order='id')
+        self.journal_count = len(journals)
+        Checkpoint = self.env['account.hash.checkpoint'].sudo()
+        for journal in journals:
+            checkpoint = Checkpoint.search([('journal_id', '=', journal.id)])
+            if self.full and checkpoint:
+                checkpoint.unlink()
+                checkpoint = Checkpoint
+            if not checkpoint:
+                checkpoint = Checkpoint.create({'journal_id': journal.id})
+            if not self._verify_journal(checkpoint):
+                self.state = 'broken'
+                return
+            self.journals_done += 1
+            self.env.cr.commit()
+        self.write({
+            'state': 'done',
+            'message': _('%s entries verified.', self.moves_checked),
+        })
+
+    def _verify_journal(self, checkpoint):
+        """
+        Verify the entries of one journal hashed after ``checkpoint``
+
+        Entries are read in batches ordered by their secure sequence number
+        (keyset pagination); the checkpoint moves forward, and is committed,
+        after each batch. Returns False at the first broken link, recorded
+        on the verification.
+        """
+        journal = checkpoint.journal_id
+        if checkpoint.move_id and checkpoint.move_id.inalterable_hash != checkpoint.inalterable_hash:
+            return self._broken(checkpoint.move_id, _('The last verified entry was altered since its verification.'))
+        last_number = checkpoint.secure_sequence_number
+        previous_hash = checkpoint.inalterable_hash or ''
+        hash_version = checkpoint.hash_version or 1
+        Move = self.env['account.move'].sudo()
+        while True:
+            moves = Move.search([
+                ('journal_id', '=', journal.id),
+                ('state', '=', 'posted'),
+                ('secure_sequence_number', '>', last_number),
+            ], order='secure_sequence_number', limit=HASH_VERIFICATION_BATCH)
+            if not moves:
+                return True
+            for move in moves:
+                if move.secure_sequence_number != last_number + 1:
+                    return self._broken(move, _('Entries %s to %s of the chain are missing.',
+                                                last_number + 1, move.secure_sequence_number - 1))
+                # Entries keep the hash version they were posted with, which only increases
+                while move.with_context(hash_version=hash_version)._compute_hash(previous_hash) \
+                        != move.inalterable_hash:
+                    if hash_version >= MAX_HASH_VERSION:
+                        return self._broken(move, _('The hash of the entry does not match its content.'))
+                    hash_version += 1
+                last_number = move.secure_sequence_number
+                previous_hash = move.inalterable_hash
+            checkpoint.write({
+                'move_id': moves[-1].id,
+                'secure_sequence_number': last_number,
+                'inalterable_hash': previous_hash,
+                'hash_version': hash_version,
+                'verified_on': fields.Datetime.now(),
+            })
+            self.moves_checked += len(moves)
+            self.env.cr.commit()
+            # Keep memory flat over long chains
+            self.env.invalidate_all()
+
+    def _broken(self, move, reason):
+        self.write({
+            'broken_journal_id': move.journal_id.id,
+            'broken_move_id': move.id,
+            'message': _('%(journal)s, %(move)s: %(reason)s', journal=move.journal_id.display_name,
+                         move=move.name, reason=reason),
+        })
+        _logger.warning(f"Broken hash chain in {move.journal_id.display_name} at {move.name}: {reason}")
+        return False
@@ -0,0 +1,221 @@
+from odoo import models, fields, api
+from dateutil.relativedelta import relativedelta
+import logging
+
+from psycopg2.errors import SerializationFailure
+
+_logger = logging.getLogger(__name__)
+
+# (company, month) pairs whose posted invoices changed since the last refresh;
+# marked in the transaction that posts or resets the invoices, or changes one
+# of their dimensions (salesperson, product category)
+INVOICE_ANALYSIS_DIRTY_TABLE = 'account_invoice_analysis_dirty'
+
+INVOICE_MOVE_TYPES = ('out_invoice', 'out_refund', 'in_invoice', 'in_refund')
+
+# Posted invoice lines grouped by the dimensions of the analysis; amounts are
+# signed as in account.invoice.report (revenue positive, costs negative)
+INVOICE_ANALYSIS_INSERT = """
+    INSERT INTO account_invoice_analysis (month, company_id, company_currency_id, currency_id, journal_id, move_type,
+                                          partner_id, categ_id, invoice_user_id, line_count, quantity,
+                                          price_subtotal, price_subtotal_currency)
+    SELECT date_trunc('month', m.invoice_date)::date,
+           m.company_id,
+           co.currency_id,
+           m.currency_id,
+           m.journal_id,
+           m.move_type,
+           m.commercial_partner_id,
+           pt.categ_id,
+           m.invoice_user_id,
+           COUNT(*),
+           SUM(CASE WHEN m.move_type IN ('in_invoice', 'out_refund') THEN -aml.quantity ELSE aml.quantity END),
+           SUM(-aml.balance),
+           SUM(-aml.amount_currency)
+      FROM account_move_line aml
+      JOIN account_move m ON m.id = aml.move_id
+      JOIN res_company co ON co.id = m.company_id
+ LEFT JOIN product_product pp ON pp.id = aml.product_id
+ LEFT JOIN product_template pt ON pt.id = pp.product_tmpl_id
+     WHERE m.state = 'posted'
+       AND m.move_type IN %(move_types)s
+       AND m.invoice_date IS NOT NULL
+       AND aml.display_type = 'product'
+       {where}
+     GROUP BY 1, 2, 3, 4, 5, 6, 7, 8, 9
+"""
+
+
+class AccountInvoiceAnalysis(models.Model):
+    _name = 'account.invoice.analysis'
+    _description = 'Invoice Analysis'
+    _auto = False
+    _log_access = False
+    _order = 'month desc'
+    _rec_name = 'month'
+
+    month = fields.Date(readonly=True)
+    company_id = fields.Many2one('res.company', readonly=True)
+    company_currency_id = fields.Many2one('res.currency', readonly=True)
+    currency_id = fields.Many2one('res.currency', string='Invoice Currency', readonly=True)
+    journal_id = fields.Many2one('account.journal', readonly=True)
+    move_type = fields.Selection([
+        ('out_invoice', 'Customer Invoice'),
+        ('out_refund', 'Customer Credit Note'),
+        ('in_invoice', 'Vendor Bill'),
+        ('in_refund', 'Vendor Credit Note'),
+    ], string='Type', readonly=True)
+    partner_id = fields.Many2one('res.partner', string='Partner', readonly=True)
+    categ_id = fields.Many2one('product.category', string='Product Category', readonly=True)
+    invoice_user_id = fields.Many2one('res.users', string='Salesperson', readonly=True)
+    line_count = fields.Integer(string='# Lines', readonly=True)
+    quantity = fields.Float(readonly=True)
+    price_subtotal = fields.Monetary(string='Untaxed Amount', currency_field='company_currency_id', readonly=True)
+    price_subtotal_currency = fields.Monetary(string='Untaxed Amount in Currency', currency_field='currency_id',
+                                              readonly=True)
+
+    def init(self):
+        self.env.cr.execute("SELECT to_regclass('account_invoice_analysis')")
+        exists = self.env.cr.fetchone()[0]
+        self.env.cr.execute(f"""
+            CREATE TABLE IF NOT EXISTS account_invoice_analysis (
+                id serial PRIMARY KEY,
+                month date NOT NULL,
+                company_id int NOT NULL,
+                company_currency_id int,
+                currency_id int,
+                journal_id int,
+                move_type varchar,
+                partner_id int,
+                categ_id int,
+                invoice_user_id int,
+                line_count int,
+                quantity numeric,
+                price_subtotal numeric,
+                price_subtotal_currency numeric
+            );
+            CREATE INDEX IF NOT EXISTS account_invoice_analysis_company_month_index
+                ON account_invoice_analysis (company_id, month);
+            CREATE TABLE IF NOT EXISTS {INVOICE_ANALYSIS_DIRTY_TABLE} (
+                company_id int NOT NULL,
+                month date NOT NULL,
+                PRIMARY KEY (company_id, month)
+            );
+        """)
+        if not exists and self._refresh(full=True) is None:
+            # A refresh holds the lock: leave every month to the next run of the cron
+            self._mark_all_dirty()
+
+    @api.model
+    def _mark_dirty(self, moves):
+        """
+        Queue the months of these invoices for the next refresh
+
+        An existing row is updated rather than skipped, so that this
+        transaction holds its lock: a refresh whose snapshot does not see
+        the invoices then fails to delete the row (serialization failure)
+        and rebuilds the month on its next run instead of losing them.
+        """
+        invoices = moves.filtered(lambda move: move.move_type in INVOICE_MOVE_TYPES)
+        if not invoices:
+            return
+        # _post sets the invoice date of customer invoices in the cache
+        self.env['account.move'].flush_model(['invoice_date', 'company_id', 'move_type'])
+        self.env.cr.execute(f"""
+            INSERT INTO {INVOICE_ANALYSIS_DIRTY_TABLE} (company_id, month)
+            SELECT DISTINCT company_id, date_trunc('month', invoice_date)::date
+              FROM account_move
+             WHERE id IN %s
+               AND invoice_date IS NOT NULL
+                ON CONFLICT (company_id, month) DO UPDATE SET month = EXCLUDED.month
+        """, [tuple(invoices.ids)])
+
+    @api.model
+    def _mark_all_dirty(self):
+        """Queue every month with posted invoices, for a full rebuild by the cron"""
+        self.env.cr.execute(f"""
+            INSERT INTO {INVOICE_ANALYSIS_DIRTY_TABLE} (company_id, month)
+            SELECT DISTINCT company_id, date_trunc('month', invoice_date)::date
+              FROM account_move
+             WHERE state = 'posted'
+               AND move_type IN %s
+               AND invoice_date IS NOT NULL
+                ON CONFLICT (company_id, month) DO UPDATE SET month = EXCLUDED.month
+        """, [INVOICE_MOVE_TYPES])
+
+    @api.model
+    def _mark_products_dirty(self, templates):
+        """Queue the months of the posted invoices of these products (e.g. their category changed)"""
+        self.env['account.move.line'].flush_model(['product_id', 'display_type', 'move_id'])
+        self.env.cr.execute(f"""
+            INSERT INTO {INVOICE_ANALYSIS_DIRTY_TABLE} (company_id, month)
+            SELECT DISTINCT m.company_id, date_trunc('month', m.invoice_date)::date
+              FROM account_move_line aml
+              JOIN account_move m ON m.id = aml.move_id
+              JOIN product_product pp ON pp.id = aml.product_id
+             WHERE pp.product_tmpl_id IN %s
+               AND aml.display_type = 'product'
+               AND m.state = 'posted'
+               AND m.move_type IN %s
+               AND m.invoice_date IS NOT NULL
+                ON CONFLICT (company_id, month) DO UPDATE SET month = EXCLUDED.month
+        """, [tuple(templates.ids), INVOICE_MOVE_TYPES])
+
+    @api.model
+    def _refresh(self, full=False):
+        """
+        Rebuild the months queued since the last refresh (all months if ``full``)
+
+        Each month is deleted and re-aggregated in the same transaction, so
+        the pivots never see a half-refreshed month. Returns the number of
+        months rebuilt, or None when another refresh is running.
+        """
+        self.env['account.move'].flush_model()
+        self.env['account.move.line'].flush_model()
+        self.env.cr.execute("SELECT pg_try_advisory_xact_lock(hashtext('account_invoice_analysis'))")
+        if not self.env.cr.fetchone()[0]:
+            return None
+        params = {'move_types': INVOICE_MOVE_TYPES}
+        if full:
+            self.env.cr.execute(f"DELETE FROM {INVOICE_ANALYSIS_DIRTY_TABLE}")
+            self.env.cr.execute("DELETE FROM account_invoice_analysis")
+            self.env.cr.execute(INVOICE_ANALYSIS_INSERT.format(where=''), params)
+            self.env.cr.execute("ANALYZE account_invoice_analysis")
+            self.env.cr.execute("SELECT COUNT(DISTINCT (company_id, month)) FROM account_invoice_analysis")
+            months = self.env.cr.fetchone()[0]
+        else:
+            self.env.cr.execute(f"DELETE FROM {INVOICE_ANALYSIS_DIRTY_TABLE} RETURNING company_id, month")
+            dirty = self.env.cr.fetchall()
+            if not dirty:
+                return 0
+            params['company_ids'] = [company_id for company_id, _month in dirty]
+            params['months'] = [month for _company_id, month in dirty]
+            params['date_from'] = min(params['months'])
+            params['date_to'] = max(params['months']) + relativedelta(months=1)
+            self.env.cr.execute("""
+                DELETE FROM account_invoice_analysis a
+                 USING unnest(%(company_ids)s::int[], %(months)s::date[]) AS d(company_id, month)
+                 WHERE a.company_id = d.company_id
+                   AND a.month = d.month
+            """, params)
+            self.env.cr.execute(INVOICE_ANALYSIS_INSERT.format(where="""
+                AND m.invoice_date >= %(date_from)s
+                AND m.invoice_date < %(date_to)s
+                AND (m.company_id, date_trunc('month', m.invoice_date)::date) IN (
+                    SELECT * FROM unnest(%(company_ids)s::int[], %(months)s::date[]))
+            """), params)
+            months = len(dirty)
+        self.invalidate_model()
+        return months
+
+    @api.model
+    def _cron_refresh(self):
+        try:
+            months = self._refresh()
+        except SerializationFailure:
+            # Months marked dirty again by invoices committed after our snapshot
+            self.env.cr.rollback()
+            _logger.info("Invoice analysis: months changed while refreshing, retried on the next run")
+            return
+        if months:
+            _logger.info(f"Invoice analysis: {months} months refreshed")
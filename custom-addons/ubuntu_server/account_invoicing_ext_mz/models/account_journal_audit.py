@@ -2,6 +2,8 @@ from odoo import models, fields, api
 from datetime import datetime, timedelta, date
 import logging
 
+from ..tools import columnar
+
 _logger = logging.getLogger(__name__)
 
 class AccountJournalAudit(models.TransientModel):
@@ -10,8 +12,8 @@ class AccountJournalAudit(models.TransientModel):
     
     @api.model
     def get_journal_audit_data(self, date_from=None, date_to=None, journals=None, 
-                               posted_entries=True, company_id=None):
-        """Get journal audit data for the report"""
+                               posted_entries=True, company_id=None, format='rows'):
+        """Get journal audit data for the report (format='columnar' for the compact payload)"""
         try:
             if not company_id:
                 company_id = self.env.company.id
@@ -145,7 +147,7 @@ class AccountJournalAudit(models.TransientModel):
             else:
                 date_to_str = ''
             
-            return {
+            result = {
                 'journals': journals_list,
                 'tax_summary': tax_summary,
                 'company_name': self.env.company.name,
@@ -154,6 +156,9 @@ class AccountJournalAudit(models.TransientModel):
                 'date_to': date_to_str,
                 'unposted_warning': not posted_entries
             }
+            if format == 'columnar':
+                return columnar.encode_report(result, 'journals', 'moves', ('date', 'partner', 'state'))
+            return result
             
         except Exception as e:
             _logger.error(f"Error getting journal audit data: {str(e)}")
@@ -0,0 +1,235 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import AccessError, UserError
+import base64
+import io
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Fact table columns, in file order: (name, arrow type)
+LEDGER_FACT_COLUMNS = [
+    ('id', 'int64'),
+    ('move_id', 'int64'),
+    ('move_name', 'string'),
+    ('date', 'date32'),
+    ('company_id', 'int64'),
+    ('journal_id', 'int64'),
+    ('journal_code', 'string'),
+    ('account_id', 'int64'),
+    ('account_code', 'string'),
+    ('partner_id', 'int64'),
+    ('partner_name', 'string'),
+    ('currency_id', 'int64'),
+    ('analytic_distribution', 'string'),
+    ('parent_state', 'string'),
+    ('debit', 'float64'),
+    ('credit', 'float64'),
+    ('balance', 'float64'),
+    ('amount_currency', 'float64'),
+    ('amount_residual', 'float64'),
+    ('write_date', 'timestamp'),
+]
+
+LEDGER_FACT_QUERY = """
+    SELECT aml.id, aml.move_id, aml.move_name, aml.date, aml.company_id,
+           aml.journal_id, journal.code, aml.account_id, account.code,
+           aml.partner_id, partner.name, aml.currency_id,
+           aml.analytic_distribution::text, aml.parent_state,
+           aml.debit, aml.credit, aml.balance, aml.amount_currency,
+           aml.amount_residual, aml.write_date
+      FROM account_move_line aml
+      JOIN account_account account ON account.id = aml.account_id
+      JOIN account_journal journal ON journal.id = aml.journal_id
+ LEFT JOIN res_partner partner ON partner.id = aml.partner_id
+     WHERE {where}
+  ORDER BY aml.id
+     LIMIT %(limit)s
+"""
+
+
+class AccountLedgerExport(models.Model):
+    _name = 'account.ledger.export'
+    _description = 'Ledger Fact Table Export'
+    _order = 'id desc'
+
+    name = fields.Char(required=True)
+    company_id = fields.Many2one('res.company', required=True, default=lambda self: self.env.company)
+    journal_ids = fields.Many2many('account.journal', string='Journals',
+                                   help="Leave empty to export every journal.")
+    date_from = fields.Date()
+    date_to = fields.Date()
+    posted_only = fields.Boolean(default=True)
+    file_format = fields.Selection([('parquet', 'Parquet'), ('arrow', 'Arrow IPC')],
+                                   required=True, default='parquet')
+    batch_size = fields.Integer(default=50000, help="Rows per row group / record batch.")
+    incremental = fields.Boolean(default=True,
+                                 help="Only export lines written since the last run. "
+                                      "Each run produces a new part file.")
+    last_write_date = fields.Datetime(readonly=True, copy=False)
+    last_row_count = fields.Integer(readonly=True, copy=False)
+    attachment_ids = fields.Many2many('ir.attachment', string='Exported Files', readonly=True, copy=False)
+
+    @api.model
+    def read_fact_batch(self, company_id=None, after_id=0, limit=50000, date_from=None, date_to=None,
+                        journal_ids=None, posted_only=True, since=None):
+        """Return one keyset-ordered batch of the ledger fact table as column lists"""
+        if not self.env.user.has_group('account.group_account_user'):
+            raise UserError(_('Access denied'))
+        if not company_id:
+            company_id = self.env.company.id
+        # Raw SQL bypasses the record rules
+        if company_id not in self.env.user.company_ids.ids:
+            raise AccessError(_("You can only export the ledger of the companies you have access to."))
+
+        where = ['aml.company_id = %(company_id)s', 'aml.id > %(after_id)s']
+        params = {
+            'company_id': company_id,
+            'after_id': after_id or 0,
+            'limit': limit or 50000,
+        }
+        if posted_only:
+            where.append("aml.parent_state = 'posted'")
+        else:
+            where.append("aml.parent_state != 'cancel'")
+        if date_from:
+            where.append('aml.date >= %(date_from)s')
+            params['date_from'] = date_from
+        if date_to:
+            where.append('aml.date <= %(date_to)s')
+            params['date_to'] = date_to
+        if journal_ids:
+            where.append('aml.journal_id IN %(journal_ids)s')
+            params['journal_ids'] = tuple(journal_ids)
+        if since:
+            where.append('aml.write_date > %(since)s')
+            params['since'] = since
+
+        self.env['account.move.line'].flush_model()
+        self.env.cr.execute(LEDGER_FACT_QUERY.format(where=' AND '.join(where)), params)
+        rows = self.env.cr.fetchall()
+
+        columns = {name: [] for name, _type in LEDGER_FACT_COLUMNS}
+        names = [name for name, _type in LEDGER_FACT_COLUMNS]
+        max_write_date = None
+        for row in rows:
+            for name, value in zip(names, row):
+                if name in ('date', 'write_date') and value:
+                    value = fields.Date.to_string(value) if name == 'date' else fields.Datetime.to_string(value)
+                # XML-RPC cannot marshal None
+                columns[name].append(value if value is not None else False)
+            if row[-1] and (max_write_date is None or row[-1] > max_write_date):
+                max_write_date = row[-1]
+
+        return {
+            'columns': columns,
+            'count': len(rows),
+            'last_id': rows[-1][0] if rows else (after_id or 0),
+            'max_write_date': fields.Datetime.to_string(max_write_date) if max_write_date else False,
+        }
+
+    def _fact_batches(self, since=None):
+        """Yield column batches for this export configuration"""
+        self.ensure_one()
+        after_id = 0
+        while True:
+            batch = self.read_fact_batch(
+                company_id=self.company_id.id,
+                after_id=after_id,
+                limit=self.batch_size,
+                date_from=self.date_from,
+                date_to=self.date_to,
+                journal_ids=self.journal_ids.ids,
+                posted_only=self.posted_only,
+                since=since,
+            )
+            if not batch['count']:
+                return
+            yield batch
+            after_id = batch['last_id']
+
+    def action_export(self):
+        """Write the fact table to a Parquet/Arrow file attached to the export"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise UserError(_('Please install pyarrow library'))
+
+        for export in self:
+            since = export.last_write_date if export.incremental else None
+            schema = _arrow_schema(pa)
+            output = io.BytesIO()
+            writer = None
+            row_count = 0
+            max_write_date = export.last_write_date
+            try:
+                for batch in export._fact_batches(since=since):
+                    record_batch = _arrow_batch(pa, schema, batch['columns'])
+                    if writer is None:
+                        if export.file_format == 'parquet':
+                            writer = pq.ParquetWriter(output, schema)
+                        else:
+                            writer = pa.ipc.new_file(output, schema)
+                    if export.file_format == 'parquet':
+                        # One row group per batch keeps memory flat on both ends
+                        writer.write_table(pa.Table.from_batches([record_batch]))
+                    else:
+                        writer.write_batch(record_batch)
+                    row_count += batch['count']
+                    batch_max = fields.Datetime.to_datetime(batch['max_write_date'])
+                    if batch_max and (not max_write_date or batch_max > max_write_date):
+                        max_write_date = batch_max
+            finally:
+                if writer is not None:
+                    writer.close()
+
+            if not row_count:
+                _logger.info(f"Ledger export {export.name}: no new lines since {since}")
+                export.last_row_count = 0
+                continue
+
+            extension = 'parquet' if export.file_format == 'parquet' else 'arrow'
+            stamp = fields.Datetime.now().strftime('%Y%m%d%H%M%S')
+            attachment = self.env['ir.attachment'].create({
+                'name': f"ledger_{export.company_id.id}_{stamp}.{extension}",
+                'datas': base64.b64encode(output.getvalue()),
+                'res_model': export._name,
+                'res_id': export.id,
+                'mimetype': 'application/vnd.apache.parquet' if extension == 'parquet'
+                            else 'application/vnd.apache.arrow.file',
+            })
+            export.write({
+                'attachment_ids': [(4, attachment.id)],
+                'last_write_date': max_write_date,
+                'last_row_count': row_count,
+            })
+            _logger.info(f"Ledger export {export.name}: {row_count} lines written to {attachment.name}")
+        return True
+
+    def action_reset(self):
+        """Forget the incremental watermark so the next run exports everything"""
+        self.write({'last_write_date': False, 'last_row_count': 0})
+        return True
+
+
+def _arrow_schema(pa):
+    types = {
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+        'string': pa.string(),
+        'date32': pa.date32(),
+        'timestamp': pa.timestamp('us'),
+    }
+    return pa.schema([(name, types[arrow_type]) for name, arrow_type in LEDGER_FACT_COLUMNS])
+
+
+def _arrow_batch(pa, schema, columns):
+    arrays = []
+    for field in schema:
+        values = [None if value is False else value for value in columns[field.name]]
+        if field.name == 'date':
+            values = [fields.Date.to_date(value) for value in values]
+        elif field.name == 'write_date':
+            values = [fields.Datetime.to_datetime(value) for value in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
@@ -0,0 +1,395 @@
+from odoo import models, fields, api
+from odoo.modules.db import FunctionStatus
+from odoo.tools import SQL
+from odoo.tools.sql import create_index, escape_psql
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Journal item columns searched by the ledger reports with ILIKE '%...%'
+LEDGER_SEARCH_COLUMNS = ('move_name', 'ref', 'name')
+
+# Bumped after every commit that touched journal items; only generates the
+# versions, which report caches read from the mark table below
+LEDGER_VERSION_SEQUENCE = 'account_invoicing_ext_mz_ledger_version_seq'
+# One-row table holding the last bumped version. Unlike the sequence (whose WAL
+# runs ahead of nextval) it replicates exactly, so a streaming replica can tell
+# which ledger version it has replayed.
+LEDGER_VERSION_MARK_TABLE = 'account_invoicing_ext_mz_ledger_version_mark'
+
+# Bus channel (per company) and notification type of the posting deltas
+LEDGER_DELTA_CHANNEL = 'account_report_deltas'
+LEDGER_DELTA_NOTIFICATION = 'account_invoicing_ext_mz/ledger_delta'
+# Beyond this many rows open reports are told to reload instead
+LEDGER_DELTA_MAX_ROWS = 1000
+
+
+class AccountMoveLine(models.Model):
+    _inherit = 'account.move.line'
+
+    def init(self):
+        super().init()
+        self.env.cr.execute(f"CREATE SEQUENCE IF NOT EXISTS {LEDGER_VERSION_SEQUENCE}")
+        self.env.cr.execute(f"""
+            CREATE TABLE IF NOT EXISTS {LEDGER_VERSION_MARK_TABLE} (id int PRIMARY KEY, version bigint NOT NULL);
+            INSERT INTO {LEDGER_VERSION_MARK_TABLE} (id, version) VALUES (1, 0) ON CONFLICT DO NOTHING
+        """)
+        # Analytic filters of the reports match the distribution keys with this
+        # expression (see account.report.aggregate). The analytic mixin creates
+        # the same index under the same name, in which case this is a no-op.
+        create_index(
+            self.env.cr,
+            f'{self._table}_analytic_distribution_accounts_gin_index',
+            self._table,
+            [r"""regexp_split_to_array(jsonb_path_query_array(analytic_distribution, '$.keyvalue()."key"')::text, '\D+')"""],
+            method='gin',
+        )
+        # Trigram indexes let ILIKE '%term%' on journal items use an index scan.
+        # Partner names are already covered by res_partner.complete_name.
+        if not self.pool.has_trigram:
+            _logger.warning("pg_trgm is not installed: ledger search will scan account_move_line")
+            return
+        # unaccent() can only be part of an index expression when it is immutable
+        unaccent = self.pool.has_unaccent == FunctionStatus.INDEXABLE
+        for column in LEDGER_SEARCH_COLUMNS:
+            create_index(
+                self.env.cr,
+                f'account_move_line__{column}_trgm_index',
+                self._table,
+                [f'({self.pool.unaccent(column) if unaccent else column}) gin_trgm_ops'],
+                method='gin',
+            )
+
+    # The ledger version only tracks posted journal items: editing drafts
+    # leaves the cached posted aggregates valid
+
+    @api.model
+    def _create(self, data_list):
+        records = super()._create(data_list)
+        if any(move.state == 'posted' for move in records.move_id):
+            self._bump_ledger_version_on_commit()
+        return records
+
+    def _write(self, vals):
+        # _write also receives the flushes of stored computed fields
+        # (parent_state on posting and resetting to draft, amount_residual on
+        # reconciliation); the cache already holds the values written
+        res = super()._write(vals)
+        if 'parent_state' in vals or any(line.parent_state == 'posted' for line in self):
+            self._bump_ledger_version_on_commit()
+        return res
+
+    def unlink(self):
+        posted = any(line.parent_state == 'posted' for line in self)
+        res = super().unlink()
+        if posted:
+            self._bump_ledger_version_on_commit()
+        return res
+
+    def _bump_ledger_version_on_commit(self):
+        """Advance the ledger version once, after this transaction commits
+
+        Bumping after the commit guarantees that a reader who saw the old
+        version could not have read data newer than it.
+        """
+        postcommit = self.env.cr.postcommit
+        if postcommit.data.get('ledger_version_bump'):
+            return
+        postcommit.data['ledger_version_bump'] = True
+        registry = self.pool
+
+        @postcommit.add
+        def bump_ledger_version():
+            with registry.cursor() as cr:
+                cr.execute(f"SELECT nextval('{LEDGER_VERSION_SEQUENCE}')")
+                version = cr.fetchone()[0]
+                cr.execute(f"UPDATE {LEDGER_VERSION_MARK_TABLE} SET version = GREATEST(version, %s)", [version])
+
+    @api.model
+    def get_ledger_version(self):
+        """Cheap token that changes whenever journal items change
+
+        Read from the mark table through the request cursor, so it belongs
+        to the same snapshot as the report data read afterwards: the mark is
+        only updated after the journal items of its version are committed,
+        hence data read under this version is never older than it. (The
+        sequence is not transactional and may already be ahead of the
+        snapshot.)
+        """
+        self.env.cr.execute(f"SELECT version FROM {LEDGER_VERSION_MARK_TABLE} WHERE id = 1")
+        row = self.env.cr.fetchone()
+        return row[0] if row else 0
+
+    @api.model
+    def _get_ledger_search_domain(self, search=None, amount_min=None, amount_max=None,
+                                  search_accounts=True):
+        """
+        Domain for the ledger search box and amount range
+
+        ``search`` matches the account code/name (when ``search_accounts``), the
+        partner, the entry number, the reference and the label; the amount range
+        applies to whichever of debit/credit carries the line amount.
+        """
+        domain = []
+        search = (search or '').strip()
+        if search:
+            terms = [
+                ('partner_id.complete_name', 'ilike', search),
+                ('move_name', 'ilike', search),
+                ('ref', 'ilike', search),
+                ('name', 'ilike', search),
+            ]
+            if search_accounts:
+                terms = [
+                    ('account_id.code', '=ilike', f'{escape_psql(search)}%'),
+                    ('account_id.name', 'ilike', search),
+                ] + terms
+            domain += ['|'] * (len(terms) - 1) + terms
+
+        amount_terms = {}
+        if amount_min not in (None, '', False):
+            amount_terms['>='] = float(amount_min)
+        if amount_max not in (None, '', False):
+            amount_terms['<='] = float(amount_max)
+        if amount_terms:
+            # Only the non-zero side of a line carries its amount
+            debit = [('debit', '>', 0)] + [('debit', op, value) for op, value in amount_terms.items()]
+            credit = [('credit', '>', 0)] + [('credit', op, value) for op, value in amount_terms.items()]
+            domain += ['|'] + ['&'] * (len(debit) - 1) + debit + ['&'] * (len(credit) - 1) + credit
+        return domain
+
+    @api.model
+    def _get_balance_before(self, domain, offset, order='date, id', rates=None):
+        """
+        Sum of the balance of the first ``offset`` lines of ``domain`` in ``order``
+
+        ``rates`` (tools.rate_table.RateTable) converts the per-date sums.
+        """
+        if not offset:
+            return 0.0
+        query = self._search(domain, order=order, limit=offset)
+        if rates:
+            self.env.cr.execute(SQL(
+                "SELECT date, SUM(balance) FROM account_move_line WHERE id IN (%s) GROUP BY date",
+                query.subselect(),
+            ))
+            return sum(rates.convert(balance, day) for day, balance in self.env.cr.fetchall())
+        self.env.cr.execute(SQL(
+            "SELECT COALESCE(SUM(balance), 0) FROM account_move_line WHERE id IN (%s)",
+            query.subselect(),
+        ))
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _get_amount_currency_totals(self, domain, groupby):
+        """
+        ``amount_currency`` subtotals per currency for each ``groupby`` value
+
+        Returns ``{record_id or 0: [{'currency': name, 'amount_currency': sum}]}``.
+        """
+        totals = {}
+        for record, currency, amount_currency in self._read_group(
+            domain, [groupby, 'currency_id'], ['amount_currency:sum'], order=f'{groupby}, currency_id',
+        ):
+            totals.setdefault(record.id or 0, []).append({
+                'currency': currency.name or '',
+                'amount_currency': amount_currency,
+            })
+        return totals
+
+    @api.model
+    def _merge_amount_currency_totals(self, totals):
+        """Report-wide subtotals from the per-record ones of _get_amount_currency_totals"""
+        merged = {}
+        for subtotals in totals.values():
+            for subtotal in subtotals:
+                merged[subtotal['currency']] = merged.get(subtotal['currency'], 0.0) + subtotal['amount_currency']
+        return [{'currency': currency, 'amount_currency': amount} for currency, amount in sorted(merged.items())]
+
+
+class AccountMove(models.Model):
+    _inherit = 'account.move'
+
+    def _post(self, soft=True):
+        posted = super()._post(soft=soft)
+        posted._send_ledger_deltas_on_commit(posted=posted)
+        self.env['account.invoice.analysis']._mark_dirty(posted)
+        self.env['account.deferral.line']._schedule_posted_moves(posted)
+        return posted
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'invoice_user_id' in vals:
+            # The salesperson is a dimension of the invoice analysis
+            self.env['account.invoice.analysis']._mark_dirty(self.filtered(lambda move: move.state == 'posted'))
+        return res
+
+    def button_draft(self):
+        # Read the contribution being withdrawn while the moves are still posted
+        was_posted = self.filtered(lambda move: move.state == 'posted')
+        was_posted._send_ledger_deltas_on_commit(unposted=True)
+        self.env['account.invoice.analysis']._mark_dirty(was_posted)
+        return super().button_draft()
+
+    def _send_ledger_deltas_on_commit(self, posted=None, unposted=False):
+        """
+        Publish the balance changes of posting/unposting these moves on the bus
+
+        Posted moves are only read when the transaction is about to commit, so
+        the deltas reflect the final lines (e.g. reconciled in the same
+        transaction). Moves posted and unposted within the same transaction
+        cancel out.
+        """
+        if not self:
+            return
+        data = self._get_ledger_delta_data()
+        data['moves'].update(self.ids)
+        if posted:
+            data['posted'].update(posted.ids)
+        if unposted:
+            withdrawn = self.filtered(lambda move: move.id not in data['posted'])
+            data['posted'].difference_update(self.ids)
+            data['unposted'] += withdrawn.sudo()._get_ledger_deltas(-1)
+
+    @api.model
+    def _get_ledger_delta_data(self):
+        """Deltas collected by this transaction, published once just before it commits"""
+        precommit = self.env.cr.precommit
+        data = precommit.data.get('ledger_deltas')
+        if data is None:
+            data = precommit.data['ledger_deltas'] = {
+                'posted': set(),
+                'unposted': [],
+                # every move posted or unposted, whose items the above account for
+                'moves': set(),
+                # receivable/payable item -> whether the aged reports listed it before
+                # its reconciliation changed
+                'listed': {},
+            }
+            env = self.env
+
+            @precommit.add
+            def send_ledger_deltas():
+                moves = env['account.move'].sudo()
+                posted_moves = moves.browse(data['posted']).exists().filtered(lambda move: move.state == 'posted')
+                moves._send_ledger_deltas(
+                    posted_moves._get_ledger_deltas(1)
+                    + data['unposted']
+                    + moves._get_reconcile_deltas(data['listed'], data['moves'])
+                )
+
+        return data
+
+    def _get_ledger_deltas(self, sign):
+        """
+        Signed balance rows of these moves, for the open reports to patch
+
+        Returns a list of ``(company_id, kind, row)``: ``balance`` rows are
+        grouped per account, journal and date; ``partner_item`` rows are the
+        receivable/payable journal items, as listed by the aged reports.
+        """
+        if not self:
+            return []
+        MoveLine = self.env['account.move.line']
+        deltas = []
+        for company, account, journal, day, balance in MoveLine._read_group(
+            [('move_id', 'in', self.ids), ('account_id', '!=', False)],
+            ['company_id', 'account_id', 'journal_id', 'date:day'],
+            ['balance:sum'],
+        ):
+            if balance:
+                deltas.append((company.id, 'balance', {
+                    'account_id': account.id,
+                    'code': account.code,
+                    'name': account.name,
+                    'account_type': account.account_type,
+                    'journal_id': journal.id,
+                    'date': fields.Date.to_string(day),
+                    'balance': sign * balance,
+                }))
+        items = MoveLine.search([
+            ('move_id', 'in', self.ids),
+            ('account_id.account_type', 'in', ('asset_receivable', 'liability_payable')),
+            ('reconciled', '=', False),
+        ])
+        return deltas + self._get_partner_item_deltas(items, sign)
+
+    @api.model
+    def _get_reconcile_deltas(self, listed, move_ids):
+        """
+        ``partner_item`` rows of the items whose reconciliation changed
+
+        The aged reports list the posted items not fully reconciled, at their
+        balance: an item fully reconciled by this transaction is withdrawn, an
+        item a removed reconciliation reopened is added back. Items of moves
+        posted or unposted by the transaction are already in their deltas.
+        """
+        lines = self.env['account.move.line'].browse(list(listed)).exists().filtered(
+            lambda line: line.move_id.id not in move_ids and line.parent_state == 'posted'
+        )
+        closed = lines.filtered(lambda line: listed[line.id] and line.reconciled)
+        reopened = lines.filtered(lambda line: not listed[line.id] and not line.reconciled)
+        return self._get_partner_item_deltas(closed, -1) + self._get_partner_item_deltas(reopened, 1)
+
+    @api.model
+    def _get_partner_item_deltas(self, items, sign):
+        return [
+            (line.company_id.id, 'partner_item', {
+                'line_id': line.id,
+                'sign': sign,
+                'partner_id': line.partner_id.id,
+                'partner_name': line.partner_id.name or '',
+                'partner_ref': line.partner_id.ref or '',
+                'account_code': line.account_id.code,
+                'account_name': line.account_id.name,
+                'account_type': line.account_id.account_type,
+                'date': fields.Date.to_string(line.date),
+                'move_name': line.move_id.name,
+                'ref': line.ref or line.move_id.ref or '',
+                'balance': sign * line.balance,
+            })
+            for line in items
+        ]
+
+    @api.model
+    def _send_ledger_deltas(self, deltas):
+        """One bus notification per company, on that company's report channel"""
+        by_company = {}
+        for company_id, kind, row in deltas:
+            payload = by_company.setdefault(company_id, {
+                'company_id': company_id,
+                'balances': [],
+                'partner_items': [],
+            })
+            payload['balances' if kind == 'balance' else 'partner_items'].append(row)
+        for company_id, payload in by_company.items():
+            if len(payload['balances']) + len(payload['partner_items']) > LEDGER_DELTA_MAX_ROWS:
+                payload = {'company_id': company_id, 'overflow': True}
+            company = self.env['res.company'].browse(company_id)
+            self.env['bus.bus']._sendone((company, LEDGER_DELTA_CHANNEL), LEDGER_DELTA_NOTIFICATION, payload)
+
+
+class AccountPartialReconcile(models.Model):
+    _inherit = 'account.partial.reconcile'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        line_ids = {vals[field] for vals in vals_list for field in ('debit_move_id', 'credit_move_id')
+                    if vals.get(field)}
+        self._track_reconciled_items(self.env['account.move.line'].browse(line_ids))
+        return super().create(vals_list)
+
+    def unlink(self):
+        self._track_reconciled_items(self.debit_move_id | self.credit_move_id)
+        return super().unlink()
+
+    def _track_reconciled_items(self, lines):
+        """Remember whether the aged reports listed these items, before their reconciliation changes"""
+        items = lines.sudo().filtered(
+            lambda line: line.account_id.account_type in ('asset_receivable', 'liability_payable')
+        )
+        if not items:
+            return
+        listed = self.env['account.move']._get_ledger_delta_data()['listed']
+        for line in items:
+            listed.setdefault(line.id, line.parent_state == 'posted' and not line.reconciled)
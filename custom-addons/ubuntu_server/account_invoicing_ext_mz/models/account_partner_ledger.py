@@ -2,6 +2,8 @@ from odoo import models, fields, api
 from datetime import datetime, timedelta, date
 import logging
 
+from ..tools import columnar
+
 _logger = logging.getLogger(__name__)
 
 class AccountPartnerLedger(models.TransientModel):
@@ -10,8 +12,20 @@ class AccountPartnerLedger(models.TransientModel):
     
     @api.model
     def get_partner_ledger_data(self, date_from=None, date_to=None, partner_ids=None, 
-                                account_type='all', posted_entries=True, company_id=None):
-        """Get partner ledger data for the report"""
+                                account_type='all', posted_entries=True, company_id=None, format='rows',
+                                search=None, amount_min=None, amount_max=None, include_lines=True,
+                                currency_id=None):
+        """
+        Get partner ledger data for the report (format='columnar' for the compact payload)
+
+        ``search`` (partner, account, entry number, reference) and the amount
+        range are applied in the database; only matching lines are returned.
+        With ``include_lines=False`` partners only carry ``line_count`` and the
+        lines are paged through get_partner_ledger_lines.
+        With ``currency_id`` amounts are converted to that currency at the rate
+        of their date; partners always carry ``amount_currency`` subtotals per
+        transaction currency.
+        """
         try:
             if not company_id:
                 company_id = self.env.company.id
@@ -30,76 +44,19 @@ class AccountPartnerLedger(models.TransientModel):
                 if isinstance(date_from, str):
                     date_from = fields.Date.from_string(date_from)
             
-            # Build domain for account.move.line
-            domain = [
-                ('company_id', '=', company_id),
-                ('date', '>=', date_from),
-                ('date', '<=', date_to),
-                ('parent_state', '=', 'posted') if posted_entries else ('parent_state', '!=', 'cancel')
-            ]
+            domain = self._get_lines_domain(company_id, date_from, date_to, partner_ids, account_type,
+                                            posted_entries, search, amount_min, amount_max)
             
-            # Filter by account type (receivable/payable)
-            if account_type == 'receivable':
-                domain.append(('account_id.account_type', '=', 'asset_receivable'))
-            elif account_type == 'payable':
-                domain.append(('account_id.account_type', '=', 'liability_payable'))
+            rates = self.env['account.report.aggregate']._get_rate_table(company_id, currency_id, date_to)
+            if include_lines:
+                partners_dict = self._get_partners_with_lines(domain, rates)
             else:
-                domain.append(('account_id.account_type', 'in', ['asset_receivable', 'liability_payable']))
-            
-            if partner_ids:
-                domain.append(('partner_id', 'in', partner_ids))
-            
-            # Get all move lines
-            move_lines = self.env['account.move.line'].search(domain, order='partner_id, date, id')
-            
-            partners_dict = {}
+                partners_dict = self._get_partners_summary(domain, rates)
             
-            # Group move lines by partner
-            for line in move_lines:
-                partner = line.partner_id
-                partner_key = partner.id if partner else 0
-                
-                if partner_key not in partners_dict:
-                    partners_dict[partner_key] = {
-                        'id': f'partner_{partner_key}',
-                        'name': partner.name if partner else 'Unknown Partner',
-                        'ref': partner.ref if partner else '',
-                        'debit': 0.0,
-                        'credit': 0.0,
-                        'balance': 0.0,
-                        'initial_balance': 0.0,
-                        'has_children': True,
-                        'expanded': False,
-                        'lines': []
-                    }
-                
-                # Add line details
-                line_data = {
-                    'id': f'line_{line.id}',
-                    'date': line.date.strftime('%d/%m/%Y'),
-                    'move_name': line.move_id.name,
-                    'ref': line.ref or line.move_id.ref or '',
-                    'account_code': line.account_id.code,
-                    'account_name': line.account_id.name,
-                    'debit': line.debit,
-                    'credit': line.credit,
-                    'balance': line.debit - line.credit,
-                    'cumulative_balance': 0.0,  # Will be calculated later
-                    'currency': line.currency_id.name if line.currency_id else '',
-                    'amount_currency': line.amount_currency if line.currency_id else 0.0
-                }
-                
-                partners_dict[partner_key]['lines'].append(line_data)
-                partners_dict[partner_key]['debit'] += line.debit
-                partners_dict[partner_key]['credit'] += line.credit
-                partners_dict[partner_key]['balance'] += (line.debit - line.credit)
-            
-            # Calculate cumulative balances for each partner's lines
-            for partner_data in partners_dict.values():
-                cumulative = partner_data['initial_balance']
-                for line in partner_data['lines']:
-                    cumulative += line['balance']
-                    line['cumulative_balance'] = cumulative
+            AccountMoveLine = self.env['account.move.line']
+            currency_totals = AccountMoveLine._get_amount_currency_totals(domain, 'partner_id')
+            for partner_id, partner_data in partners_dict.items():
+                partner_data['currency_totals'] = currency_totals.get(partner_id, [])
             
             # Convert to list and sort by partner name
             partners_list = list(partners_dict.values())
@@ -125,20 +82,27 @@ class AccountPartnerLedger(models.TransientModel):
             else:
                 date_to_str = ''
             
-            return {
+            result = {
                 'partners': partners_list,
                 'totals': {
                     'debit': total_debit,
                     'credit': total_credit,
                     'balance': total_balance
                 },
+                'currency_totals': AccountMoveLine._merge_amount_currency_totals(currency_totals),
+                'company_currency': self.env['res.company'].browse(company_id).currency_id.name,
                 'company_name': self.env.company.name,
-                'currency_symbol': 'MT',
+                'currency_symbol': self.env['res.currency'].browse(currency_id).name if rates else 'MT',
                 'date_from': date_from_str,
                 'date_to': date_to_str,
                 'account_type': account_type,
-                'unposted_warning': not posted_entries
+                'unposted_warning': not posted_entries,
+                'search': search or ''
             }
+            if format == 'columnar':
+                return columnar.encode_report(result, 'partners', 'lines',
+                                              ('date', 'account_code', 'account_name', 'currency', 'move_name'))
+            return result
             
         except Exception as e:
             _logger.error(f"Error getting partner ledger data: {str(e)}")
@@ -156,4 +120,163 @@ class AccountPartnerLedger(models.TransientModel):
                 'account_type': 'all',
                 'unposted_warning': False,
                 'error': str(e)
-            }
\ No newline at end of file
+            }
+
+    @api.model
+    def get_partner_ledger_lines(self, partner_id, offset=0, limit=200, date_from=None, date_to=None,
+                                 account_type='all', posted_entries=True, company_id=None,
+                                 search=None, amount_min=None, amount_max=None, currency_id=None):
+        """One page of a partner's lines (partner_id 0 = no partner), with the cumulative balance"""
+        try:
+            if not company_id:
+                company_id = self.env.company.id
+            date_to = fields.Date.to_date(date_to) if date_to else fields.Date.today()
+            date_from = fields.Date.to_date(date_from) if date_from else date(date_to.year, 1, 1)
+
+            domain = self._get_lines_domain(company_id, date_from, date_to, None, account_type,
+                                            posted_entries, search, amount_min, amount_max)
+            domain.append(('partner_id', '=', partner_id or False))
+
+            rates = self.env['account.report.aggregate']._get_rate_table(company_id, currency_id, date_to)
+            AccountMoveLine = self.env['account.move.line']
+            cumulative = AccountMoveLine._get_balance_before(domain, offset, rates=rates)
+            lines = []
+            for line in AccountMoveLine.search(domain, order='date, id', offset=offset, limit=limit):
+                line_data = self._line_data(line, rates.factor(line.date) if rates else 1.0)
+                cumulative += line_data['balance']
+                line_data['cumulative_balance'] = cumulative
+                lines.append(line_data)
+
+            return {
+                'partner_id': partner_id,
+                'offset': offset,
+                'lines': lines,
+            }
+
+        except Exception as e:
+            _logger.error(f"Error getting partner ledger lines: {str(e)}")
+            return {
+                'partner_id': partner_id,
+                'offset': offset,
+                'lines': [],
+                'error': str(e)
+            }
+
+    @api.model
+    def _get_lines_domain(self, company_id, date_from, date_to, partner_ids=None, account_type='all',
+                          posted_entries=True, search=None, amount_min=None, amount_max=None):
+        """Domain of the receivable/payable journal items shown in the report period"""
+        domain = [
+            ('company_id', '=', company_id),
+            ('date', '>=', date_from),
+            ('date', '<=', date_to),
+            ('parent_state', '=', 'posted') if posted_entries else ('parent_state', '!=', 'cancel')
+        ]
+        
+        # Filter by account type (receivable/payable)
+        if account_type == 'receivable':
+            domain.append(('account_id.account_type', '=', 'asset_receivable'))
+        elif account_type == 'payable':
+            domain.append(('account_id.account_type', '=', 'liability_payable'))
+        else:
+            domain.append(('account_id.account_type', 'in', ['asset_receivable', 'liability_payable']))
+        
+        if partner_ids:
+            domain.append(('partner_id', 'in', partner_ids))
+        
+        domain += self.env['account.move.line']._get_ledger_search_domain(search, amount_min, amount_max)
+        return domain
+
+    @api.model
+    def _partner_data(self, partner):
+        partner_key = partner.id if partner else 0
+        return {
+            'id': f'partner_{partner_key}',
+            'partner_id': partner_key,
+            'name': partner.name if partner else 'Unknown Partner',
+            'ref': partner.ref if partner else '',
+            'debit': 0.0,
+            'credit': 0.0,
+            'balance': 0.0,
+            'initial_balance': 0.0,
+            'line_count': 0,
+            'has_children': True,
+            'expanded': False,
+            'lines': []
+        }
+
+    @api.model
+    def _line_data(self, line, factor=1.0):
+        return {
+            'id': f'line_{line.id}',
+            'date': line.date.strftime('%d/%m/%Y'),
+            'move_name': line.move_id.name,
+            'ref': line.ref or line.move_id.ref or '',
+            'account_code': line.account_id.code,
+            'account_name': line.account_id.name,
+            'debit': line.debit * factor,
+            'credit': line.credit * factor,
+            'balance': (line.debit - line.credit) * factor,
+            'cumulative_balance': 0.0,  # Will be calculated later
+            'currency': line.currency_id.name if line.currency_id else '',
+            'amount_currency': line.amount_currency if line.currency_id else 0.0
+        }
+
+    @api.model
+    def _get_partners_with_lines(self, domain, rates=None):
+        """Partners with every line of the period and cumulative balances"""
+        move_lines = self.env['account.move.line'].search(domain, order='partner_id, date, id')
+        
+        partners_dict = {}
+        
+        # Group move lines by partner
+        for line in move_lines:
+            partner = line.partner_id
+            partner_key = partner.id if partner else 0
+            if partner_key not in partners_dict:
+                partners_dict[partner_key] = self._partner_data(partner)
+            
+            partner_data = partners_dict[partner_key]
+            line_data = self._line_data(line, rates.factor(line.date) if rates else 1.0)
+            partner_data['lines'].append(line_data)
+            partner_data['line_count'] += 1
+            partner_data['debit'] += line_data['debit']
+            partner_data['credit'] += line_data['credit']
+            partner_data['balance'] += line_data['balance']
+        
+        # Calculate cumulative balances for each partner's lines
+        for partner_data in partners_dict.values():
+            cumulative = partner_data['initial_balance']
+            for line in partner_data['lines']:
+                cumulative += line['balance']
+                line['cumulative_balance'] = cumulative
+        return partners_dict
+
+    @api.model
+    def _get_partners_summary(self, domain, rates=None):
+        """Partner headers and line counts only, without reading the lines"""
+        if rates:
+            # Sum per day, then convert each day at its rate
+            totals = {}
+            for partner, day, debit, credit, count in self.env['account.move.line']._read_group(
+                domain, ['partner_id', 'date:day'], ['debit:sum', 'credit:sum', '__count']
+            ):
+                factor = rates.factor(day)
+                row = totals.setdefault(partner, [0.0, 0.0, 0])
+                row[0] += debit * factor
+                row[1] += credit * factor
+                row[2] += count
+            groups = [(partner, *row) for partner, row in totals.items()]
+        else:
+            groups = self.env['account.move.line']._read_group(
+                domain, ['partner_id'], ['debit:sum', 'credit:sum', '__count'])
+        
+        partners_dict = {}
+        for partner, debit, credit, count in groups:
+            partner_data = self._partner_data(partner)
+            partner_data['debit'] = debit
+            partner_data['credit'] = credit
+            partner_data['balance'] = debit - credit
+            partner_data['line_count'] = count
+            partners_dict[partner_data['partner_id']] = partner_data
+        return partners_dict
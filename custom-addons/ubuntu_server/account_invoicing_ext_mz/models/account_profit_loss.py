@@ -13,9 +13,20 @@ class AccountProfitLoss(models.TransientModel):
                             only_posted=True, include_draft=False, hide_zero=False,
                             comparison=False, comparison_date_from=None, comparison_date_to=None,
                             comparison_mode='none', analytic_accounts=None, analytic_plans=None,
-                            include_simulations=False, **kwargs):
+                            include_simulations=False, aggregate=None, lazy=False,
+                            company_ids=None, currency_id=None, analytic_breakdown=False, **kwargs):
         """
         Generate Profit and Loss data with hierarchical structure
+
+        ``aggregate`` may carry a per-account aggregate already computed for
+        the same filters (see account.report.aggregate), e.g. by the batch route.
+        With ``lazy`` only section lines are returned; account lines are
+        fetched through /account/reports/unfold with the returned ``unfold_key``.
+        With ``company_ids`` the selected companies are consolidated in
+        ``currency_id``, after intercompany eliminations.
+        With ``analytic_accounts`` amounts are weighted by their analytic
+        distribution; ``analytic_breakdown`` adds one column per analytic
+        account (``analytic_columns``, ``analytic_balances`` on each line).
         """
         if not date_to:
             date_to = fields.Date.today()
@@ -27,28 +38,144 @@ class AccountProfitLoss(models.TransientModel):
             date_from = fields.Date.from_string(date_from)
         if not company_id:
             company_id = self.env.company.id
+        self.env['account.report.aggregate']._check_company_access([company_id])
+        # Before computing: the stored children must not be newer than their key
+        ledger_version = self.env['account.move.line'].get_ledger_version() if lazy else None
             
-        domain = [
+        # Per-account period movements, from one grouped ledger query
+        aggregate_model = self.env['account.report.aggregate']
+        analytic_aggregates = None
+        if aggregate is None and analytic_breakdown and analytic_accounts and not company_ids:
+            aggregate, analytic_aggregates = aggregate_model._get_analytic_aggregate(
+                company_id,
+                analytic_accounts,
+                date_from=date_from,
+                date_to=date_to,
+                states=aggregate_model._states_for(only_posted, include_draft),
+                journal_ids=journals,
+            )
+        elif aggregate is None:
+            aggregate = aggregate_model._get_report_aggregate(
+                company_id,
+                report='profit_loss',
+                company_ids=company_ids,
+                currency_id=currency_id,
+                date_from=date_from,
+                date_to=date_to,
+                states=aggregate_model._states_for(only_posted, include_draft),
+                journal_ids=journals,
+                analytic_account_ids=analytic_accounts,
+            )
+        
+        # Build hierarchical structure
+        profit_loss = {
+            'date_from': date_from.strftime('%d/%m/%Y'),
+            'date_to': date_to.strftime('%d/%m/%Y'),
+            'date_range': f"{date_from.year} - {date_to.year}" if date_from.year != date_to.year else str(date_to.year),
+            'company': self.env.company.name,
+            'currency': self.env.company.currency_id.symbol,
+            'lines': []
+        }
+        if company_ids:
+            profit_loss['company'], currency = self.env['account.report.aggregate']._get_consolidation_header(
+                company_ids, currency_id)
+            profit_loss['currency'] = currency.symbol
+            profit_loss['consolidated'] = True
+            profit_loss['eliminated'] = sum(
+                row.get('eliminated', 0.0) for row in aggregate.values()
+                if row['account_type'] in ('income', 'income_other', 'expense', 'expense_depreciation', 'expense_direct_cost')
+            )
+
+        lines, totals = self._get_profit_loss_lines(aggregate)
+        
+        profit_loss['lines'] = lines
+        
+        # Check if there are unposted entries
+        unposted_moves = self.env['account.move'].search_count([
+            ('state', '=', 'draft'),
             ('date', '>=', date_from),
             ('date', '<=', date_to),
-            ('company_id', '=', company_id),
-        ]
-        
-        # Filter by posted state
-        if only_posted and not include_draft:
-            domain.append(('parent_state', '=', 'posted'))
-        elif not only_posted or include_draft:
-            domain.append(('parent_state', 'in', ['posted', 'draft']))
+            ('company_id', 'in', company_ids or [company_id])
+        ])
         
-        if journals:
-            domain.append(('journal_id', 'in', journals))
+        profit_loss['has_unposted'] = unposted_moves > 0
+        profit_loss.update(totals)
         
-        # Apply analytic filtering if provided
-        if analytic_accounts:
-            domain.append(('analytic_account_id', 'in', analytic_accounts))
+        # Add comparison data if requested
+        if comparison and comparison_date_from and comparison_date_to:
+            comparison_from = fields.Date.from_string(comparison_date_from) if isinstance(comparison_date_from, str) else comparison_date_from
+            comparison_to = fields.Date.from_string(comparison_date_to) if isinstance(comparison_date_to, str) else comparison_date_to
+            
+            comparison_data = self.get_profit_loss_data(
+                date_from=comparison_from,
+                date_to=comparison_to,
+                journals=journals,
+                company_id=company_id,
+                only_posted=only_posted,
+                include_draft=include_draft,
+                hide_zero=hide_zero,
+                company_ids=company_ids,
+                currency_id=currency_id,
+                comparison=False  # Avoid recursive comparison
+            )
             
-        move_lines = self.env['account.move.line'].search(domain)
+            profit_loss['comparison'] = {
+                'date_from': comparison_from.strftime('%d/%m/%Y'),
+                'date_to': comparison_to.strftime('%d/%m/%Y'),
+                'date_range': f"{comparison_from.year} - {comparison_to.year}" if comparison_from.year != comparison_to.year else str(comparison_to.year),
+                'lines': comparison_data.get('lines', [])
+            }
+            
+            # Map comparison balances to main lines
+            def map_comparison_balances(main_lines, comp_lines):
+                comp_dict = {line['id']: line['balance'] for line in comp_lines}
+                for main_line in main_lines:
+                    main_line['comparison_balance'] = comp_dict.get(main_line['id'], 0.0)
+                    if main_line.get('children'):
+                        comp_children = next((cl['children'] for cl in comp_lines if cl['id'] == main_line['id']), [])
+                        if comp_children:
+                            map_comparison_balances(main_line['children'], comp_children)
+            
+            if profit_loss.get('comparison'):
+                map_comparison_balances(lines, profit_loss['comparison']['lines'])
+        
+        if analytic_aggregates is not None:
+            # Same lines from each per-analytic aggregate of the single analytic query
+            lines_by_analytic = {
+                analytic_id: self._get_profit_loss_lines(analytic_aggregate)[0]
+                for analytic_id, analytic_aggregate in analytic_aggregates.items()
+            }
+            profit_loss['analytic_columns'] = aggregate_model._add_analytic_balances(lines, lines_by_analytic)
+
+        if lazy:
+            params = {
+                'date_from': date_from,
+                'date_to': date_to,
+                'journals': journals,
+                'only_posted': only_posted,
+                'include_draft': include_draft,
+                'analytic_accounts': analytic_accounts,
+                'analytic_breakdown': analytic_breakdown,
+                'comparison_date_from': comparison_date_from if comparison else None,
+                'comparison_date_to': comparison_date_to if comparison else None,
+                'company_ids': company_ids,
+                'currency_id': currency_id,
+            }
+            profit_loss['unfold_key'] = aggregate_model._defer_account_lines(
+                'profit_loss', params, company_id, lines, ledger_version)
+            if profit_loss.get('comparison'):
+                aggregate_model._strip_account_lines(profit_loss['comparison']['lines'])
         
+        return profit_loss
+    
+    @api.model
+    def _get_profit_loss_lines(self, aggregate):
+        """
+        Report lines (sections, subtotals and accounts) of a per-account aggregate
+
+        Returns ``(lines, totals)``, totals holding ``net_profit``,
+        ``total_income`` and ``total_expenses``.
+        """
         # Group accounts by type with details
         account_balances = {}
         accounts_detail = {
@@ -59,22 +186,18 @@ class AccountProfitLoss(models.TransientModel):
             'expense_direct_cost': [],
         }
         
-        for line in move_lines:
-            account = line.account_id
-            key = account.id
-            if key not in account_balances:
-                account_balances[key] = {
-                    'account': account,
-                    'balance': 0.0,
-                    'name': account.name,
-                    'code': account.code,
-                    'account_type': account.account_type
-                }
+        for key, row in aggregate.items():
+            account_balances[key] = {
+                'balance': 0.0,
+                'name': row['name'],
+                'code': row['code'],
+                'account_type': row['account_type']
+            }
             # For P&L, we need credit - debit for income, debit - credit for expenses
-            if account.account_type in ['income', 'income_other']:
-                account_balances[key]['balance'] -= line.balance  # Negative balance becomes positive
+            if row['account_type'] in ['income', 'income_other']:
+                account_balances[key]['balance'] -= row['balance']  # Negative balance becomes positive
             else:
-                account_balances[key]['balance'] += line.balance
+                account_balances[key]['balance'] += row['balance']
         
         # Organize accounts by type for detail view
         for acc_id, acc_data in account_balances.items():
@@ -127,17 +250,6 @@ class AccountProfitLoss(models.TransientModel):
         # Get stock values (opening and closing)
         opening_stock = 0.0
         closing_stock = 0.0
-        
-        # Build hierarchical structure
-        profit_loss = {
-            'date_from': date_from.strftime('%d/%m/%Y'),
-            'date_to': date_to.strftime('%d/%m/%Y'),
-            'date_range': f"{date_from.year} - {date_to.year}" if date_from.year != date_to.year else str(date_to.year),
-            'company': self.env.company.name,
-            'currency': self.env.company.currency_id.symbol,
-            'lines': []
-        }
-        
         # Build report lines with expandable sub-categories
         lines = [
             {
@@ -241,59 +353,11 @@ class AccountProfitLoss(models.TransientModel):
                 ]
             }
         ]
-        
-        profit_loss['lines'] = lines
-        
-        # Check if there are unposted entries
-        unposted_moves = self.env['account.move'].search_count([
-            ('state', '=', 'draft'),
-            ('date', '>=', date_from),
-            ('date', '<=', date_to),
-            ('company_id', '=', company_id)
-        ])
-        
-        profit_loss['has_unposted'] = unposted_moves > 0
-        profit_loss['net_profit'] = net_profit
-        profit_loss['total_income'] = total_income
-        profit_loss['total_expenses'] = total_expenses
-        
-        # Add comparison data if requested
-        if comparison and comparison_date_from and comparison_date_to:
-            comparison_from = fields.Date.from_string(comparison_date_from) if isinstance(comparison_date_from, str) else comparison_date_from
-            comparison_to = fields.Date.from_string(comparison_date_to) if isinstance(comparison_date_to, str) else comparison_date_to
-            
-            comparison_data = self.get_profit_loss_data(
-                date_from=comparison_from,
-                date_to=comparison_to,
-                journals=journals,
-                company_id=company_id,
-                only_posted=only_posted,
-                include_draft=include_draft,
-                hide_zero=hide_zero,
-                comparison=False  # Avoid recursive comparison
-            )
-            
-            profit_loss['comparison'] = {
-                'date_from': comparison_from.strftime('%d/%m/%Y'),
-                'date_to': comparison_to.strftime('%d/%m/%Y'),
-                'date_range': f"{comparison_from.year} - {comparison_to.year}" if comparison_from.year != comparison_to.year else str(comparison_to.year),
-                'lines': comparison_data.get('lines', [])
-            }
-            
-            # Map comparison balances to main lines
-            def map_comparison_balances(main_lines, comp_lines):
-                comp_dict = {line['id']: line['balance'] for line in comp_lines}
-                for main_line in main_lines:
-                    main_line['comparison_balance'] = comp_dict.get(main_line['id'], 0.0)
-                    if main_line.get('children'):
-                        comp_children = next((cl['children'] for cl in comp_lines if cl['id'] == main_line['id']), [])
-                        if comp_children:
-                            map_comparison_balances(main_line['children'], comp_children)
-            
-            if profit_loss.get('comparison'):
-                map_comparison_balances(lines, profit_loss['comparison']['lines'])
-        
-        return profit_loss
+        return lines, {
+            'net_profit': net_profit,
+            'total_income': total_income,
+            'total_expenses': total_expenses,
+        }
     
     @api.model
     def export_to_excel(self, data):
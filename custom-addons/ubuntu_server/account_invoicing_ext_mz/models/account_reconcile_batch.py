@@ -0,0 +1,285 @@
+from odoo import models, fields, api, Command, _
+from odoo.exceptions import UserError, ValidationError
+from datetime import timedelta
+import logging
+
+from ..tools import reconcile_matching
+
+_logger = logging.getLogger(__name__)
+
+# Proposals applied (and committed) together by the background job
+RECONCILE_APPLY_BATCH = 500
+# A batch still running after this long was interrupted (its worker died)
+RECONCILE_BATCH_TIMEOUT = timedelta(hours=1)
+
+# Unreconciled statement lines of company-currency journals, oldest first
+STATEMENT_LINES_QUERY = """
+    SELECT st.id, st.partner_id, m.currency_id, st.payment_ref, m.ref,
+           ROUND(st.amount * power(10, cur.decimal_places))::bigint AS amount
+      FROM account_bank_statement_line st
+      JOIN account_move m ON m.id = st.move_id
+      JOIN account_journal j ON j.id = m.journal_id
+      JOIN res_company co ON co.id = m.company_id
+      JOIN res_currency cur ON cur.id = co.currency_id
+     WHERE m.company_id = %(company_id)s
+       AND m.state = 'posted'
+       AND NOT st.is_reconciled
+       AND st.foreign_currency_id IS NULL
+       AND (j.currency_id IS NULL OR j.currency_id = co.currency_id)
+       AND NOT EXISTS (SELECT 1 FROM account_reconcile_batch_line p
+                        WHERE p.statement_line_id = st.id AND p.state = 'proposed')
+       {where}
+     ORDER BY m.date, st.id
+"""
+
+# Open receivable/payable items in company currency, by maturity
+OPEN_ITEMS_QUERY = """
+    SELECT aml.id, aml.partner_id, aml.currency_id, aml.move_name, m.payment_reference,
+           ROUND(aml.amount_residual * power(10, cur.decimal_places))::bigint AS amount
+      FROM account_move_line aml
+      JOIN account_move m ON m.id = aml.move_id
+      JOIN account_account a ON a.id = aml.account_id
+      JOIN res_company co ON co.id = aml.company_id
+      JOIN res_currency cur ON cur.id = co.currency_id
+     WHERE aml.company_id = %(company_id)s
+       AND aml.parent_state = 'posted'
+       AND NOT aml.reconciled
+       AND aml.amount_residual != 0
+       AND aml.currency_id = co.currency_id
+       AND a.account_type IN ('asset_receivable', 'liability_payable')
+       AND m.statement_line_id IS NULL
+     ORDER BY COALESCE(aml.date_maturity, aml.date), aml.id
+"""
+
+
+class AccountReconcileBatch(models.Model):
+    _name = 'account.reconcile.batch'
+    _description = 'Batch Bank Reconciliation'
+    _order = 'id desc'
+
+    name = fields.Char(required=True, default=lambda self: _('Reconciliation %s', fields.Date.context_today(self)))
+    company_id = fields.Many2one('res.company', required=True, default=lambda self: self.env.company)
+    journal_ids = fields.Many2many('account.journal', string='Journals', domain=[('type', 'in', ('bank', 'cash'))],
+                                   help="Leave empty to match the lines of every bank and cash journal.")
+    statement_line_ids = fields.Many2many('account.bank.statement.line', string='Statement Lines',
+                                          help="Only match these lines; all unreconciled lines when empty.")
+    date_from = fields.Date()
+    date_to = fields.Date()
+    max_subset_size = fields.Integer(default=4,
+                                     help="Most open items one statement line may be matched with by amount sums.")
+    auto_apply = fields.Boolean(help="Reconcile the proposals right after matching.")
+    run_mode = fields.Selection([('match', 'Match'), ('apply', 'Apply')], default='match', readonly=True)
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], default='draft', readonly=True, copy=False)
+    error = fields.Text(readonly=True, copy=False)
+    line_count = fields.Integer(string='Lines Examined', readonly=True, copy=False)
+    progress = fields.Integer(string='Proposals Processed', readonly=True, copy=False,
+                              help="Proposals applied so far by the current run; also keeps its write date recent")
+    proposal_ids = fields.One2many('account.reconcile.batch.line', 'batch_id', string='Proposals', readonly=True)
+    proposed_count = fields.Integer(compute='_compute_counts')
+    applied_count = fields.Integer(compute='_compute_counts')
+    failed_count = fields.Integer(compute='_compute_counts')
+
+    @api.depends('proposal_ids.state')
+    def _compute_counts(self):
+        for batch in self:
+            states = batch.proposal_ids.mapped('state')
+            batch.proposed_count = states.count('proposed')
+            batch.applied_count = states.count('applied')
+            batch.failed_count = states.count('failed')
+
+    def action_run(self):
+        """Match again in the background; earlier proposals not applied are dropped"""
+        self.proposal_ids.filtered(lambda p: p.state == 'proposed').unlink()
+        self._queue('match')
+
+    def action_apply(self):
+        """Reconcile the current proposals in the background"""
+        self._queue('apply')
+
+    def _queue(self, run_mode):
+        self._fail_interrupted_batches()
+        if self.filtered(lambda batch: batch.state in ('queued', 'running')):
+            raise UserError(_('This reconciliation is already running.'))
+        self.write({'state': 'queued', 'run_mode': run_mode, 'error': False, 'progress': 0})
+        self.env.ref('account_invoicing_ext_mz.ir_cron_reconcile_batch')._trigger()
+
+    @api.model
+    def _action_from_statement_lines(self, statement_lines):
+        """Server action: match the selected statement lines in a new batch"""
+        batch = self.create({
+            'company_id': statement_lines.company_id[:1].id or self.env.company.id,
+            'statement_line_ids': [Command.set(statement_lines.ids)],
+        })
+        batch.action_run()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': batch.id,
+            'view_mode': 'form',
+        }
+
+    @api.model
+    def _fail_interrupted_batches(self):
+        """
+        Fail the batches not written for RECONCILE_BATCH_TIMEOUT while running,
+        so they can be queued again; a live run writes its ``progress`` after
+        each chunk of proposals it commits
+        """
+        interrupted = self.search([
+            ('state', '=', 'running'),
+            ('write_date', '<', fields.Datetime.now() - RECONCILE_BATCH_TIMEOUT),
+        ])
+        if interrupted:
+            interrupted.write({'state': 'failed', 'error': _('The run was interrupted before it finished.')})
+            _logger.warning(f"Reconciliations interrupted while running: {', '.join(interrupted.mapped('name'))}")
+
+    @api.model
+    def _cron_run_batches(self):
+        """Background job: run the queued batches, committing as it goes"""
+        self._fail_interrupted_batches()
+        self.env.cr.commit()
+        for batch in self.search([('state', '=', 'queued')], order='id'):
+            batch.state = 'running'
+            self.env.cr.commit()
+            try:
+                batch.with_company(batch.company_id)._run()
+                batch.state = 'done'
+                self.env.cr.commit()
+            except Exception as e:
+                self.env.cr.rollback()
+                batch.write({'state': 'failed', 'error': str(e)})
+                self.env.cr.commit()
+                _logger.error(f"Error running the reconciliation {batch.name}: {str(e)}")
+
+    def _run(self):
+        self.ensure_one()
+        if self.run_mode == 'match':
+            self._match()
+            self.env.cr.commit()
+        if self.run_mode == 'apply' or self.auto_apply:
+            proposals = self.proposal_ids.filtered(lambda p: p.state == 'proposed')
+            for start in range(0, len(proposals), RECONCILE_APPLY_BATCH):
+                chunk = proposals[start:start + RECONCILE_APPLY_BATCH]
+                chunk._apply()
+                self.progress += len(chunk)
+                self.env.cr.commit()
+
+    def _match(self):
+        """Propose matches for the statement lines of the batch, in bulk"""
+        self.ensure_one()
+        where = []
+        params = {'company_id': self.company_id.id}
+        if self.journal_ids:
+            where.append('AND m.journal_id IN %(journal_ids)s')
+            params['journal_ids'] = tuple(self.journal_ids.ids)
+        if self.statement_line_ids:
+            where.append('AND st.id IN %(statement_line_ids)s')
+            params['statement_line_ids'] = tuple(self.statement_line_ids.ids)
+        if self.date_from:
+            where.append('AND m.date >= %(date_from)s')
+            params['date_from'] = self.date_from
+        if self.date_to:
+            where.append('AND m.date <= %(date_to)s')
+            params['date_to'] = self.date_to
+
+        self.env['account.move.line'].flush_model()
+        self.env['account.bank.statement.line'].flush_model()
+        self.env.cr.execute(STATEMENT_LINES_QUERY.format(where=' '.join(where)), params)
+        lines = self.env.cr.dictfetchall()
+        self.env.cr.execute(OPEN_ITEMS_QUERY, {'company_id': self.company_id.id})
+        items = [
+            dict(item, references=reconcile_matching.document_references(
+                item.pop('move_name'), item.pop('payment_reference')))
+            for item in self.env.cr.dictfetchall()
+        ]
+        matcher = reconcile_matching.ReconcileMatcher(items)
+
+        vals_list = []
+        for line in lines:
+            line['tokens'] = reconcile_matching.reference_tokens(line['payment_ref'], line['ref'])
+            match = matcher.match(line, self.max_subset_size)
+            if match:
+                item_ids, rule = match
+                vals_list.append({
+                    'batch_id': self.id,
+                    'statement_line_id': line['id'],
+                    'move_line_ids': [Command.set(item_ids)],
+                    'rule': rule,
+                })
+        self.env['account.reconcile.batch.line'].create(vals_list)
+        self.line_count = len(lines)
+        _logger.info(f"Reconciliation {self.name}: {len(vals_list)} of {len(lines)} statement lines matched")
+
+
+class AccountReconcileBatchLine(models.Model):
+    _name = 'account.reconcile.batch.line'
+    _description = 'Batch Bank Reconciliation Proposal'
+    _order = 'batch_id, id'
+
+    batch_id = fields.Many2one('account.reconcile.batch', required=True, ondelete='cascade', index=True)
+    statement_line_id = fields.Many2one('account.bank.statement.line', required=True, ondelete='cascade', index=True)
+    move_line_ids = fields.Many2many('account.move.line', string='Open Items')
+    rule = fields.Selection([
+        ('reference', 'Reference'),
+        ('amount', 'Partner and Amount'),
+        ('subset', 'Sum of Items'),
+    ], required=True)
+    date = fields.Date(related='statement_line_id.date')
+    partner_id = fields.Many2one(related='statement_line_id.partner_id')
+    payment_ref = fields.Char(related='statement_line_id.payment_ref')
+    amount = fields.Monetary(related='statement_line_id.amount')
+    currency_id = fields.Many2one(related='statement_line_id.currency_id')
+    state = fields.Selection([
+        ('proposed', 'Proposed'),
+        ('applied', 'Applied'),
+        ('failed', 'Failed'),
+    ], default='proposed', required=True)
+    note = fields.Char()
+
+    def _apply(self):
+        """Reconcile the proposals; those that no longer fit are marked failed"""
+        for proposal in self.filtered(lambda p: p.state == 'proposed'):
+            try:
+                with self.env.cr.savepoint():
+                    proposal._apply_one()
+                proposal.state = 'applied'
+            except (UserError, ValidationError) as e:
+                proposal.write({'state': 'failed', 'note': str(e)})
+
+    def _apply_one(self):
+        """Replace the suspense line of the statement entry by one counterpart per item, and reconcile"""
+        st_line = self.statement_line_id
+        items = self.move_line_ids
+        if st_line.is_reconciled or any(items.mapped('reconciled')):
+            raise UserError(_('The statement line or one of the items is already reconciled.'))
+        if st_line.currency_id.compare_amounts(sum(items.mapped('amount_residual')), st_line.amount):
+            raise UserError(_('The open amounts changed since the proposal.'))
+
+        _liquidity_lines, suspense_lines, _other_lines = st_line._seek_for_lines()
+        existing_lines = st_line.move_id.line_ids
+        st_line.move_id.with_context(
+            skip_readonly_check=True,
+            force_delete=True,
+            skip_account_move_synchronization=True,
+        ).write({
+            'line_ids': [Command.delete(line.id) for line in suspense_lines] + [
+                Command.create({
+                    'name': item.move_name or item.name,
+                    'account_id': item.account_id.id,
+                    'partner_id': item.partner_id.id,
+                    'currency_id': item.currency_id.id,
+                    'amount_currency': -item.amount_residual_currency,
+                    'balance': -item.amount_residual,
+                })
+                for item in items
+            ],
+        })
+        counterparts = (st_line.move_id.line_ids - existing_lines).sorted('id')
+        for counterpart, item in zip(counterparts, items):
+            (counterpart | item).reconcile()
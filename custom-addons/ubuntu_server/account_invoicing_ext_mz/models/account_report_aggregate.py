@@ -0,0 +1,745 @@
+from odoo import models, fields, api, tools, sql_db, _
+from odoo.exceptions import AccessError
+from odoo.tools import config
+from odoo.tools.lru import LRU
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from datetime import date, timedelta
+import logging
+
+import psycopg2
+
+from ..tools import rate_table
+from .account_move import LEDGER_VERSION_MARK_TABLE
+from ..tools.account_groups import GroupIndex
+
+_logger = logging.getLogger(__name__)
+
+# Last per-account aggregate of each filter set (this worker only), shifted by
+# the aggregate of the changed date slices when only the window moves
+WINDOW_CACHE = LRU(64)
+
+# Cursors one report may use at once for independent queries
+REPORT_MAX_WORKERS = 4
+
+# {weight} is 1, or ANALYTIC_WEIGHT when filtering on analytic accounts
+ACCOUNT_AGGREGATE_QUERY = """
+    SELECT aml.account_id,
+           SUM(CASE WHEN aml.date < %(date_from)s THEN aml.balance * {weight} ELSE 0 END) AS initial_balance,
+           SUM(CASE WHEN aml.date >= %(date_from)s THEN aml.debit * {weight} ELSE 0 END) AS debit,
+           SUM(CASE WHEN aml.date >= %(date_from)s THEN aml.credit * {weight} ELSE 0 END) AS credit,
+           SUM(CASE WHEN aml.date >= %(date_from)s THEN aml.balance * {weight} ELSE 0 END) AS balance
+      FROM account_move_line aml
+     WHERE {where}
+  GROUP BY aml.account_id
+"""
+
+# Journal items distributed on any of %(analytic_keys)s. Same expression as the
+# GIN index of the analytic mixin (see account.move.line.init), so it can use it.
+# Multi-plan distributions key their percentages by comma-joined account ids.
+ANALYTIC_FILTER = r"""%(analytic_keys)s::text[] && regexp_split_to_array(
+    jsonb_path_query_array(aml.analytic_distribution, '$.keyvalue()."key"')::text, '\D+')"""
+
+# Share of a journal item distributed on the selected analytic accounts. Each
+# distribution key counts once, so accounts of several plans are not summed twice,
+# and the share is capped at the whole item: each plan distributes 100% of it,
+# so a selection spanning plans would otherwise count it once per plan.
+ANALYTIC_WEIGHT = """LEAST((SELECT COALESCE(SUM(d.percentage::numeric), 0) / 100
+      FROM jsonb_each_text(aml.analytic_distribution) AS d(key, percentage)
+     WHERE string_to_array(d.key, ',')::int[] && %(analytic_ids)s::int[]), 1)"""
+
+# Per account and selected analytic account, weighted by the distribution
+# percentages; the rows with a NULL analytic_id hold the total over the
+# selection (weighted as ANALYTIC_WEIGHT, once per journal item)
+ANALYTIC_AGGREGATE_QUERY = """
+    SELECT aml.account_id, a.analytic_id,
+           SUM(CASE WHEN aml.date < %(date_from)s THEN aml.balance * a.share ELSE 0 END) AS initial_balance,
+           SUM(CASE WHEN aml.date >= %(date_from)s THEN aml.debit * a.share ELSE 0 END) AS debit,
+           SUM(CASE WHEN aml.date >= %(date_from)s THEN aml.credit * a.share ELSE 0 END) AS credit,
+           SUM(CASE WHEN aml.date >= %(date_from)s THEN aml.balance * a.share ELSE 0 END) AS balance
+      FROM account_move_line aml
+CROSS JOIN LATERAL (
+               SELECT NULL::int AS analytic_id, {weight} AS share
+                UNION ALL
+               SELECT analytic_id, e.percentage::numeric / 100
+                 FROM jsonb_each_text(aml.analytic_distribution) AS e(key, percentage)
+           CROSS JOIN unnest(string_to_array(e.key, ',')::int[]) AS analytic_id
+                WHERE analytic_id = ANY(%(analytic_ids)s::int[])
+           ) a
+     WHERE {where}
+  GROUP BY aml.account_id, a.analytic_id
+"""
+
+# Several companies at once: amounts are converted with the factor of the
+# rate segment (see tools/rate_table.py) their date falls in, and rows are
+# split on whether an elimination rule matches
+CONSOLIDATED_AGGREGATE_QUERY = """
+    WITH rates AS (
+        SELECT *
+          FROM unnest(%(rate_company_ids)s::int[], %(rate_starts)s::date[],
+                      %(rate_stops)s::date[], %(rate_factors)s::numeric[])
+            AS r(company_id, date_start, date_stop, factor)
+    ),
+    eliminated_partners AS (
+        SELECT *
+          FROM unnest(%(elimination_company_ids)s::int[], %(elimination_partner_ids)s::int[])
+            AS e(company_id, partner_id)
+    )
+    SELECT aml.account_id,
+           (aml.account_id = ANY(%(elimination_account_ids)s::int[])
+            OR EXISTS(SELECT 1 FROM eliminated_partners e
+                       WHERE e.company_id = aml.company_id AND e.partner_id = aml.partner_id)) AS eliminated,
+           SUM(CASE WHEN aml.date < %(date_from)s THEN aml.balance * r.factor * {weight} ELSE 0 END) AS initial_balance,
+           SUM(CASE WHEN aml.date >= %(date_from)s THEN aml.debit * r.factor * {weight} ELSE 0 END) AS debit,
+           SUM(CASE WHEN aml.date >= %(date_from)s THEN aml.credit * r.factor * {weight} ELSE 0 END) AS credit,
+           SUM(CASE WHEN aml.date >= %(date_from)s THEN aml.balance * r.factor * {weight} ELSE 0 END) AS balance
+      FROM account_move_line aml
+      JOIN rates r ON r.company_id = aml.company_id
+                  AND aml.date >= r.date_start AND aml.date < r.date_stop
+     WHERE {where}
+  GROUP BY aml.account_id, eliminated
+"""
+
+
+class AccountReportAggregate(models.AbstractModel):
+    _name = 'account.report.aggregate'
+    _description = 'Per-Account Report Aggregate'
+
+    @api.model
+    def _states_for(self, only_posted=True, include_draft=False):
+        """Move states matching the Posted Entries / Draft Entries filters"""
+        if only_posted and not include_draft:
+            return ('posted',)
+        return ('posted', 'draft')
+
+    @api.model
+    def _get_account_aggregate(self, company_id, date_from=None, date_to=None, states=('posted',),
+                               journal_ids=None, analytic_account_ids=None):
+        """
+        Aggregate the ledger per account in a single pass.
+
+        Returns {account_id: row}; each row holds the opening balance before
+        date_from, the period debit/credit/balance and the end balance at date_to.
+        With ``analytic_account_ids`` amounts are weighted by the share of
+        each journal item distributed on those analytic accounts.
+
+        When the ledger did not change since the same filters were last
+        aggregated for another date window, only the date slices between the
+        two windows are read (see _shift_account_aggregate). Aggregates
+        pre-computed by the report pre-warming are read from
+        account.report.aggregate.store.
+        """
+        self._check_company_access([company_id])
+        if isinstance(date_from, str):
+            date_from = fields.Date.from_string(date_from)
+        if isinstance(date_to, str):
+            date_to = fields.Date.from_string(date_to)
+        filters = self._normalize_filters(states, journal_ids, analytic_account_ids)
+        cache_key = (self.env.cr.dbname, company_id) + tuple(filters.values())
+        # The ledger version only tracks posted journal items, and changes of
+        # this transaction are not reflected by it yet
+        cacheable = (filters['states'] == ('posted',)
+                     and not self.env.cr.postcommit.data.get('ledger_version_bump'))
+        ledger_version = self.env['account.move.line'].get_ledger_version()
+
+        aggregate = None
+        entry = WINDOW_CACHE.get(cache_key) if cacheable else None
+        if entry and entry['ledger_version'] == ledger_version:
+            aggregate = self._shift_account_aggregate(
+                entry, company_id, date_from, date_to, ledger_version=ledger_version, **filters)
+        if aggregate is None and cacheable:
+            aggregate = self.env['account.report.aggregate.store']._get_aggregate(
+                company_id, dict(filters, date_from=date_from, date_to=date_to), ledger_version)
+        if aggregate is None:
+            aggregate = self._query_account_aggregate(
+                company_id, date_from, date_to, ledger_version=ledger_version, **filters)
+        if cacheable:
+            WINDOW_CACHE[cache_key] = {
+                'ledger_version': ledger_version,
+                'date_from': date_from,
+                'date_to': date_to,
+                'aggregate': aggregate,
+            }
+        # The cached rows are shared: callers get their own copy
+        return {account_id: dict(row) for account_id, row in aggregate.items()}
+
+    @api.model
+    def _check_company_access(self, company_ids):
+        """The aggregate queries bypass the record rules: only read the companies of the user"""
+        if not set(company_ids) <= set(self.env.user.company_ids.ids):
+            raise AccessError(_("You can only report on the companies you have access to."))
+
+    @api.model
+    def _normalize_filters(self, states, journal_ids, analytic_account_ids):
+        """Aggregate filters other than the dates, in a canonical (hashable) form"""
+        return {
+            'states': tuple(states),
+            'journal_ids': tuple(sorted(journal_ids)) if journal_ids else None,
+            'analytic_account_ids': tuple(sorted(analytic_account_ids)) if analytic_account_ids else None,
+        }
+
+    @api.model
+    def _prewarm_account_aggregate(self, company_id, date_from, date_to, states, journal_ids, analytic_account_ids):
+        """Compute an aggregate into account.report.aggregate.store for the next readers"""
+        filters = self._normalize_filters(states, journal_ids, analytic_account_ids)
+        ledger_version = self.env['account.move.line'].get_ledger_version()
+        aggregate = self._query_account_aggregate(
+            company_id, date_from, date_to, ledger_version=ledger_version, **filters)
+        self.env['account.report.aggregate.store']._store_aggregate(
+            company_id, dict(filters, date_from=date_from, date_to=date_to), ledger_version, aggregate)
+
+    @api.model
+    def _query_account_aggregate(self, company_id, date_from, date_to, states, journal_ids, analytic_account_ids,
+                                 slice_only=False, ledger_version=None):
+        """
+        Run ACCOUNT_AGGREGATE_QUERY; ``slice_only`` leaves out the lines before ``date_from``
+
+        ``ledger_version`` is the version the caller keys the result on, read
+        before querying (see _report_cursor).
+
+        With a ``date_from`` the opening balances and the period are read by
+        two concurrent queries (see _fetch_report_rows_concurrently).
+        """
+        weight = ANALYTIC_WEIGHT if analytic_account_ids else '1'
+        if tuple(states) != ('posted',):
+            ledger_version = False
+        where, params = self._get_aggregate_filters(
+            company_id, date_from, date_to, states, journal_ids, analytic_account_ids)
+        if slice_only or not date_from or date_from == date.min:
+            if slice_only:
+                where.append('aml.date >= %(date_from)s')
+            return self._aggregate_rows(self._fetch_report_rows(
+                ACCOUNT_AGGREGATE_QUERY.format(where=' AND '.join(where), weight=weight), params,
+                ledger_version=ledger_version))
+
+        # Before date_from everything is opening balance
+        opening_where, opening_params = self._get_aggregate_filters(
+            company_id, date_from, date_from - timedelta(days=1), states, journal_ids, analytic_account_ids)
+        where.append('aml.date >= %(date_from)s')
+        results = self._fetch_report_rows_concurrently({
+            'opening': (ACCOUNT_AGGREGATE_QUERY.format(where=' AND '.join(opening_where), weight=weight),
+                        opening_params),
+            'period': (ACCOUNT_AGGREGATE_QUERY.format(where=' AND '.join(where), weight=weight), params),
+        }, ledger_version=ledger_version)
+        rows = {}
+        for row in results['opening'] + results['period']:
+            merged = rows.setdefault(row['account_id'], dict.fromkeys(row, 0.0))
+            merged['account_id'] = row['account_id']
+            for field in ('initial_balance', 'debit', 'credit', 'balance'):
+                merged[field] += row[field] or 0.0
+        return self._aggregate_rows(list(rows.values()))
+
+    @api.model
+    def _shift_account_aggregate(self, entry, company_id, date_from, date_to, ledger_version=None, **filters):
+        """
+        Aggregate of the new window from the cached one of the same ledger
+
+        Days leaving the start of the window move from the period into the
+        opening balance (and back when the start moves earlier); days added
+        or removed at the end of the window are added to or subtracted from
+        the period. Returns None when a full query is cheaper: windows that
+        do not overlap, or changed slices as long as the window itself.
+        """
+        old_from, new_from = entry['date_from'] or date.min, date_from or date.min
+        old_to, new_to = entry['date_to'], date_to
+        if (old_to is None) != (new_to is None):
+            return None
+        if old_to is not None and (new_from > old_to or old_from > new_to):
+            return None
+
+        one_day = timedelta(days=1)
+        slices = []
+        if new_from != old_from:
+            # sign 1: the slice leaves the period for the opening balance
+            slices.append(('head', min(old_from, new_from), max(old_from, new_from) - one_day,
+                           1 if new_from > old_from else -1))
+        if new_to != old_to:
+            slices.append(('tail', min(old_to, new_to) + one_day, max(old_to, new_to),
+                           1 if new_to > old_to else -1))
+        if not slices:
+            return entry['aggregate']
+        if old_to is not None:
+            window_days = (old_to - old_from).days
+            if sum((stop - start).days + 1 for _side, start, stop, _sign in slices) >= window_days:
+                return None
+
+        aggregate = {account_id: dict(row) for account_id, row in entry['aggregate'].items()}
+        for side, start, stop, sign in slices:
+            for account_id, delta in self._query_account_aggregate(
+                    company_id, start, stop, slice_only=True, ledger_version=ledger_version, **filters).items():
+                row = aggregate.setdefault(account_id, dict(
+                    delta, initial_balance=0.0, debit=0.0, credit=0.0, balance=0.0))
+                opening_sign, period_sign = (sign, -sign) if side == 'head' else (0, sign)
+                row['initial_balance'] += opening_sign * delta['balance']
+                for field in ('debit', 'credit', 'balance'):
+                    row[field] += period_sign * delta[field]
+        for row in aggregate.values():
+            row['end_balance'] = row['initial_balance'] + row['balance']
+        return aggregate
+
+    @api.model
+    def _get_analytic_aggregate(self, company_id, analytic_account_ids, date_from=None, date_to=None,
+                                states=('posted',), journal_ids=None):
+        """
+        Per-account aggregate over the analytic accounts, and one per account
+
+        Returns ``(aggregate, {analytic_account_id: aggregate})`` from a single
+        query; the first is the one _get_account_aggregate returns for the same
+        filters. Amounts are weighted by the distribution percentages.
+        """
+        self._check_company_access([company_id])
+        where, params = self._get_aggregate_filters(
+            company_id, date_from, date_to, states, journal_ids, analytic_account_ids)
+
+        rows_by_analytic = {analytic_id: [] for analytic_id in analytic_account_ids}
+        total_rows = []
+        for row in self._fetch_report_rows(ANALYTIC_AGGREGATE_QUERY.format(
+                where=' AND '.join(where), weight=ANALYTIC_WEIGHT), params):
+            analytic_id = row.pop('analytic_id')
+            if analytic_id is None:
+                total_rows.append(row)
+            else:
+                rows_by_analytic[analytic_id].append(row)
+        return self._aggregate_rows(total_rows), {
+            analytic_id: self._aggregate_rows(rows) for analytic_id, rows in rows_by_analytic.items()
+        }
+
+    @api.model
+    def _fetch_report_rows(self, query, params, ledger_version=None):
+        """Run a read-only aggregate query, on the report replica when possible"""
+        self.env['account.move.line'].flush_model()
+        with self._report_cursor(ledger_version) as cr:
+            if cr is self.env.cr:
+                cr.execute(query, params)
+                return cr.dictfetchall()
+            try:
+                cr.execute(query, params)
+                return cr.dictfetchall()
+            except psycopg2.Error as e:
+                # e.g. a query canceled by the replay of the primary (hot standby conflict)
+                _logger.warning(f"Report replica query failed, using the primary: {str(e)}")
+        self.env.cr.execute(query, params)
+        return self.env.cr.dictfetchall()
+
+    @api.model
+    def _fetch_report_rows_concurrently(self, queries, ledger_version=None):
+        """
+        Run independent read-only queries at the same time
+
+        ``queries`` is ``{name: (query, params)}``; returns ``{name: rows}``.
+        Each query gets its own pooled cursor (at most REPORT_MAX_WORKERS),
+        all reading the snapshot exported by the current transaction, so the
+        results are as consistent as on a single cursor.
+
+        Each report then holds extra connections of the pool, so this is off
+        unless ``account_report_concurrent_queries = True`` is set in the
+        server configuration. Falls back to _fetch_report_rows one query after
+        the other when it is off, when a replica is configured, in tests (a
+        single shared connection), or when the current transaction changed
+        journal items (not visible to other transactions; draft items,
+        ``ledger_version`` False, are not tracked).
+        """
+        self.env['account.move.line'].flush_model()
+        if (len(queries) < 2 or not tools.str2bool(config.get('account_report_concurrent_queries') or '0')
+                or config.get('account_report_replica_dsn') or self.pool.in_test_mode()
+                or ledger_version is False or self.env.cr.postcommit.data.get('ledger_version_bump')):
+            return {
+                name: self._fetch_report_rows(query, params, ledger_version=ledger_version)
+                for name, (query, params) in queries.items()
+            }
+
+        self.env.cr.execute("SELECT pg_export_snapshot()")
+        snapshot = self.env.cr.fetchone()[0]
+        registry = self.pool
+
+        def fetch(query, params):
+            with closing(registry.cursor()) as cr:
+                cr.execute("SET TRANSACTION READ ONLY")
+                cr.execute("SET TRANSACTION SNAPSHOT %s", [snapshot])
+                cr.execute(query, params)
+                return cr.dictfetchall()
+
+        # The exported snapshot stays valid while this transaction is open
+        with ThreadPoolExecutor(max_workers=min(len(queries), REPORT_MAX_WORKERS)) as executor:
+            futures = {name: executor.submit(fetch, query, params) for name, (query, params) in queries.items()}
+            return {name: future.result() for name, future in futures.items()}
+
+    @contextmanager
+    def _report_cursor(self, ledger_version=None):
+        """
+        Cursor for the read-only aggregate queries
+
+        With ``account_report_replica_dsn`` in the server configuration
+        (e.g. ``postgresql://odoo@replica:5432/mydb``, a streaming replica of
+        the database), the replica when it is at ``ledger_version`` (by
+        default the one of the current transaction); otherwise, or when it is
+        unreachable, lagging or already past it, the current cursor, so the
+        rows match the version the caller keys them on. Journal items changed
+        by the current transaction are only visible on the primary, and so
+        are draft items (``ledger_version`` False), which the version does not
+        track.
+        """
+        dsn = config.get('account_report_replica_dsn')
+        if not dsn or ledger_version is False or self.env.cr.postcommit.data.get('ledger_version_bump'):
+            yield self.env.cr
+            return
+
+        if ledger_version is None:
+            ledger_version = self.env['account.move.line'].get_ledger_version()
+        replica_cr = None
+        try:
+            replica_cr = sql_db.db_connect(dsn, allow_uri=True).cursor()
+            replica_cr.execute(f"SELECT version FROM {LEDGER_VERSION_MARK_TABLE}")
+            replica_version = replica_cr.fetchone()[0]
+        except psycopg2.Error as e:
+            _logger.warning(f"Report replica unavailable, using the primary: {str(e)}")
+            replica_version = None
+        try:
+            if replica_version is None:
+                yield self.env.cr
+            elif replica_version != ledger_version:
+                _logger.info(f"Report replica at ledger version {replica_version} != {ledger_version}, using the primary")
+                yield self.env.cr
+            else:
+                yield replica_cr
+        finally:
+            if replica_cr is not None:
+                replica_cr.close()
+
+    @api.model
+    def _get_aggregate_filters(self, company_id, date_from, date_to, states, journal_ids, analytic_account_ids):
+        """WHERE clauses and parameters shared by the single-company aggregate queries"""
+        if isinstance(date_from, str):
+            date_from = fields.Date.from_string(date_from)
+        if isinstance(date_to, str):
+            date_to = fields.Date.from_string(date_to)
+
+        where = ['aml.company_id = %(company_id)s', 'aml.parent_state IN %(states)s']
+        params = {
+            'company_id': company_id,
+            'states': tuple(states),
+            'date_from': date_from or date.min,
+        }
+        if date_to:
+            where.append('aml.date <= %(date_to)s')
+            params['date_to'] = date_to
+        if journal_ids:
+            where.append('aml.journal_id IN %(journal_ids)s')
+            params['journal_ids'] = tuple(journal_ids)
+        if analytic_account_ids:
+            where.append(ANALYTIC_FILTER)
+            params.update(self._get_analytic_params(analytic_account_ids))
+        return where, params
+
+    @api.model
+    def _get_analytic_params(self, analytic_account_ids):
+        return {
+            'analytic_ids': [int(analytic_id) for analytic_id in analytic_account_ids],
+            'analytic_keys': [str(analytic_id) for analytic_id in analytic_account_ids],
+        }
+
+    @api.model
+    def _get_report_aggregate(self, company_id, company_ids=None, currency_id=None, report=None, **filters):
+        """
+        Per-account aggregate of one company, or consolidated over ``company_ids``
+
+        ``report`` names the report asking, to record the filters it is
+        opened with (see account.report.usage).
+        """
+        if company_ids:
+            return self._get_consolidated_aggregate(company_ids, currency_id=currency_id, **filters)
+        if report:
+            self.env['account.report.usage']._record(report, company_id, filters)
+        return self._get_account_aggregate(company_id, **filters)
+
+    @api.model
+    def _get_consolidation_header(self, company_ids, currency_id=None):
+        """Company label and reporting currency of a consolidated report"""
+        companies = self.env['res.company'].browse(company_ids)
+        currency = self.env['res.currency'].browse(currency_id) if currency_id else self.env.company.currency_id
+        return ', '.join(companies.mapped('name')), currency
+
+    @api.model
+    def _get_consolidated_aggregate(self, company_ids, currency_id=None, date_from=None, date_to=None,
+                                    states=('posted',), journal_ids=None, analytic_account_ids=None):
+        """
+        Aggregate the ledgers of several companies in a single pass.
+
+        Amounts are converted to ``currency_id`` (default: the current company
+        currency) at the rate of their date, and the journal items matched by
+        the intercompany elimination rules are left out. Accounts of different
+        companies sharing a code are merged; each row also carries the
+        ``eliminated`` end balance.
+        """
+        if isinstance(date_from, str):
+            date_from = fields.Date.from_string(date_from)
+        if isinstance(date_to, str):
+            date_to = fields.Date.from_string(date_to)
+        company_ids = list(company_ids)
+        if not set(company_ids) <= set(self.env.user.company_ids.ids):
+            raise AccessError(_("You can only consolidate the companies you have access to."))
+        currency = self.env['res.currency'].browse(currency_id) if currency_id else self.env.company.currency_id
+
+        rate_company_ids, rate_starts, rate_stops, rate_factors = rate_table.segment_arrays(
+            self._get_conversion_segments(company_ids, currency, date_to or fields.Date.today())
+        )
+        elimination_account_ids, elimination_pairs = \
+            self.env['account.consolidation.elimination']._get_elimination_filters(company_ids)
+
+        where = ['aml.company_id IN %(company_ids)s', 'aml.parent_state IN %(states)s']
+        params = {
+            'company_ids': tuple(company_ids),
+            'states': tuple(states),
+            'date_from': date_from or date.min,
+            'rate_company_ids': rate_company_ids,
+            'rate_starts': rate_starts,
+            'rate_stops': rate_stops,
+            'rate_factors': rate_factors,
+            'elimination_account_ids': elimination_account_ids,
+            'elimination_company_ids': [company_id for company_id, _partner_id in elimination_pairs],
+            'elimination_partner_ids': [partner_id for _company_id, partner_id in elimination_pairs],
+        }
+        if date_to:
+            where.append('aml.date <= %(date_to)s')
+            params['date_to'] = date_to
+        if journal_ids:
+            where.append('aml.journal_id IN %(journal_ids)s')
+            params['journal_ids'] = tuple(journal_ids)
+        if analytic_account_ids:
+            where.append(ANALYTIC_FILTER)
+            params.update(self._get_analytic_params(analytic_account_ids))
+        weight = ANALYTIC_WEIGHT if analytic_account_ids else '1'
+
+        rows = self._fetch_report_rows(
+            CONSOLIDATED_AGGREGATE_QUERY.format(where=' AND '.join(where), weight=weight), params)
+
+        kept = self._aggregate_rows([row for row in rows if not row['eliminated']])
+        eliminated = self._aggregate_rows([row for row in rows if row['eliminated']])
+
+        # Merge the accounts of the different charts by code, under the first account id
+        aggregate = {}
+        by_code = {}
+        for part, is_eliminated in ((kept, False), (eliminated, True)):
+            for row in sorted(part.values(), key=lambda row: row['account_id']):
+                key = by_code.setdefault(row['code'] or row['account_id'], row['account_id'])
+                merged = aggregate.setdefault(key, dict(
+                    row, initial_balance=0.0, debit=0.0, credit=0.0, balance=0.0, end_balance=0.0, eliminated=0.0,
+                ))
+                if is_eliminated:
+                    merged['eliminated'] += row['end_balance']
+                else:
+                    for field in ('initial_balance', 'debit', 'credit', 'balance', 'end_balance'):
+                        merged[field] += row[field]
+        return aggregate
+
+    @api.model
+    def _get_currency_rates(self, currencies, date_to):
+        """
+        ``{currency_id: [(date, rate)]}`` up to ``date_to``, read in one query
+
+        As in res.currency._get_rates, rates of the current company take
+        precedence over the shared ones.
+        """
+        rates = {currency_id: {} for currency_id in currencies.ids}
+        currency_rates = self.env['res.currency.rate'].sudo().search_read([
+            ('currency_id', 'in', currencies.ids),
+            ('name', '<=', date_to),
+            ('company_id', 'in', [self.env.company.root_id.id, False]),
+        ], ['currency_id', 'name', 'rate', 'company_id'], order='name')
+        # Shared rates first, so that company rates of the same date override them
+        for rate in sorted(currency_rates, key=lambda rate: bool(rate['company_id'])):
+            rates[rate['currency_id'][0]][rate['name']] = rate['rate']
+        return {currency_id: sorted(by_date.items()) for currency_id, by_date in rates.items()}
+
+    @api.model
+    def _get_conversion_segments(self, company_ids, currency, date_to):
+        """Rate segments converting each company currency to ``currency``"""
+        companies = self.env['res.company'].browse(company_ids)
+        rates = self._get_currency_rates(companies.currency_id | currency, date_to)
+        return {
+            company.id: rate_table.conversion_segments(rates[company.currency_id.id], rates[currency.id])
+            for company in companies
+        }
+
+    @api.model
+    def _get_rate_table(self, company_id, currency_id, date_to):
+        """
+        In-memory table converting ``company_id``'s currency to ``currency_id``
+
+        None when no conversion is needed.
+        """
+        company = self.env['res.company'].browse(company_id)
+        if not currency_id or currency_id == company.currency_id.id:
+            return None
+        currency = self.env['res.currency'].browse(currency_id)
+        segments = self._get_conversion_segments([company.id], currency, date_to)[company.id]
+        return rate_table.RateTable(segments)
+
+    @api.model
+    def _aggregate_rows(self, rows):
+        """Attach account code, name and type to raw aggregate rows"""
+        accounts = self.env['account.account'].browse([row['account_id'] for row in rows])
+        accounts.fetch(['code', 'name', 'account_type'])
+        aggregate = {}
+        for row, account in zip(rows, accounts):
+            initial_balance = row['initial_balance'] or 0.0
+            balance = row['balance'] or 0.0
+            aggregate[account.id] = {
+                'account_id': account.id,
+                'code': account.code,
+                'name': account.name,
+                'account_type': account.account_type,
+                'initial_balance': initial_balance,
+                'debit': row['debit'] or 0.0,
+                'credit': row['credit'] or 0.0,
+                'balance': balance,
+                'end_balance': initial_balance + balance,
+            }
+        return aggregate
+
+    @api.model
+    def _get_group_index(self, company_id):
+        """
+        Prefix index of the account.group chart of a company
+
+        Built once per state of the chart and kept in the registry cache:
+        the count and last write date of the groups tell when it changed,
+        so editing groups clears nothing else. Never mutate the result.
+        """
+        root_id = self.env['res.company'].browse(company_id).root_id.id
+        self.env['account.group'].flush_model(['write_date'])
+        self.env.cr.execute(
+            "SELECT count(*), max(write_date) FROM account_group WHERE company_id = %s", [root_id])
+        count, write_date = self.env.cr.fetchone()
+        return self._get_chart_group_index(root_id, count, write_date)
+
+    @api.model
+    @tools.ormcache('root_id', 'count', 'write_date')
+    def _get_chart_group_index(self, root_id, count, write_date):
+        """Prefix index of the chart of ``root_id`` as of ``count``/``write_date`` (see _get_group_index)"""
+        groups = self.env['account.group'].sudo().search_read(
+            [('company_id', '=', root_id)],
+            ['parent_id', 'code_prefix_start', 'code_prefix_end', 'name'],
+        )
+        return GroupIndex([
+            (group['id'], group['parent_id'] and group['parent_id'][0],
+             group['code_prefix_start'], group['code_prefix_end'], group['name'])
+            for group in groups
+        ])
+
+    @api.model
+    def _nest_account_lines(self, company_id, lines, fields=('balance',)):
+        """
+        Roll the account lines of a report up through the account.group hierarchy
+
+        Every line whose children are account lines gets the group lines
+        holding them instead, with their subtotals of ``fields``. Group ids
+        are prefixed by the parent line id, as a group may hold accounts of
+        several sections.
+        """
+        group_index = self._get_group_index(company_id)
+        for line in lines:
+            children = line.get('children') or []
+            if children and all(str(child['id']).startswith('account_') for child in children):
+                line['children'] = group_index.tree(
+                    children, fields, level=children[0].get('level', 0), id_prefix=f"{line['id']}_group")
+            else:
+                self._nest_account_lines(company_id, children, fields)
+        return lines
+
+    @api.model
+    def _sum_by_types(self, aggregate, account_types, field='end_balance'):
+        """Sum one aggregate column over the accounts of the given types"""
+        return sum(row[field] for row in aggregate.values() if row['account_type'] in account_types)
+
+    @api.model
+    def _defer_account_lines(self, report, params, company_id, lines, ledger_version):
+        """
+        Lazy unfolding: keep only section lines in the response
+
+        Account-level children (level 3) are moved to
+        account.report.aggregate.store under ``ledger_version``, read before
+        the lines were computed; the parent gets ``children_count`` and
+        ``lazy`` instead. Returns the key for /account/reports/unfold.
+        """
+        children_by_line = {}
+
+        def strip(report_lines):
+            for line in report_lines:
+                children = line.get('children') or []
+                if children and all(child.get('level', 0) >= 3 for child in children):
+                    children_by_line[line['id']] = children
+                    line['children'] = []
+                    line['children_count'] = len(children)
+                    line['lazy'] = True
+                else:
+                    strip(children)
+
+        strip(lines)
+        return self.env['account.report.aggregate.store']._store(
+            report, params, company_id, ledger_version, children_by_line)
+
+    @api.model
+    def _get_line_children(self, report, unfold_key, line_id, compute):
+        """
+        Children of one report line: from the response stored under
+        ``unfold_key`` while it is kept, otherwise from ``compute()`` (the
+        full, non-lazy report lines), which is not stored
+
+        Returns ``(children, stored)``.
+        """
+        if unfold_key:
+            children = self.env['account.report.aggregate.store']._get_children(report, unfold_key, line_id)
+            if children is not None:
+                return children, True
+        line = self._find_line(compute(), line_id)
+        return (line.get('children', []) if line else []), False
+
+    @api.model
+    def _strip_account_lines(self, lines):
+        """Drop account-level lines (e.g. from comparison trees already merged into the main lines)"""
+        for line in lines:
+            line['children'] = [child for child in line.get('children') or [] if child.get('level', 0) < 3]
+            self._strip_account_lines(line['children'])
+        return lines
+
+    @api.model
+    def _add_analytic_balances(self, lines, lines_by_analytic):
+        """
+        Per-analytic-account columns: set ``analytic_balances``
+        ({analytic_account_id: balance}) on the report lines, matched by line id
+
+        ``lines_by_analytic`` holds the lines of the same report built from
+        each analytic aggregate. Returns the columns as [{id, name}].
+        """
+        balances_by_line = {}
+
+        def collect(analytic_id, report_lines):
+            for line in report_lines:
+                balances_by_line.setdefault(line['id'], {})[analytic_id] = line['balance']
+                collect(analytic_id, line.get('children') or [])
+
+        def annotate(report_lines):
+            for line in report_lines:
+                balances = balances_by_line.get(line['id'], {})
+                line['analytic_balances'] = {
+                    analytic_id: balances.get(analytic_id, 0.0) for analytic_id in lines_by_analytic
+                }
+                annotate(line.get('children') or [])
+
+        for analytic_id, analytic_lines in lines_by_analytic.items():
+            collect(analytic_id, analytic_lines)
+        annotate(lines)
+        analytic_accounts = self.env['account.analytic.account'].browse(list(lines_by_analytic))
+        return [{'id': account.id, 'name': account.display_name} for account in analytic_accounts]
+
+    @api.model
+    def _find_line(self, lines, line_id):
+        """Depth-first lookup of a report line by id"""
+        for line in lines:
+            if line['id'] == line_id:
+                return line
+            found = self._find_line(line.get('children') or [], line_id)
+            if found:
+                return found
+        return None
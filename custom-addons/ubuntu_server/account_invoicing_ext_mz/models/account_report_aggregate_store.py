@@ -0,0 +1,101 @@
+from odoo import models, fields, api
+from datetime import timedelta
+import hashlib
+import json
+import logging
+
+from psycopg2 import IntegrityError
+
+_logger = logging.getLogger(__name__)
+
+# Stored unfold data is only needed while a report is open
+STORE_MAX_AGE = timedelta(days=1)
+
+
+class AccountReportAggregateStore(models.Model):
+    _name = 'account.report.aggregate.store'
+    _description = 'Report Unfold Data'
+
+    key = fields.Char(required=True, index=True, readonly=True)
+    report = fields.Char(required=True, readonly=True)
+    company_id = fields.Many2one('res.company', required=True, readonly=True, ondelete='cascade')
+    ledger_version = fields.Integer(readonly=True)
+    children = fields.Json(readonly=True, help="Deferred child lines per parent line id")
+    payload = fields.Json(readonly=True, help="Pre-computed per-account aggregate (report 'aggregate')")
+
+    _sql_constraints = [
+        ('key_uniq', 'unique(key)', 'Report unfold data must be unique per key.'),
+    ]
+
+    @api.model
+    def _make_key(self, report, company_id, params, ledger_version):
+        """Hash of the report, its company, its filters and the ledger version it was computed at"""
+        payload = json.dumps([report, company_id, params, ledger_version], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @api.model
+    def _store(self, report, params, company_id, ledger_version, children_by_line):
+        """Keep the deferred children of a report response computed at ``ledger_version`` and return their key"""
+        key = self._make_key(report, company_id, params, ledger_version)
+        self._create_once({
+            'key': key,
+            'report': report,
+            'company_id': company_id,
+            'ledger_version': ledger_version,
+            'children': children_by_line,
+        })
+        return key
+
+    @api.model
+    def _store_aggregate(self, company_id, params, ledger_version, aggregate):
+        """Keep a per-account aggregate computed at ``ledger_version`` (see report pre-warming)"""
+        self._create_once({
+            'key': self._make_key('aggregate', company_id, params, ledger_version),
+            'report': 'aggregate',
+            'company_id': company_id,
+            'ledger_version': ledger_version,
+            'payload': aggregate,
+        })
+
+    @api.model
+    def _get_aggregate(self, company_id, params, ledger_version):
+        """Stored per-account aggregate of ``params`` at ``ledger_version``, or None"""
+        record = self.sudo().search([
+            ('key', '=', self._make_key('aggregate', company_id, params, ledger_version)),
+            ('report', '=', 'aggregate'),
+            ('company_id', '=', company_id),
+        ], limit=1)
+        if not record:
+            return None
+        # JSON object keys are strings
+        return {int(account_id): row for account_id, row in (record.payload or {}).items()}
+
+    @api.model
+    def _create_once(self, vals):
+        store = self.sudo()
+        if store.search_count([('key', '=', vals['key'])]):
+            return
+        try:
+            with self.env.cr.savepoint(flush=False):
+                store.create(vals)
+                store.flush_model()
+        except IntegrityError:
+            # Stored concurrently by an identical request
+            pass
+
+    @api.model
+    def _get_children(self, report, key, line_id):
+        """Children of one line from the stored response, or None when it expired"""
+        record = self.sudo().search([
+            ('key', '=', key),
+            ('report', '=', report),
+            ('company_id', 'in', self.env.companies.ids),
+        ], limit=1)
+        if not record:
+            return None
+        return (record.children or {}).get(line_id, [])
+
+    @api.autovacuum
+    def _gc_report_aggregate_store(self):
+        limit = fields.Datetime.now() - STORE_MAX_AGE
+        self.sudo().search([('create_date', '<', limit)]).unlink()
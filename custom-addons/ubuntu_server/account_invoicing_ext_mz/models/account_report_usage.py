@@ -0,0 +1,122 @@
+from odoo import models, fields, api
+from datetime import timedelta
+import json
+import logging
+import time
+
+from ..tools import report_presets
+
+_logger = logging.getLogger(__name__)
+
+# Presets not opened for this long are no longer pre-warmed, then forgotten
+USAGE_PREWARM_AGE = timedelta(days=30)
+USAGE_MAX_AGE = timedelta(days=90)
+# Seconds a pre-warming run may take (ir.config_parameter)
+PREWARM_BUDGET_PARAM = 'account_invoicing_ext_mz.report_prewarm_budget'
+PREWARM_DEFAULT_BUDGET = 600
+
+
+class AccountReportUsage(models.Model):
+    _name = 'account.report.usage'
+    _description = 'Report Filter Usage'
+    _order = 'hits desc, last_used desc'
+
+    report = fields.Char(required=True, readonly=True)
+    company_id = fields.Many2one('res.company', required=True, readonly=True, ondelete='cascade')
+    preset = fields.Char(required=True, readonly=True,
+                         help="Date window relative to the day the report was opened, e.g. year_start:today")
+    filters = fields.Json(readonly=True, help="Aggregate filters other than the dates")
+    filters_key = fields.Char(required=True, readonly=True)
+    hits = fields.Integer(readonly=True)
+    last_used = fields.Datetime(readonly=True)
+
+    _sql_constraints = [
+        ('usage_uniq', 'unique(report, company_id, preset, filters_key)',
+         'Report usage must be unique per report, company, preset and filters.'),
+    ]
+
+    @api.model
+    def _record(self, report, company_id, filters):
+        """
+        Count one opening of ``report`` with the aggregate ``filters``
+
+        Only windows matching a preset are counted. The counter is updated
+        after the commit, on its own cursor, so that report requests never
+        contend on it.
+        """
+        date_from = fields.Date.to_date(filters.get('date_from'))
+        date_to = fields.Date.to_date(filters.get('date_to'))
+        preset = report_presets.preset_of(date_from, date_to, fields.Date.context_today(self))
+        if not preset:
+            return
+        aggregate_filters = self.env['account.report.aggregate']._normalize_filters(
+            filters.get('states', ('posted',)), filters.get('journal_ids'), filters.get('analytic_account_ids'))
+        filters_json = json.dumps(aggregate_filters, sort_keys=True)
+        registry = self.pool
+        uid = self.env.uid
+
+        @self.env.cr.postcommit.add
+        def record_report_usage():
+            try:
+                with registry.cursor() as cr:
+                    cr.execute("""
+                        INSERT INTO account_report_usage (report, company_id, preset, filters, filters_key, hits,
+                                                          last_used, create_uid, create_date, write_uid, write_date)
+                        VALUES (%(report)s, %(company_id)s, %(preset)s, %(filters)s::jsonb, %(filters)s, 1,
+                                %(now)s, %(uid)s, %(now)s, %(uid)s, %(now)s)
+                        ON CONFLICT (report, company_id, preset, filters_key)
+                        DO UPDATE SET hits = account_report_usage.hits + 1, last_used = EXCLUDED.last_used
+                    """, {
+                        'report': report,
+                        'company_id': company_id,
+                        'preset': preset,
+                        'filters': filters_json,
+                        'now': fields.Datetime.now(),
+                        'uid': uid,
+                    })
+            except Exception as e:
+                _logger.warning(f"Could not record the usage of {report}: {str(e)}")
+
+    @api.model
+    def _cron_prewarm_reports(self):
+        """
+        Pre-compute the aggregates of the most used presets for today
+
+        Meant to run after the nightly imports; stops at the time budget of
+        ``account_invoicing_ext_mz.report_prewarm_budget`` (seconds). Reports
+        sharing filters share one aggregate.
+        """
+        budget = int(self.env['ir.config_parameter'].sudo().get_param(PREWARM_BUDGET_PARAM, PREWARM_DEFAULT_BUDGET))
+        deadline = time.monotonic() + budget
+        today = fields.Date.context_today(self)
+        usages = self.search([('last_used', '>=', fields.Datetime.now() - USAGE_PREWARM_AGE)])
+
+        done = set()
+        for usage in usages:
+            if time.monotonic() >= deadline:
+                _logger.info(f"Report pre-warming stopped at its {budget}s budget, {len(done)} aggregates computed")
+                break
+            date_from, date_to = report_presets.resolve_preset(usage.preset, today)
+            key = (usage.company_id.id, date_from, date_to, usage.filters_key)
+            if key in done:
+                continue
+            done.add(key)
+            filters = usage.filters or {}
+            try:
+                self.env['account.report.aggregate'].with_company(usage.company_id)._prewarm_account_aggregate(
+                    usage.company_id.id,
+                    date_from,
+                    date_to,
+                    filters.get('states') or ('posted',),
+                    filters.get('journal_ids'),
+                    filters.get('analytic_account_ids'),
+                )
+                # Keep what is computed if the run is interrupted
+                self.env.cr.commit()
+            except Exception as e:
+                self.env.cr.rollback()
+                _logger.error(f"Error pre-warming {usage.report} ({usage.preset}) for {usage.company_id.name}: {str(e)}")
+
+    @api.autovacuum
+    def _gc_report_usage(self):
+        self.search([('last_used', '<', fields.Datetime.now() - USAGE_MAX_AGE)]).unlink()
@@ -4,17 +4,29 @@ import logging
 
 _logger = logging.getLogger(__name__)
 
+# Columns summed into the account.group subtotals
+TRIAL_BALANCE_FIELDS = ('initial_debit', 'initial_credit', 'period_debit', 'period_credit', 'end_debit', 'end_credit')
+
 class AccountTrialBalance(models.TransientModel):
     _name = 'account.trial.balance.report'
     _description = 'Trial Balance Report'
     
     @api.model
     def get_trial_balance_data(self, date_from=None, date_to=None, journals=None, 
-                               analytic=None, posted_entries=True, comparison=None, company_id=None):
-        """Get trial balance data for the report"""
+                               analytic=None, posted_entries=True, comparison=None, company_id=None,
+                               company_ids=None, currency_id=None, account_groups=False):
+        """
+        Get trial balance data for the report
+
+        With ``company_ids`` the selected companies are consolidated in
+        ``currency_id``, after intercompany eliminations.
+        With ``account_groups``, ``groups`` holds the accounts nested in their
+        account.group hierarchy, with subtotals per group.
+        """
         try:
             if not company_id:
                 company_id = self.env.company.id
+            self.env['account.report.aggregate']._check_company_access([company_id])
             
             # Set default dates if not provided
             if not date_to:
@@ -30,21 +42,18 @@ class AccountTrialBalance(models.TransientModel):
                 if isinstance(date_from, str):
                     date_from = fields.Date.from_string(date_from)
             
-            # Build domain for account.move.line
-            domain = [
-                ('company_id', '=', company_id),
-            ]
-            
-            if posted_entries:
-                domain.append(('parent_state', '=', 'posted'))
-            
-            if journals and journals != 'all':
-                domain.append(('journal_id', 'in', journals))
-            
-            # Get all accounts
-            accounts = self.env['account.account'].search([
-                ('company_id', '=', company_id)
-            ], order='code')
+            # Opening balances and period movements per account, from one grouped ledger query
+            aggregate_model = self.env['account.report.aggregate']
+            aggregate = aggregate_model._get_report_aggregate(
+                company_id,
+                report='trial_balance',
+                company_ids=company_ids,
+                currency_id=currency_id,
+                date_from=date_from,
+                date_to=date_to,
+                states=aggregate_model._states_for(posted_entries, not posted_entries),
+                journal_ids=journals if journals and journals != 'all' else None,
+            )
             
             accounts_data = []
             
@@ -56,26 +65,13 @@ class AccountTrialBalance(models.TransientModel):
             total_end_debit = 0.0
             total_end_credit = 0.0
             
-            for account in accounts:
-                # Calculate initial balance (before date_from)
-                initial_domain = domain + [
-                    ('date', '<', date_from),
-                    ('account_id', '=', account.id)
-                ]
-                initial_lines = self.env['account.move.line'].search(initial_domain)
-                initial_balance = sum(initial_lines.mapped('balance'))
+            for row in sorted(aggregate.values(), key=lambda row: row['code'] or ''):
+                initial_balance = row['initial_balance']
                 initial_debit = max(initial_balance, 0.0)
                 initial_credit = abs(min(initial_balance, 0.0))
                 
-                # Calculate period movements
-                period_domain = domain + [
-                    ('date', '>=', date_from),
-                    ('date', '<=', date_to),
-                    ('account_id', '=', account.id)
-                ]
-                period_lines = self.env['account.move.line'].search(period_domain)
-                period_debit = sum(period_lines.mapped('debit'))
-                period_credit = sum(period_lines.mapped('credit'))
+                period_debit = row['debit']
+                period_credit = row['credit']
                 
                 # Calculate end balance
                 end_balance = initial_balance + period_debit - period_credit
@@ -87,9 +83,9 @@ class AccountTrialBalance(models.TransientModel):
                     continue
                 
                 account_data = {
-                    'id': f'account_{account.id}',
-                    'code': account.code,
-                    'name': account.name,
+                    'id': f'account_{row["account_id"]}',
+                    'code': row['code'],
+                    'name': row['name'],
                     'initial_debit': initial_debit,
                     'initial_credit': initial_credit,
                     'period_debit': period_debit,
@@ -109,6 +105,16 @@ class AccountTrialBalance(models.TransientModel):
                 total_end_debit += end_debit
                 total_end_credit += end_credit
             
+            groups = []
+            if account_groups:
+                groups = aggregate_model._get_group_index(company_id).tree(accounts_data, TRIAL_BALANCE_FIELDS)
+            
+            company_name = self.env.company.name
+            currency_symbol = 'MZN'
+            if company_ids:
+                company_name, currency = aggregate_model._get_consolidation_header(company_ids, currency_id)
+                currency_symbol = currency.name
+            
             # Format dates for return
             if date_from and isinstance(date_from, str):
                 date_from_str = date_from
@@ -126,6 +132,7 @@ class AccountTrialBalance(models.TransientModel):
             
             return {
                 'accounts': accounts_data,
+                'groups': groups,
                 'totals': {
                     'initial_debit': total_initial_debit,
                     'initial_credit': total_initial_credit,
@@ -134,8 +141,8 @@ class AccountTrialBalance(models.TransientModel):
                     'end_debit': total_end_debit,
                     'end_credit': total_end_credit
                 },
-                'company_name': self.env.company.name,
-                'currency_symbol': 'MZN',
+                'company_name': company_name,
+                'currency_symbol': currency_symbol,
                 'date_from': date_from_str,
                 'date_to': date_to_str,
                 'unposted_warning': not posted_entries
@@ -145,6 +152,7 @@ class AccountTrialBalance(models.TransientModel):
             _logger.error(f"Error getting trial balance data: {str(e)}")
             return {
                 'accounts': [],
+                'groups': [],
                 'totals': {
                     'initial_debit': 0.0,
                     'initial_credit': 0.0,
@@ -0,0 +1,15 @@
+from odoo import models
+
+# System parameter enabling the columnar payload of the line-heavy reports
+# (see /account/reports/columnar); off, they are fetched as regular JSON
+COLUMNAR_REPORTS_PARAM = 'account_invoicing_ext_mz.columnar_reports'
+
+
+class IrHttp(models.AbstractModel):
+    _inherit = 'ir.http'
+
+    def session_info(self):
+        info = super().session_info()
+        info['account_columnar_reports'] = bool(
+            self.env['ir.config_parameter'].sudo().get_param(COLUMNAR_REPORTS_PARAM))
+        return info
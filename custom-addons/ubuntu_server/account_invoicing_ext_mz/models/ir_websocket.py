@@ -0,0 +1,16 @@
+from odoo import models
+
+from .account_move import LEDGER_DELTA_CHANNEL
+
+
+class IrWebsocket(models.AbstractModel):
+    _inherit = 'ir.websocket'
+
+    def _build_bus_channel_list(self, channels):
+        # The report components subscribe to the generic channel name; it is
+        # only granted to accountants, for the companies they can access
+        if LEDGER_DELTA_CHANNEL in channels:
+            channels = [channel for channel in channels if channel != LEDGER_DELTA_CHANNEL]
+            if self.env.uid and self.env.user.has_group('account.group_account_user'):
+                channels += [(company, LEDGER_DELTA_CHANNEL) for company in self.env.user.company_ids]
+        return super()._build_bus_channel_list(channels)
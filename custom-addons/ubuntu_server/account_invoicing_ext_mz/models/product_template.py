@@ -0,0 +1,12 @@
+from odoo import models
+
+
+class ProductTemplate(models.Model):
+    _inherit = 'product.template'
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'categ_id' in vals and self:
+            # The category is a dimension of the invoice analysis
+            self.env['account.invoice.analysis']._mark_products_dirty(self)
+        return res
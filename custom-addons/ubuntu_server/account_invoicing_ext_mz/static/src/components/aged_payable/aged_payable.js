@@ -3,12 +3,18 @@
 import { Component, useState, onWillStart } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
+import { useLedgerDeltas, useReportLoader } from "@account_invoicing_ext_mz/services/report_data_service";
+import { applyAgedDelta } from "@account_invoicing_ext_mz/utils/ledger_deltas";
+import { VirtualTable } from "@account_invoicing_ext_mz/components/virtual_table/virtual_table";
 
 export class AgedPayableReport extends Component {
     static template = "account_invoicing_ext_mz.AgedPayableReport";
+    static components = { VirtualTable };
 
     setup() {
         this.rpc = useService("rpc");
+        this.reportData = useService("report_data");
+        this.loader = useReportLoader();
         this.action = useService("action");
         this.user = useService("user");
         
@@ -44,6 +50,8 @@ export class AgedPayableReport extends Component {
         onWillStart(async () => {
             await this.loadReport();
         });
+
+        useLedgerDeltas((payload) => this.onLedgerDelta(payload));
     }
 
     formatDate(dateStr) {
@@ -56,24 +64,19 @@ export class AgedPayableReport extends Component {
         });
     }
 
-    async loadReport() {
+    async loadReport({ refresh = false } = {}) {
         try {
             this.state.isLoading = true;
             this.state.error = null;
 
-            const result = await this.rpc("/web/dataset/call_kw/account.aged.payable.report/get_aged_payable_data", {
-                model: "account.aged.payable.report",
-                method: "get_aged_payable_data",
-                args: [],
-                kwargs: {
-                    as_of_date: this.state.filters.as_of_date,
-                    account_type: this.state.filters.account_type,
-                    partner_ids: this.state.filters.partner_ids.length > 0 ? this.state.filters.partner_ids : null,
-                    period_length: this.state.filters.period_length,
-                    posted_entries: this.state.filters.posted_entries,
-                    company_id: this.state.filters.company_id || this.user.context.allowed_company_ids[0]
-                }
-            });
+            const result = await this.loader.load((signal) => this.reportData.columnar("aged_payable", {
+                as_of_date: this.state.filters.as_of_date,
+                account_type: this.state.filters.account_type,
+                partner_ids: this.state.filters.partner_ids.length > 0 ? this.state.filters.partner_ids : null,
+                period_length: this.state.filters.period_length,
+                posted_entries: this.state.filters.posted_entries,
+                company_id: this.state.filters.company_id || this.user.context.allowed_company_ids[0]
+            }, { groupKey: "partners", childKey: "lines", signal, cache: this.state.filters.posted_entries, refresh, onUpdate: () => this.loadReport() }));
 
             if (result.error) {
                 throw new Error(result.error);
@@ -102,6 +105,35 @@ export class AgedPayableReport extends Component {
         }
     }
 
+    /**
+     * Patch partners and totals with the entries posted or reset to draft,
+     * and the items reconciled or unreconciled, since the report was loaded
+     */
+    onLedgerDelta(payload) {
+        const filters = this.state.filters;
+        const companyId = filters.company_id || this.user.context.allowed_company_ids[0];
+        if (this.state.isLoading || payload.company_id !== companyId || !filters.posted_entries) {
+            // Draft entries are already included when posted_entries is off
+            return;
+        }
+        if (payload.overflow) {
+            this.loadReport({ refresh: true });
+            return;
+        }
+        const accountType = filters.account_type;
+        applyAgedDelta(this.state, payload.partner_items, {
+            asOfDate: filters.as_of_date,
+            periodLength: filters.period_length,
+            partnerIds: filters.partner_ids,
+            signOf: (item) => {
+                if (accountType === 'payable' && item.account_type !== 'liability_payable') return 0;
+                if (accountType === 'receivable' && item.account_type !== 'asset_receivable') return 0;
+                // Payables are shown as credit - debit
+                return -1;
+            },
+        });
+    }
+
     togglePartner(partnerId) {
         if (this.state.expandedPartners.has(partnerId)) {
             this.state.expandedPartners.delete(partnerId);
@@ -195,4 +227,4 @@ export class AgedPayableReport extends Component {
     }
 }
 
-registry.category("actions").add("account_aged_payable_report", AgedPayableReport);
\ No newline at end of file
+registry.category("actions").add("account_aged_payable_report", AgedPayableReport, { force: true });
\ No newline at end of file
@@ -3,6 +3,40 @@
 import { Component, useState, onWillStart, onMounted } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
+import { useLedgerDeltas, useReportLoader } from "@account_invoicing_ext_mz/services/report_data_service";
+import { loadConsolidationCurrencies } from "@account_invoicing_ext_mz/utils/consolidation";
+
+// Line holding each account type, as built by get_balance_sheet_data.
+// `sign`: how the account balance enters the line; `abs`: the line shows the
+// absolute value of its raw sum; `hidden`: accounts are not listed under it.
+const LEAF_LINES = {
+    asset_cash: { line: "bank_cash" },
+    liability_credit_card: { line: "bank_cash" },
+    asset_receivable: { line: "receivables" },
+    asset_current: { line: "current_assets_other" },
+    asset_prepayments: { line: "prepayments" },
+    asset_fixed: { line: "fixed_assets" },
+    asset_non_current: { line: "fixed_assets" },
+    liability_current: { line: "current_liabilities_detail", abs: true },
+    liability_payable: { line: "payables", abs: true },
+    liability_non_current: { line: "non_current_liabilities", abs: true },
+    income: { line: "current_year_earnings", hidden: true },
+    income_other: { line: "current_year_earnings", hidden: true },
+    expense: { line: "current_year_earnings", sign: -1, hidden: true },
+    expense_depreciation: { line: "current_year_earnings", sign: -1, hidden: true },
+    equity_unaffected: { line: "previous_years_earnings", hidden: true },
+};
+
+// Total lines, recomputed bottom-up from their parts
+const TOTAL_LINES = [
+    ["current_assets", ["bank_cash", "receivables", "current_assets_other", "prepayments"]],
+    ["assets", ["current_assets", "fixed_assets"]],
+    ["current_liabilities", ["current_liabilities_detail", "payables"]],
+    ["liabilities", ["current_liabilities", "non_current_liabilities"]],
+    ["unallocated_earnings", ["current_year_earnings", "previous_years_earnings"]],
+    ["equity", ["unallocated_earnings"]],
+    ["total_liabilities_equity", ["liabilities", "equity"]],
+];
 
 export class BalanceSheetReport extends Component {
     static template = "account_invoicing_ext_mz.BalanceSheetReport";
@@ -14,6 +48,8 @@ export class BalanceSheetReport extends Component {
         this.orm = useService("orm");
         this.action = useService("action");
         this.rpc = useService("rpc");
+        this.reportData = useService("report_data");
+        this.loader = useReportLoader();
         this.notification = useService("notification");
         this.user = useService("user");
         
@@ -40,6 +76,10 @@ export class BalanceSheetReport extends Component {
             includeDraft: false,
             includeSimulations: false,
             hideZeroBalances: false,
+            accountGroups: false,
+            consolidate: false,
+            currencyId: null,
+            currencies: [],
             splitHorizontally: false,
             filters: {
                 date_to: this.getDefaultDate(),
@@ -57,6 +97,10 @@ export class BalanceSheetReport extends Component {
         onMounted(() => {
             this.setupDatePicker();
         });
+
+        // Deltas applied since the last load, replayed on lazily loaded accounts
+        this.appliedDeltas = [];
+        useLedgerDeltas((payload) => this.onLedgerDelta(payload));
     }
     
     getDefaultDate() {
@@ -77,29 +121,47 @@ export class BalanceSheetReport extends Component {
         }
     }
     
-    async loadBalanceSheetData() {
+    /**
+     * Report filters; those of the loaded report are also sent with
+     * /account/reports/unfold, to recompute a line whose stored children expired
+     */
+    getReportParams() {
+        return {
+            date_to: this.state.date_to,
+            date_from: this.state.date_from,
+            journals: this.state.allJournals ? null : this.state.filters.journals,
+            company_id: this.user.context.company_id || false,
+            // Several companies selected in the switcher: consolidated on request
+            company_ids: this.consolidating ? this.user.context.allowed_company_ids : null,
+            currency_id: this.consolidating ? this.state.currencyId : null,
+            comparison: this.state.comparison,
+            comparison_date: this.state.comparisonDate,
+            comparison_mode: this.state.comparisonMode,
+            only_posted: this.state.onlyPosted,
+            include_draft: this.state.includeDraft,
+            include_simulations: this.state.includeSimulations,
+            hide_zero: this.state.hideZeroBalances,
+            account_groups: this.state.accountGroups,
+            analytic_accounts: this.state.analyticAccounts,
+            analytic_plans: this.state.analyticPlans,
+        };
+    }
+    
+    async loadBalanceSheetData({ refresh = false } = {}) {
         this.state.loading = true;
         this.state.error = null;
         
         try {
-            const result = await this.rpc("/account/balance_sheet/data", {
-                date_to: this.state.date_to,
-                date_from: this.state.date_from,
-                journals: this.state.allJournals ? null : this.state.filters.journals,
-                company_id: this.user.context.company_id || false,
-                comparison: this.state.comparison,
-                comparison_date: this.state.comparisonDate,
-                comparison_mode: this.state.comparisonMode,
-                only_posted: this.state.onlyPosted,
-                include_draft: this.state.includeDraft,
-                include_simulations: this.state.includeSimulations,
-                hide_zero: this.state.hideZeroBalances,
-                analytic_accounts: this.state.analyticAccounts,
-                analytic_plans: this.state.analyticPlans,
-            });
+            const params = this.getReportParams();
+            const result = await this.loader.load((signal) => this.reportData.rpc("/account/balance_sheet/data", {
+                ...params,
+                lazy: true,
+            }, { signal, cache: this.state.onlyPosted && !this.state.includeDraft, refresh, onUpdate: () => this.loadBalanceSheetData() }));
             
             if (result.success) {
                 this.state.data = result.data;
+                this.loadedParams = params;
+                this.appliedDeltas = [];
                 this.state.hasUnposted = result.data.has_unposted || false;
                 
                 // Auto-expand first level
@@ -133,7 +195,7 @@ export class BalanceSheetReport extends Component {
             
             // Load detailed accounts if needed
             const line = this.findLine(lineId);
-            if (line && !line.children_loaded) {
+            if (line && line.lazy && !line.children_loaded) {
                 this.loadLineDetails(lineId);
             }
         }
@@ -141,11 +203,11 @@ export class BalanceSheetReport extends Component {
     
     async loadLineDetails(lineId) {
         try {
-            const result = await this.rpc("/account/balance_sheet/expand_line", {
+            const result = await this.rpc("/account/reports/unfold", {
+                report: "balance_sheet",
+                unfold_key: this.state.data.unfold_key,
                 line_id: lineId,
-                date_to: this.state.date_to,
-                journals: this.state.allJournals ? null : this.state.filters.journals,
-                company_id: this.user.context.company_id || false,
+                params: this.loadedParams,
             });
             
             if (result.success) {
@@ -153,6 +215,12 @@ export class BalanceSheetReport extends Component {
                 if (line) {
                     line.children = result.sub_lines;
                     line.children_loaded = true;
+                    // The stored lines predate the deltas applied to the totals
+                    for (const { row, field } of result.stored ? this.appliedDeltas : []) {
+                        if (LEAF_LINES[row.account_type].line === lineId) {
+                            this.patchAccountLine(line, row, field);
+                        }
+                    }
                     // Force re-render
                     this.state.data = { ...this.state.data };
                 }
@@ -162,6 +230,116 @@ export class BalanceSheetReport extends Component {
         }
     }
     
+    /**
+     * Patch balances and totals with the entries posted or reset to draft
+     * since the report was loaded
+     */
+    onLedgerDelta(payload) {
+        const data = this.state.data;
+        const companyId = this.user.context.company_id || this.user.context.allowed_company_ids[0];
+        if (!data || this.state.loading || data.consolidated || payload.company_id !== companyId) {
+            return;
+        }
+        if (this.state.includeDraft || !this.state.onlyPosted) {
+            // Draft entries are already included: posting changes nothing
+            return;
+        }
+        if (payload.overflow || this.state.analyticAccounts.length || data.consolidated || data.account_groups) {
+            // Deltas are neither split per analytic account, converted nor rolled up by group
+            this.loadBalanceSheetData({ refresh: true });
+            return;
+        }
+        const journals = this.state.allJournals ? null : this.state.filters.journals;
+        const patched = new Set();
+        for (const row of payload.balances) {
+            if (!LEAF_LINES[row.account_type] || (journals && !journals.includes(row.journal_id))) {
+                continue;
+            }
+            if (row.date <= this.state.date_to) {
+                this.patchLeafLine(row, "balance", "raw_balance");
+                patched.add("balance");
+            }
+            if (data.comparison && this.state.comparisonDate && row.date <= this.state.comparisonDate) {
+                this.patchLeafLine(row, "comparison_balance", "comparison_raw_balance");
+                patched.add("comparison_balance");
+            }
+        }
+        if (!patched.size) {
+            return;
+        }
+        for (const field of patched) {
+            this.recomputeTotals(field);
+        }
+        data.total_balance = this.findLine("assets")?.balance === this.findLine("total_liabilities_equity")?.balance;
+        this.state.data = { ...data };
+    }
+
+    patchLeafLine(row, field, rawField) {
+        const leaf = LEAF_LINES[row.account_type];
+        const line = this.findLine(leaf.line);
+        if (!line) {
+            return;
+        }
+        const amount = (leaf.sign || 1) * row.balance;
+        if (leaf.abs) {
+            // Liabilities are credit balances: without the raw sum assume the usual sign
+            const raw = (line[rawField] ?? -(line[field] || 0)) + amount;
+            line[rawField] = raw;
+            line[field] = Math.abs(raw);
+        } else {
+            line[field] = (line[field] || 0) + amount;
+        }
+        if (leaf.hidden) {
+            return;
+        }
+        if (line.lazy && !line.children_loaded) {
+            this.appliedDeltas.push({ row, field });
+        } else {
+            this.patchAccountLine(line, row, field);
+        }
+    }
+
+    patchAccountLine(line, row, field) {
+        const accountId = `account_${row.account_id}`;
+        line.children = line.children || [];
+        let account = line.children.find((child) => child.id === accountId);
+        if (!account) {
+            if (field !== "balance") {
+                return;
+            }
+            account = {
+                id: accountId,
+                code: row.code,
+                name: row.code ? `${row.code} ${row.name}` : row.name,
+                balance: 0.0,
+                level: 3,
+                unfoldable: false,
+                account_type: row.account_type,
+            };
+            line.children.push(account);
+            line.children.sort((a, b) => (a.code || "").localeCompare(b.code || ""));
+            line.unfoldable = true;
+        }
+        account[field] = (account[field] || 0) + row.balance;
+        if (field === "balance" && Math.abs(account.balance) < 0.005) {
+            // Zero balance accounts are not listed
+            line.children = line.children.filter((child) => child !== account);
+        }
+        if (line.children_count !== undefined) {
+            line.children_count = line.children.length;
+        }
+    }
+
+    recomputeTotals(field) {
+        const value = (lineId) => this.findLine(lineId)?.[field] || 0;
+        for (const [lineId, parts] of TOTAL_LINES) {
+            const line = this.findLine(lineId);
+            if (line) {
+                line[field] = parts.reduce((total, part) => total + value(part), 0);
+            }
+        }
+    }
+
     findLine(lineId, lines = null) {
         lines = lines || this.state.data?.lines || [];
         
@@ -417,6 +595,9 @@ export class BalanceSheetReport extends Component {
                 lines.forEach(line => {
                     if (line.unfoldable) {
                         this.state.expandedLines.add(line.id);
+                        if (line.lazy && !line.children_loaded) {
+                            this.loadLineDetails(line.id);
+                        }
                         if (line.children) {
                             expandAllLines(line.children);
                         }
@@ -433,6 +614,32 @@ export class BalanceSheetReport extends Component {
         await this.loadBalanceSheetData();
     }
     
+    get canConsolidate() {
+        return this.user.context.allowed_company_ids.length > 1;
+    }
+    
+    get consolidating() {
+        return this.state.consolidate && this.canConsolidate;
+    }
+    
+    async toggleConsolidate() {
+        if (!this.state.currencies.length) {
+            Object.assign(this.state, await loadConsolidationCurrencies(this.orm, this.user.context.allowed_company_ids[0]));
+        }
+        this.state.consolidate = !this.state.consolidate;
+        await this.loadBalanceSheetData();
+    }
+    
+    async onCurrencyChange(ev) {
+        this.state.currencyId = parseInt(ev.target.value);
+        await this.loadBalanceSheetData();
+    }
+    
+    async toggleAccountGroups() {
+        this.state.accountGroups = !this.state.accountGroups;
+        await this.loadBalanceSheetData();
+    }
+    
     toggleSplitView() {
         this.state.splitHorizontally = !this.state.splitHorizontally;
         // TODO: Implement split view functionality
@@ -502,4 +709,4 @@ export class BalanceSheetReport extends Component {
 }
 
 // Register the component as a client action
-registry.category("actions").add("account_balance_sheet_report", BalanceSheetReport);
\ No newline at end of file
+registry.category("actions").add("account_balance_sheet_report", BalanceSheetReport, { force: true });
\ No newline at end of file
@@ -3,12 +3,15 @@
 import { Component, useState, onWillStart } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
+import { useReportLoader } from "@account_invoicing_ext_mz/services/report_data_service";
 
 export class CashFlowReport extends Component {
     static template = "account_invoicing_ext_mz.CashFlowReport";
 
     setup() {
         this.rpc = useService("rpc");
+        this.reportData = useService("report_data");
+        this.loader = useReportLoader();
         this.action = useService("action");
         this.user = useService("user");
         
@@ -52,7 +55,7 @@ export class CashFlowReport extends Component {
             this.state.isLoading = true;
             this.state.error = null;
 
-            const result = await this.rpc("/web/dataset/call_kw/account.cash.flow.report/get_cash_flow_data", {
+            const result = await this.loader.load((signal) => this.reportData.rpc("/web/dataset/call_kw/account.cash.flow.report/get_cash_flow_data", {
                 model: "account.cash.flow.report",
                 method: "get_cash_flow_data",
                 args: [],
@@ -62,7 +65,7 @@ export class CashFlowReport extends Component {
                     journals: this.state.filters.journal_ids.length > 0 ? this.state.filters.journal_ids : null,
                     company_id: this.state.filters.company_id || this.user.context.allowed_company_ids[0]
                 }
-            });
+            }, { signal, cache: this.state.filters.posted_entries, onUpdate: () => this.loadReport() }));
 
             if (result.error) {
                 throw new Error(result.error);
@@ -220,4 +223,4 @@ export class CashFlowReport extends Component {
     }
 }
 
-registry.category("actions").add("account_cash_flow_report", CashFlowReport);
\ No newline at end of file
+registry.category("actions").add("account_cash_flow_report", CashFlowReport, { force: true });
\ No newline at end of file
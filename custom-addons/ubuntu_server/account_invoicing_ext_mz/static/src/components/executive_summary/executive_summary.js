@@ -3,12 +3,17 @@
 import { Component, useState, onWillStart } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
+import { useReportLoader } from "@account_invoicing_ext_mz/services/report_data_service";
+import { loadConsolidationCurrencies } from "@account_invoicing_ext_mz/utils/consolidation";
 
 export class ExecutiveSummaryReport extends Component {
     static template = "account_invoicing_ext_mz.ExecutiveSummaryReport";
 
     setup() {
         this.rpc = useService("rpc");
+        this.orm = useService("orm");
+        this.reportData = useService("report_data");
+        this.loader = useReportLoader();
         this.action = useService("action");
         this.user = useService("user");
         
@@ -17,12 +22,15 @@ export class ExecutiveSummaryReport extends Component {
             isLoading: true,
             error: null,
             currencySymbol: 'MZN',
+            currencies: [],
             filters: {
                 date_from: null,
                 date_to: this.getCurrentYearRange(),
                 comparison: null,
                 company_id: null,
-                posted_entries: true
+                posted_entries: true,
+                consolidate: false,
+                currency_id: null
             },
             unpostedWarning: false
         });
@@ -63,7 +71,7 @@ export class ExecutiveSummaryReport extends Component {
                 }
             }
 
-            const result = await this.rpc("/web/dataset/call_kw/account.executive.summary.report/get_executive_summary_data", {
+            const result = await this.loader.load((signal) => this.reportData.rpc("/web/dataset/call_kw/account.executive.summary.report/get_executive_summary_data", {
                 model: "account.executive.summary.report",
                 method: "get_executive_summary_data",
                 args: [],
@@ -71,9 +79,12 @@ export class ExecutiveSummaryReport extends Component {
                     date_from: date_from,
                     date_to: date_to,
                     comparison: this.state.filters.comparison,
-                    company_id: this.state.filters.company_id || this.user.context.allowed_company_ids[0]
+                    company_id: this.state.filters.company_id || this.user.context.allowed_company_ids[0],
+                    // Several companies selected in the switcher: consolidated on request
+                    company_ids: this.consolidating ? this.user.context.allowed_company_ids : null,
+                    currency_id: this.consolidating ? this.state.filters.currency_id : null
                 }
-            });
+            }, { signal, cache: this.state.filters.posted_entries, onUpdate: () => this.loadReport() }));
 
             if (result.error) {
                 throw new Error(result.error);
@@ -148,6 +159,30 @@ export class ExecutiveSummaryReport extends Component {
         console.log("Comparison filter clicked");
     }
 
+    get canConsolidate() {
+        return this.user.context.allowed_company_ids.length > 1;
+    }
+
+    get consolidating() {
+        return this.state.filters.consolidate && this.canConsolidate;
+    }
+
+    async onConsolidateToggle() {
+        if (!this.state.currencies.length) {
+            const { currencies, currencyId } = await loadConsolidationCurrencies(
+                this.orm, this.user.context.allowed_company_ids[0]);
+            this.state.currencies = currencies;
+            this.state.filters.currency_id = currencyId;
+        }
+        this.state.filters.consolidate = !this.state.filters.consolidate;
+        await this.loadReport();
+    }
+
+    async onCurrencyChange(ev) {
+        this.state.filters.currency_id = parseInt(ev.target.value);
+        await this.loadReport();
+    }
+
     async onPostedEntriesToggle() {
         this.state.filters.posted_entries = !this.state.filters.posted_entries;
         await this.loadReport();
@@ -202,4 +237,4 @@ export class ExecutiveSummaryReport extends Component {
     }
 }
 
-registry.category("actions").add("account_executive_summary_report", ExecutiveSummaryReport);
\ No newline at end of file
+registry.category("actions").add("account_executive_summary_report", ExecutiveSummaryReport, { force: true });
\ No newline at end of file
@@ -3,12 +3,18 @@
 import { Component, useState, onWillStart } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
+import { useReportLoader } from "@account_invoicing_ext_mz/services/report_data_service";
+import { VirtualTable } from "@account_invoicing_ext_mz/components/virtual_table/virtual_table";
 
 export class GeneralLedgerReport extends Component {
     static template = "account_invoicing_ext_mz.GeneralLedgerReport";
+    static components = { VirtualTable };
 
     setup() {
         this.rpc = useService("rpc");
+        this.orm = useService("orm");
+        this.reportData = useService("report_data");
+        this.loader = useReportLoader();
         this.action = useService("action");
         this.user = useService("user");
         
@@ -20,8 +26,11 @@ export class GeneralLedgerReport extends Component {
             isLoading: true,
             error: null,
             expandedAccounts: new Set(),
+            loadId: 0,
             currencySymbol: 'MZN',
             searchQuery: '',
+            amountMin: '',
+            amountMax: '',
             filters: {
                 date_from: this.getDefaultDateFrom(),
                 date_to: this.getDefaultDateTo(),
@@ -29,13 +38,17 @@ export class GeneralLedgerReport extends Component {
                 journal_ids: [],
                 analytic: null,
                 posted_entries: true,
-                company_id: null
+                company_id: null,
+                currency_id: null
             },
+            currencies: [],
+            currencyTotals: [],
+            companyCurrency: '',
             unpostedWarning: false
         });
 
         onWillStart(async () => {
-            await this.loadReport();
+            await Promise.all([this.loadCurrencies(), this.loadReport()]);
         });
     }
 
@@ -62,29 +75,33 @@ export class GeneralLedgerReport extends Component {
             this.state.isLoading = true;
             this.state.error = null;
 
-            const result = await this.rpc("/web/dataset/call_kw/account.general.ledger.report/get_general_ledger_data", {
-                model: "account.general.ledger.report",
-                method: "get_general_ledger_data",
-                args: [],
-                kwargs: {
-                    date_from: this.state.filters.date_from,
-                    date_to: this.state.filters.date_to,
-                    journals: this.state.filters.journal_ids.length > 0 ? this.state.filters.journal_ids : null,
-                    analytic: this.state.filters.analytic,
-                    posted_entries: this.state.filters.posted_entries,
-                    company_id: this.state.filters.company_id || this.user.context.allowed_company_ids[0]
-                }
-            });
+            const result = await this.loader.load((signal) => this.reportData.columnar("general_ledger", {
+                date_from: this.state.filters.date_from,
+                date_to: this.state.filters.date_to,
+                journals: this.state.filters.journal_ids.length > 0 ? this.state.filters.journal_ids : null,
+                analytic: this.state.filters.analytic,
+                posted_entries: this.state.filters.posted_entries,
+                company_id: this.state.filters.company_id || this.user.context.allowed_company_ids[0],
+                search: this.state.searchQuery || null,
+                amount_min: this.state.amountMin || null,
+                amount_max: this.state.amountMax || null,
+                currency_id: this.state.filters.currency_id,
+                include_lines: false
+            }, { groupKey: "accounts", childKey: "lines", signal, cache: this.state.filters.posted_entries, onUpdate: () => this.loadReport() }));
 
             if (result.error) {
                 throw new Error(result.error);
             }
 
             this.state.accounts = result.accounts || [];
+            // Remount the expanded tables so they drop pages of the previous load
+            this.state.loadId++;
             this.state.totalDebit = result.total_debit || 0;
             this.state.totalCredit = result.total_credit || 0;
             this.state.totalBalance = result.total_balance || 0;
             this.state.currencySymbol = result.currency_symbol || 'MZN';
+            this.state.currencyTotals = result.currency_totals || [];
+            this.state.companyCurrency = result.company_currency || '';
             this.state.unpostedWarning = result.unposted_warning || false;
 
         } catch (error) {
@@ -107,16 +124,34 @@ export class GeneralLedgerReport extends Component {
         return this.state.expandedAccounts.has(accountId);
     }
 
-    getFilteredAccounts() {
-        if (!this.state.searchQuery) {
-            return this.state.accounts;
+    async fetchAccountLines(account, offset, limit) {
+        const result = await this.rpc("/web/dataset/call_kw/account.general.ledger.report/get_general_ledger_lines", {
+            model: "account.general.ledger.report",
+            method: "get_general_ledger_lines",
+            args: [account.account_id],
+            kwargs: {
+                offset,
+                limit,
+                date_from: this.state.filters.date_from,
+                date_to: this.state.filters.date_to,
+                journals: this.state.filters.journal_ids.length > 0 ? this.state.filters.journal_ids : null,
+                posted_entries: this.state.filters.posted_entries,
+                company_id: this.state.filters.company_id || this.user.context.allowed_company_ids[0],
+                search: this.state.searchQuery || null,
+                amount_min: this.state.amountMin || null,
+                amount_max: this.state.amountMax || null,
+                currency_id: this.state.filters.currency_id
+            }
+        });
+        if (result.error) {
+            throw new Error(result.error);
         }
-        
-        const query = this.state.searchQuery.toLowerCase();
-        return this.state.accounts.filter(account => 
-            account.code.toLowerCase().includes(query) || 
-            account.name.toLowerCase().includes(query)
-        );
+        return result.lines;
+    }
+
+    getFilteredAccounts() {
+        // Search and amount range are already applied by the server
+        return this.state.accounts;
     }
 
     formatCurrency(amount) {
@@ -133,6 +168,17 @@ export class GeneralLedgerReport extends Component {
 
     async onSearchChange(ev) {
         this.state.searchQuery = ev.target.value;
+        await this.loadReport();
+    }
+
+    async onAmountMinChange(ev) {
+        this.state.amountMin = ev.target.value;
+        await this.loadReport();
+    }
+
+    async onAmountMaxChange(ev) {
+        this.state.amountMax = ev.target.value;
+        await this.loadReport();
     }
 
     async onDateFromChange(ev) {
@@ -161,6 +207,27 @@ export class GeneralLedgerReport extends Component {
         console.log("Analytic filter clicked");
     }
 
+    async loadCurrencies() {
+        try {
+            this.state.currencies = await this.orm.searchRead("res.currency", [], ["id", "name"], { order: "name" });
+        } catch (error) {
+            console.error("Error loading currencies:", error);
+        }
+    }
+
+    async onCurrencyChange(ev) {
+        this.state.filters.currency_id = ev.target.value ? parseInt(ev.target.value) : null;
+        await this.loadReport();
+    }
+
+    hasForeignCurrency(currencyTotals) {
+        return (currencyTotals || []).some((subtotal) => subtotal.currency && subtotal.currency !== this.state.companyCurrency);
+    }
+
+    formatSignedCurrency(amount) {
+        return (amount < 0 ? '-' : '') + this.formatCurrency(amount);
+    }
+
     async onPostedEntriesToggle() {
         this.state.filters.posted_entries = !this.state.filters.posted_entries;
         await this.loadReport();
@@ -225,4 +292,4 @@ export class GeneralLedgerReport extends Component {
     }
 }
 
-registry.category("actions").add("account_general_ledger_report", GeneralLedgerReport);
\ No newline at end of file
+registry.category("actions").add("account_general_ledger_report", GeneralLedgerReport, { force: true });
\ No newline at end of file
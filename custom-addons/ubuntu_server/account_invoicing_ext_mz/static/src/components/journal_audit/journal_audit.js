@@ -3,12 +3,15 @@
 import { Component, useState, onWillStart } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
+import { useReportLoader } from "@account_invoicing_ext_mz/services/report_data_service";
 
 export class JournalAuditReport extends Component {
     static template = "account_invoicing_ext_mz.JournalAuditReport";
 
     setup() {
         this.rpc = useService("rpc");
+        this.reportData = useService("report_data");
+        this.loader = useReportLoader();
         this.action = useService("action");
         this.user = useService("user");
         
@@ -72,18 +75,13 @@ export class JournalAuditReport extends Component {
                 }
             }
 
-            const result = await this.rpc("/web/dataset/call_kw/account.journal.audit.report/get_journal_audit_data", {
-                model: "account.journal.audit.report",
-                method: "get_journal_audit_data",
-                args: [],
-                kwargs: {
-                    date_from: date_from,
-                    date_to: date_to,
-                    journals: this.state.filters.journal_ids.length > 0 ? this.state.filters.journal_ids : null,
-                    posted_entries: this.state.filters.posted_entries,
-                    company_id: this.state.filters.company_id || this.user.context.allowed_company_ids[0]
-                }
-            });
+            const result = await this.loader.load((signal) => this.reportData.columnar("journal_audit", {
+                date_from: date_from,
+                date_to: date_to,
+                journals: this.state.filters.journal_ids.length > 0 ? this.state.filters.journal_ids : null,
+                posted_entries: this.state.filters.posted_entries,
+                company_id: this.state.filters.company_id || this.user.context.allowed_company_ids[0]
+            }, { groupKey: "journals", childKey: "moves", signal, cache: this.state.filters.posted_entries, onUpdate: () => this.loadReport() }));
 
             if (result.error) {
                 throw new Error(result.error);
@@ -201,4 +199,4 @@ export class JournalAuditReport extends Component {
     }
 }
 
-registry.category("actions").add("account_journal_audit_report", JournalAuditReport);
\ No newline at end of file
+registry.category("actions").add("account_journal_audit_report", JournalAuditReport, { force: true });
\ No newline at end of file
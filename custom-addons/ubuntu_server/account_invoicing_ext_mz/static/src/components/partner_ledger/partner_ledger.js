@@ -3,12 +3,18 @@
 import { Component, useState, onWillStart } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
+import { useReportLoader } from "@account_invoicing_ext_mz/services/report_data_service";
+import { VirtualTable } from "@account_invoicing_ext_mz/components/virtual_table/virtual_table";
 
 export class PartnerLedgerReport extends Component {
     static template = "account_invoicing_ext_mz.PartnerLedgerReport";
+    static components = { VirtualTable };
 
     setup() {
         this.rpc = useService("rpc");
+        this.orm = useService("orm");
+        this.reportData = useService("report_data");
+        this.loader = useReportLoader();
         this.action = useService("action");
         this.user = useService("user");
         
@@ -22,20 +28,28 @@ export class PartnerLedgerReport extends Component {
             isLoading: true,
             error: null,
             expandedPartners: new Set(),
+            loadId: 0,
             currencySymbol: 'MT',
+            searchQuery: '',
+            amountMin: '',
+            amountMax: '',
             filters: {
                 date_from: this.getDefaultDateFrom(),
                 date_to: this.getDefaultDateTo(),
                 partner_ids: [],
                 account_type: 'all', // all, receivable, payable
                 posted_entries: true,
-                company_id: null
+                company_id: null,
+                currency_id: null
             },
+            currencies: [],
+            currencyTotals: [],
+            companyCurrency: '',
             unpostedWarning: false
         });
 
         onWillStart(async () => {
-            await this.loadReport();
+            await Promise.all([this.loadCurrencies(), this.loadReport()]);
         });
     }
 
@@ -63,27 +77,31 @@ export class PartnerLedgerReport extends Component {
             this.state.isLoading = true;
             this.state.error = null;
 
-            const result = await this.rpc("/web/dataset/call_kw/account.partner.ledger.report/get_partner_ledger_data", {
-                model: "account.partner.ledger.report",
-                method: "get_partner_ledger_data",
-                args: [],
-                kwargs: {
-                    date_from: this.state.filters.date_from,
-                    date_to: this.state.filters.date_to,
-                    partner_ids: this.state.filters.partner_ids.length > 0 ? this.state.filters.partner_ids : null,
-                    account_type: this.state.filters.account_type,
-                    posted_entries: this.state.filters.posted_entries,
-                    company_id: this.state.filters.company_id || this.user.context.allowed_company_ids[0]
-                }
-            });
+            const result = await this.loader.load((signal) => this.reportData.columnar("partner_ledger", {
+                date_from: this.state.filters.date_from,
+                date_to: this.state.filters.date_to,
+                partner_ids: this.state.filters.partner_ids.length > 0 ? this.state.filters.partner_ids : null,
+                account_type: this.state.filters.account_type,
+                posted_entries: this.state.filters.posted_entries,
+                company_id: this.state.filters.company_id || this.user.context.allowed_company_ids[0],
+                search: this.state.searchQuery || null,
+                amount_min: this.state.amountMin || null,
+                amount_max: this.state.amountMax || null,
+                currency_id: this.state.filters.currency_id,
+                include_lines: false
+            }, { groupKey: "partners", childKey: "lines", signal, cache: this.state.filters.posted_entries, onUpdate: () => this.loadReport() }));
 
             if (result.error) {
                 throw new Error(result.error);
             }
 
             this.state.partners = result.partners || [];
+            // Remount the expanded tables so they drop pages of the previous load
+            this.state.loadId++;
             this.state.totals = result.totals || { debit: 0.0, credit: 0.0, balance: 0.0 };
             this.state.currencySymbol = result.currency_symbol || 'MT';
+            this.state.currencyTotals = result.currency_totals || [];
+            this.state.companyCurrency = result.company_currency || '';
             this.state.unpostedWarning = result.unposted_warning || false;
 
         } catch (error) {
@@ -106,6 +124,31 @@ export class PartnerLedgerReport extends Component {
         return this.state.expandedPartners.has(partnerId);
     }
 
+    async fetchPartnerLines(partner, offset, limit) {
+        const result = await this.rpc("/web/dataset/call_kw/account.partner.ledger.report/get_partner_ledger_lines", {
+            model: "account.partner.ledger.report",
+            method: "get_partner_ledger_lines",
+            args: [partner.partner_id],
+            kwargs: {
+                offset,
+                limit,
+                date_from: this.state.filters.date_from,
+                date_to: this.state.filters.date_to,
+                account_type: this.state.filters.account_type,
+                posted_entries: this.state.filters.posted_entries,
+                company_id: this.state.filters.company_id || this.user.context.allowed_company_ids[0],
+                search: this.state.searchQuery || null,
+                amount_min: this.state.amountMin || null,
+                amount_max: this.state.amountMax || null,
+                currency_id: this.state.filters.currency_id
+            }
+        });
+        if (result.error) {
+            throw new Error(result.error);
+        }
+        return result.lines;
+    }
+
     formatCurrency(amount) {
         if (amount === undefined || amount === null) return '0,00';
         return new Intl.NumberFormat('pt-MZ', {
@@ -114,6 +157,21 @@ export class PartnerLedgerReport extends Component {
         }).format(Math.abs(amount));
     }
 
+    async onSearchChange(ev) {
+        this.state.searchQuery = ev.target.value;
+        await this.loadReport();
+    }
+
+    async onAmountMinChange(ev) {
+        this.state.amountMin = ev.target.value;
+        await this.loadReport();
+    }
+
+    async onAmountMaxChange(ev) {
+        this.state.amountMax = ev.target.value;
+        await this.loadReport();
+    }
+
     async onDateFromChange(ev) {
         this.state.filters.date_from = ev.target.value;
         await this.loadReport();
@@ -129,6 +187,27 @@ export class PartnerLedgerReport extends Component {
         await this.loadReport();
     }
 
+    async loadCurrencies() {
+        try {
+            this.state.currencies = await this.orm.searchRead("res.currency", [], ["id", "name"], { order: "name" });
+        } catch (error) {
+            console.error("Error loading currencies:", error);
+        }
+    }
+
+    async onCurrencyChange(ev) {
+        this.state.filters.currency_id = ev.target.value ? parseInt(ev.target.value) : null;
+        await this.loadReport();
+    }
+
+    hasForeignCurrency(currencyTotals) {
+        return (currencyTotals || []).some((subtotal) => subtotal.currency && subtotal.currency !== this.state.companyCurrency);
+    }
+
+    formatSignedCurrency(amount) {
+        return (amount < 0 ? '-' : '') + this.formatCurrency(amount);
+    }
+
     async onPostedEntriesToggle() {
         this.state.filters.posted_entries = !this.state.filters.posted_entries;
         await this.loadReport();
@@ -190,4 +269,4 @@ export class PartnerLedgerReport extends Component {
     }
 }
 
-registry.category("actions").add("account_partner_ledger_report", PartnerLedgerReport);
\ No newline at end of file
+registry.category("actions").add("account_partner_ledger_report", PartnerLedgerReport, { force: true });
\ No newline at end of file
@@ -3,6 +3,8 @@
 import { Component, useState, onWillStart, onMounted } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
+import { useReportLoader } from "@account_invoicing_ext_mz/services/report_data_service";
+import { loadConsolidationCurrencies } from "@account_invoicing_ext_mz/utils/consolidation";
 
 export class ProfitLossReport extends Component {
     static template = "account_invoicing_ext_mz.ProfitLossReport";
@@ -14,6 +16,8 @@ export class ProfitLossReport extends Component {
         this.orm = useService("orm");
         this.action = useService("action");
         this.rpc = useService("rpc");
+        this.reportData = useService("report_data");
+        this.loader = useReportLoader();
         this.notification = useService("notification");
         this.user = useService("user");
         
@@ -43,6 +47,9 @@ export class ProfitLossReport extends Component {
             includeDraft: false,
             includeSimulations: false,
             hideZeroBalances: false,
+            consolidate: false,
+            currencyId: null,
+            currencies: [],
             splitHorizontally: false,
             showBudget: false,
             filters: {
@@ -95,31 +102,47 @@ export class ProfitLossReport extends Component {
         }
     }
     
-    async loadProfitLossData() {
+    /**
+     * Report filters; those of the loaded report are also sent with
+     * /account/reports/unfold, to recompute a line whose stored children expired
+     */
+    getReportParams() {
+        return {
+            date_from: this.state.date_from,
+            date_to: this.state.date_to,
+            journals: this.state.allJournals ? null : this.state.filters.journals,
+            company_id: this.user.context.company_id || false,
+            // Several companies selected in the switcher: consolidated on request
+            company_ids: this.consolidating ? this.user.context.allowed_company_ids : null,
+            currency_id: this.consolidating ? this.state.currencyId : null,
+            comparison: this.state.comparison,
+            comparison_date_from: this.state.comparisonDateFrom,
+            comparison_date_to: this.state.comparisonDateTo,
+            comparison_mode: this.state.comparisonMode,
+            only_posted: this.state.onlyPosted,
+            include_draft: this.state.includeDraft,
+            include_simulations: this.state.includeSimulations,
+            hide_zero: this.state.hideZeroBalances,
+            analytic_accounts: this.state.analyticAccounts,
+            analytic_plans: this.state.analyticPlans,
+            partners: this.state.showPartners ? this.state.partners : null,
+        };
+    }
+    
+    async loadProfitLossData({ refresh = false } = {}) {
         this.state.loading = true;
         this.state.error = null;
         
         try {
-            const result = await this.rpc("/account/profit_loss/data", {
-                date_from: this.state.date_from,
-                date_to: this.state.date_to,
-                journals: this.state.allJournals ? null : this.state.filters.journals,
-                company_id: this.user.context.company_id || false,
-                comparison: this.state.comparison,
-                comparison_date_from: this.state.comparisonDateFrom,
-                comparison_date_to: this.state.comparisonDateTo,
-                comparison_mode: this.state.comparisonMode,
-                only_posted: this.state.onlyPosted,
-                include_draft: this.state.includeDraft,
-                include_simulations: this.state.includeSimulations,
-                hide_zero: this.state.hideZeroBalances,
-                analytic_accounts: this.state.analyticAccounts,
-                analytic_plans: this.state.analyticPlans,
-                partners: this.state.showPartners ? this.state.partners : null,
-            });
+            const params = this.getReportParams();
+            const result = await this.loader.load((signal) => this.reportData.rpc("/account/profit_loss/data", {
+                ...params,
+                lazy: true,
+            }, { signal, cache: this.state.onlyPosted && !this.state.includeDraft, refresh, onUpdate: () => this.loadProfitLossData() }));
             
             if (result.success) {
                 this.state.data = result.data;
+                this.loadedParams = params;
                 this.state.hasUnposted = result.data.has_unposted || false;
                 
                 // Auto-expand first level
@@ -151,7 +174,7 @@ export class ProfitLossReport extends Component {
             
             // Load detailed accounts if needed
             const line = this.findLine(lineId);
-            if (line && !line.children_loaded) {
+            if (line && line.lazy && !line.children_loaded) {
                 this.loadLineDetails(lineId);
             }
         }
@@ -159,12 +182,11 @@ export class ProfitLossReport extends Component {
     
     async loadLineDetails(lineId) {
         try {
-            const result = await this.rpc("/account/profit_loss/expand_line", {
+            const result = await this.rpc("/account/reports/unfold", {
+                report: "profit_loss",
+                unfold_key: this.state.data.unfold_key,
                 line_id: lineId,
-                date_from: this.state.date_from,
-                date_to: this.state.date_to,
-                journals: this.state.allJournals ? null : this.state.filters.journals,
-                company_id: this.user.context.company_id || false,
+                params: this.loadedParams,
             });
             
             if (result.success) {
@@ -172,6 +194,7 @@ export class ProfitLossReport extends Component {
                 if (line) {
                     line.children = result.sub_lines;
                     line.children_loaded = true;
+                    // Force re-render
                     this.state.data = { ...this.state.data };
                 }
             }
@@ -376,6 +399,9 @@ export class ProfitLossReport extends Component {
                 lines.forEach(line => {
                     if (line.unfoldable) {
                         this.state.expandedLines.add(line.id);
+                        if (line.lazy && !line.children_loaded) {
+                            this.loadLineDetails(line.id);
+                        }
                         if (line.children) {
                             expandAllLines(line.children);
                         }
@@ -387,6 +413,27 @@ export class ProfitLossReport extends Component {
         }
     }
     
+    get canConsolidate() {
+        return this.user.context.allowed_company_ids.length > 1;
+    }
+    
+    get consolidating() {
+        return this.state.consolidate && this.canConsolidate;
+    }
+    
+    async toggleConsolidate() {
+        if (!this.state.currencies.length) {
+            Object.assign(this.state, await loadConsolidationCurrencies(this.orm, this.user.context.allowed_company_ids[0]));
+        }
+        this.state.consolidate = !this.state.consolidate;
+        await this.loadProfitLossData();
+    }
+    
+    async onCurrencyChange(ev) {
+        this.state.currencyId = parseInt(ev.target.value);
+        await this.loadProfitLossData();
+    }
+    
     async toggleHideZero() {
         this.state.hideZeroBalances = !this.state.hideZeroBalances;
         await this.loadProfitLossData();
@@ -448,4 +495,4 @@ export class ProfitLossReport extends Component {
 }
 
 // Register the component as a client action
-registry.category("actions").add("account_profit_loss_report", ProfitLossReport);
\ No newline at end of file
+registry.category("actions").add("account_profit_loss_report", ProfitLossReport, { force: true });
\ No newline at end of file
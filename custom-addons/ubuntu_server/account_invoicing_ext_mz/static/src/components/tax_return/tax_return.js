@@ -3,12 +3,15 @@
 import { Component, useState, onWillStart } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
+import { useReportLoader } from "@account_invoicing_ext_mz/services/report_data_service";
 
 export class TaxReturnReport extends Component {
     static template = "account_invoicing_ext_mz.TaxReturnReport";
 
     setup() {
         this.rpc = useService("rpc");
+        this.reportData = useService("report_data");
+        this.loader = useReportLoader();
         this.action = useService("action");
         this.user = useService("user");
         
@@ -52,7 +55,7 @@ export class TaxReturnReport extends Component {
             this.state.isLoading = true;
             this.state.error = null;
 
-            const result = await this.rpc("/web/dataset/call_kw/account.tax.return.report/get_tax_return_data", {
+            const result = await this.loader.load((signal) => this.reportData.rpc("/web/dataset/call_kw/account.tax.return.report/get_tax_return_data", {
                 model: "account.tax.return.report",
                 method: "get_tax_return_data",
                 args: [],
@@ -62,7 +65,7 @@ export class TaxReturnReport extends Component {
                     comparison: this.state.filters.comparison,
                     company_id: this.state.filters.company_id || this.user.context.allowed_company_ids[0]
                 }
-            });
+            }, { signal, cache: this.state.filters.posted_entries, onUpdate: () => this.loadReport() }));
 
             if (result.error) {
                 throw new Error(result.error);
@@ -177,4 +180,4 @@ export class TaxReturnReport extends Component {
     }
 }
 
-registry.category("actions").add("account_tax_return_report", TaxReturnReport);
\ No newline at end of file
+registry.category("actions").add("account_tax_return_report", TaxReturnReport, { force: true });
\ No newline at end of file
@@ -3,17 +3,24 @@
 import { Component, useState, onWillStart } from "@odoo/owl";
 import { registry } from "@web/core/registry";
 import { useService } from "@web/core/utils/hooks";
+import { useReportLoader } from "@account_invoicing_ext_mz/services/report_data_service";
+import { loadConsolidationCurrencies } from "@account_invoicing_ext_mz/utils/consolidation";
 
 export class TrialBalanceReport extends Component {
     static template = "account_invoicing_ext_mz.TrialBalanceReport";
 
     setup() {
         this.rpc = useService("rpc");
+        this.orm = useService("orm");
+        this.reportData = useService("report_data");
+        this.loader = useReportLoader();
         this.action = useService("action");
         this.user = useService("user");
         
         this.state = useState({
             accounts: [],
+            groups: [],
+            expandedGroups: new Set(),
             totals: {
                 initial_debit: 0,
                 initial_credit: 0,
@@ -25,6 +32,7 @@ export class TrialBalanceReport extends Component {
             isLoading: true,
             error: null,
             currencySymbol: 'MZN',
+            currencies: [],
             searchQuery: '',
             filters: {
                 date_from: null,
@@ -32,9 +40,12 @@ export class TrialBalanceReport extends Component {
                 journals: 'all',
                 journal_ids: [],
                 analytic: null,
+                consolidate: false,
+                currency_id: null,
                 posted_entries: true,
                 comparison: null,
-                company_id: null
+                company_id: null,
+                account_groups: false
             },
             unpostedWarning: false
         });
@@ -61,7 +72,7 @@ export class TrialBalanceReport extends Component {
             this.state.isLoading = true;
             this.state.error = null;
 
-            const result = await this.rpc("/web/dataset/call_kw/account.trial.balance.report/get_trial_balance_data", {
+            const result = await this.loader.load((signal) => this.reportData.rpc("/web/dataset/call_kw/account.trial.balance.report/get_trial_balance_data", {
                 model: "account.trial.balance.report",
                 method: "get_trial_balance_data",
                 args: [],
@@ -72,15 +83,20 @@ export class TrialBalanceReport extends Component {
                     analytic: this.state.filters.analytic,
                     posted_entries: this.state.filters.posted_entries,
                     comparison: this.state.filters.comparison,
-                    company_id: this.state.filters.company_id || this.user.context.allowed_company_ids[0]
+                    company_id: this.state.filters.company_id || this.user.context.allowed_company_ids[0],
+                    account_groups: this.state.filters.account_groups,
+                    // Several companies selected in the switcher: consolidated on request
+                    company_ids: this.consolidating ? this.user.context.allowed_company_ids : null,
+                    currency_id: this.consolidating ? this.state.filters.currency_id : null
                 }
-            });
+            }, { signal, cache: this.state.filters.posted_entries, onUpdate: () => this.loadReport() }));
 
             if (result.error) {
                 throw new Error(result.error);
             }
 
             this.state.accounts = result.accounts || [];
+            this.state.groups = result.groups || [];
             this.state.totals = result.totals || {
                 initial_debit: 0,
                 initial_credit: 0,
@@ -112,6 +128,42 @@ export class TrialBalanceReport extends Component {
         );
     }
 
+    /**
+     * Rows to display: the accounts nested in their account groups (expanded
+     * groups only) when grouping, otherwise the flat, searchable account list
+     */
+    getRows() {
+        if (!this.state.filters.account_groups || this.state.searchQuery) {
+            return this.getFilteredAccounts();
+        }
+        const rows = [];
+        const visit = (lines) => {
+            for (const line of lines) {
+                rows.push(line);
+                if (line.is_group && this.state.expandedGroups.has(line.id)) {
+                    visit(line.children);
+                }
+            }
+        };
+        visit(this.state.groups);
+        return rows;
+    }
+
+    toggleGroup(groupId) {
+        const expanded = new Set(this.state.expandedGroups);
+        if (expanded.has(groupId)) {
+            expanded.delete(groupId);
+        } else {
+            expanded.add(groupId);
+        }
+        this.state.expandedGroups = expanded;
+    }
+
+    async onAccountGroupsToggle() {
+        this.state.filters.account_groups = !this.state.filters.account_groups;
+        await this.loadReport();
+    }
+
     formatCurrency(amount) {
         if (amount === undefined || amount === null || amount === 0) return '';
         return new Intl.NumberFormat('pt-MZ', {
@@ -153,6 +205,30 @@ export class TrialBalanceReport extends Component {
         console.log("Analytic filter clicked");
     }
 
+    get canConsolidate() {
+        return this.user.context.allowed_company_ids.length > 1;
+    }
+
+    get consolidating() {
+        return this.state.filters.consolidate && this.canConsolidate;
+    }
+
+    async onConsolidateToggle() {
+        if (!this.state.currencies.length) {
+            const { currencies, currencyId } = await loadConsolidationCurrencies(
+                this.orm, this.user.context.allowed_company_ids[0]);
+            this.state.currencies = currencies;
+            this.state.filters.currency_id = currencyId;
+        }
+        this.state.filters.consolidate = !this.state.filters.consolidate;
+        await this.loadReport();
+    }
+
+    async onCurrencyChange(ev) {
+        this.state.filters.currency_id = parseInt(ev.target.value);
+        await this.loadReport();
+    }
+
     async onPostedEntriesToggle() {
         this.state.filters.posted_entries = !this.state.filters.posted_entries;
         await this.loadReport();
@@ -209,4 +285,4 @@ export class TrialBalanceReport extends Component {
     }
 }
 
-registry.category("actions").add("account_trial_balance_report", TrialBalanceReport);
\ No newline at end of file
+registry.category("actions").add("account_trial_balance_report", TrialBalanceReport, { force: true });
\ No newline at end of file
@@ -0,0 +1,119 @@
+/** @odoo-module **/
+
+import { Component, useState, onWillStart } from "@odoo/owl";
+
+/**
+ * Windowed rows for the report tables.
+ *
+ * Renders as a single <tr> spanning the parent table, holding a scrollable
+ * inner table where only the rows in view (plus an overscan margin) exist in
+ * the DOM. Rows come either from `rows` (already in memory) or page by page
+ * from `fetchRows(offset, limit)` as the user scrolls.
+ *
+ * Usage:
+ *   <VirtualTable colspan="8" rowCount="account.line_count"
+ *                 fetchRows="(offset, limit) => this.fetchAccountLines(account, offset, limit)">
+ *       <t t-set-slot="row" t-slot-scope="scope"><tr>...scope.row...</tr></t>
+ *   </VirtualTable>
+ */
+export class VirtualTable extends Component {
+    static template = "account_invoicing_ext_mz.VirtualTable";
+    static props = {
+        colspan: { type: [Number, String] },
+        rowCount: { type: Number },
+        rows: { type: Array, optional: true },
+        fetchRows: { type: Function, optional: true },
+        rowHeight: { type: Number, optional: true },
+        maxHeight: { type: Number, optional: true },
+        pageSize: { type: Number, optional: true },
+        overscan: { type: Number, optional: true },
+        slots: { type: Object },
+    };
+    static defaultProps = {
+        rowHeight: 33,
+        maxHeight: 480,
+        pageSize: 200,
+        overscan: 10,
+    };
+
+    setup() {
+        // page index -> rows once loaded, or the pending promise
+        this.pages = new Map();
+        this.state = useState({ firstIndex: 0, loadedPages: 0 });
+
+        onWillStart(() => this.ensureRange(0, this.windowSize));
+    }
+
+    get windowSize() {
+        return Math.ceil(this.props.maxHeight / this.props.rowHeight) + 2 * this.props.overscan;
+    }
+
+    get range() {
+        const start = Math.max(0, this.state.firstIndex - this.props.overscan);
+        const end = Math.min(this.props.rowCount, start + this.windowSize);
+        return { start, end };
+    }
+
+    get viewportHeight() {
+        return Math.min(this.props.maxHeight, this.props.rowCount * this.props.rowHeight);
+    }
+
+    get topPadding() {
+        return this.range.start * this.props.rowHeight;
+    }
+
+    get bottomPadding() {
+        return (this.props.rowCount - this.range.end) * this.props.rowHeight;
+    }
+
+    get visibleRows() {
+        // Reading loadedPages re-renders the window when a page arrives
+        this.state.loadedPages;
+        const { start, end } = this.range;
+        const items = [];
+        for (let index = start; index < end; index++) {
+            items.push({ index, row: this.getRow(index) });
+        }
+        return items;
+    }
+
+    getRow(index) {
+        if (this.props.rows) {
+            return this.props.rows[index];
+        }
+        const page = this.pages.get(Math.floor(index / this.props.pageSize));
+        return Array.isArray(page) ? page[index % this.props.pageSize] : null;
+    }
+
+    ensureRange(start, end) {
+        if (this.props.rows || !this.props.fetchRows || end <= start) {
+            return;
+        }
+        const pageSize = this.props.pageSize;
+        const pending = [];
+        for (let page = Math.floor(start / pageSize); page <= Math.floor((end - 1) / pageSize); page++) {
+            if (!this.pages.has(page)) {
+                const promise = this.props.fetchRows(page * pageSize, pageSize).then((rows) => {
+                    this.pages.set(page, rows || []);
+                    this.state.loadedPages++;
+                }, (error) => {
+                    // Forget the page so scrolling back retries it
+                    this.pages.delete(page);
+                    console.error("Error loading rows:", error);
+                });
+                this.pages.set(page, promise);
+                pending.push(promise);
+            }
+        }
+        return Promise.all(pending);
+    }
+
+    onScroll(ev) {
+        const firstIndex = Math.floor(ev.target.scrollTop / this.props.rowHeight);
+        if (firstIndex !== this.state.firstIndex) {
+            this.state.firstIndex = firstIndex;
+            const { start, end } = this.range;
+            this.ensureRange(start, end);
+        }
+    }
+}
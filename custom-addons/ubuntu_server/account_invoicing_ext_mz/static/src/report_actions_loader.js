@@ -0,0 +1,48 @@
+/** @odoo-module **/
+
+import { registry } from "@web/core/registry";
+import { loadBundle } from "@web/core/assets";
+import { _t } from "@web/core/l10n/translation";
+
+/**
+ * The report components live in the lazy `account_invoicing_ext_mz.assets_reports`
+ * bundle. Each client action tag is registered here with a loader that fetches
+ * the bundle on first use; the bundle then re-registers the tag with the real
+ * component ({ force: true }) and the action is executed again.
+ */
+export const REPORT_BUNDLE = "account_invoicing_ext_mz.assets_reports";
+
+export const REPORT_ACTION_TAGS = [
+    "account_balance_sheet_report",
+    "account_profit_loss_report",
+    "account_cash_flow_report",
+    "account_executive_summary_report",
+    "account_tax_return_report",
+    "account_general_ledger_report",
+    "account_trial_balance_report",
+    "account_journal_audit_report",
+    "account_partner_ledger_report",
+    "account_aged_receivable_report",
+    "account_aged_payable_report",
+];
+
+const actionRegistry = registry.category("actions");
+
+function makeReportActionLoader(tag) {
+    const loader = async (env, action) => {
+        await loadBundle(REPORT_BUNDLE);
+        if (actionRegistry.get(tag) === loader) {
+            // The bundle did not replace the loader (e.g. a crash while loading
+            // it): register an error action so we do not loop on the loader
+            actionRegistry.add(tag, () => {
+                env.services.notification.add(_t("%s couldn't be loaded", tag), { type: "danger" });
+            }, { force: true });
+        }
+        return action;
+    };
+    return loader;
+}
+
+for (const tag of REPORT_ACTION_TAGS) {
+    actionRegistry.add(tag, makeReportActionLoader(tag));
+}
@@ -0,0 +1,117 @@
+/** @odoo-module **/
+
+import { session } from "@web/session";
+
+const DB_NAME = "account_invoicing_ext_mz_reports";
+const STORE = "payloads";
+const MEMORY_ENTRIES = 30;
+const PERSISTED_ENTRIES = 100;
+const MAX_AGE = 7 * 24 * 3600 * 1000;
+
+/**
+ * LRU cache of report payloads: a small in-memory map in front of IndexedDB.
+ *
+ * Entries are {version, payload, at}; `version` is the ledger version read
+ * before the payload was fetched. Keys are scoped to the database and user.
+ * IndexedDB failures (private mode, quota) only disable the persistent tier.
+ */
+export class ReportCache {
+    constructor() {
+        this.memory = new Map();
+        this.dbPromise = null;
+    }
+
+    scopedKey(key) {
+        return `${session.db}/${session.uid}/${key}`;
+    }
+
+    async get(key) {
+        key = this.scopedKey(key);
+        let entry = this.memory.get(key);
+        if (!entry) {
+            entry = await this.idbGet(key);
+            if (!entry || Date.now() - entry.at > MAX_AGE) {
+                return null;
+            }
+        }
+        this.remember(key, entry);
+        return entry;
+    }
+
+    async set(key, version, payload) {
+        key = this.scopedKey(key);
+        const entry = { version, payload, at: Date.now() };
+        this.remember(key, entry);
+        await this.idbPut(key, entry);
+    }
+
+    remember(key, entry) {
+        // Re-inserting moves the key to the most recently used end
+        this.memory.delete(key);
+        this.memory.set(key, entry);
+        while (this.memory.size > MEMORY_ENTRIES) {
+            this.memory.delete(this.memory.keys().next().value);
+        }
+    }
+
+    openDB() {
+        if (!this.dbPromise) {
+            this.dbPromise = new Promise((resolve) => {
+                if (!window.indexedDB) {
+                    resolve(null);
+                    return;
+                }
+                const request = window.indexedDB.open(DB_NAME, 1);
+                request.onupgradeneeded = () => {
+                    const store = request.result.createObjectStore(STORE);
+                    store.createIndex("at", "at");
+                };
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => resolve(null);
+            });
+        }
+        return this.dbPromise;
+    }
+
+    async idbGet(key) {
+        const db = await this.openDB();
+        if (!db) {
+            return null;
+        }
+        return new Promise((resolve) => {
+            const request = db.transaction(STORE).objectStore(STORE).get(key);
+            request.onsuccess = () => resolve(request.result || null);
+            request.onerror = () => resolve(null);
+        });
+    }
+
+    async idbPut(key, entry) {
+        const db = await this.openDB();
+        if (!db) {
+            return;
+        }
+        await new Promise((resolve) => {
+            const transaction = db.transaction(STORE, "readwrite");
+            const store = transaction.objectStore(STORE);
+            store.put(entry, key);
+            // Drop the least recently written entries beyond the limit
+            const count = store.count();
+            count.onsuccess = () => {
+                let excess = count.result - PERSISTED_ENTRIES;
+                if (excess <= 0) {
+                    return;
+                }
+                store.index("at").openCursor().onsuccess = (ev) => {
+                    const cursor = ev.target.result;
+                    if (cursor && excess-- > 0) {
+                        cursor.delete();
+                        cursor.continue();
+                    }
+                };
+            };
+            transaction.oncomplete = resolve;
+            transaction.onerror = resolve;
+            transaction.onabort = resolve;
+        });
+    }
+}
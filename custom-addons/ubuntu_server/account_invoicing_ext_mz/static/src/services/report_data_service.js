@@ -0,0 +1,254 @@
+/** @odoo-module **/
+
+import { onMounted, onWillUnmount } from "@odoo/owl";
+import { registry } from "@web/core/registry";
+import { KeepLast } from "@web/core/utils/concurrency";
+import { useService } from "@web/core/utils/hooks";
+import { session } from "@web/session";
+import { decodeReport, fetchColumnarReport } from "@account_invoicing_ext_mz/utils/columnar";
+import { ReportCache } from "@account_invoicing_ext_mz/services/report_cache";
+
+const DEFAULT_DELAY = 300;
+// How long a ledger version answer is reused by background revalidations
+const VERSION_TTL = 2000;
+// Posting deltas, see account.move._send_ledger_deltas
+const LEDGER_DELTA_CHANNEL = "account_report_deltas";
+const LEDGER_DELTA_NOTIFICATION = "account_invoicing_ext_mz/ledger_delta";
+
+/**
+ * JSON with sorted object keys, so equal filters give equal request keys.
+ */
+export function stableStringify(value) {
+    return JSON.stringify(value, (key, val) => {
+        if (val && typeof val === "object" && !Array.isArray(val)) {
+            return Object.fromEntries(Object.keys(val).sort().map((k) => [k, val[k]]));
+        }
+        return val;
+    });
+}
+
+/**
+ * Report data requests shared by the report components.
+ *
+ * - identical in-flight requests share one promise (and one server call);
+ * - a shared call is aborted once every caller has aborted it;
+ * - loaders debounce filter edits and only deliver the latest result,
+ *   aborting the request they supersede;
+ * - with `cache: true` payloads are served from the browser cache at once
+ *   and revalidated in the background against the server ledger version,
+ *   which only tracks posted entries (reports including drafts are not cached);
+ *   `onUpdate` is called when a newer payload has been stored; `refresh`
+ *   skips the cached entry but stores the new payload;
+ * - `onLedgerDelta` delivers the balance deltas published on the bus when
+ *   entries are posted or reset to draft.
+ */
+export const reportDataService = {
+    dependencies: ["rpc", "bus_service", "user"],
+
+    start(env, { rpc, bus_service, user }) {
+        const inflight = new Map();
+        const reportCache = new ReportCache();
+        const revalidating = new Set();
+        let lastVersion = null;
+        const deltaListeners = new Set();
+
+        function shared(key, run, signal) {
+            let entry = inflight.get(key);
+            if (!entry) {
+                const controller = new AbortController();
+                entry = { controller, subscribers: 0 };
+                entry.promise = run(controller.signal).finally(() => {
+                    if (inflight.get(key) === entry) {
+                        inflight.delete(key);
+                    }
+                });
+                inflight.set(key, entry);
+            }
+            const current = entry;
+            current.subscribers++;
+            if (signal) {
+                signal.addEventListener("abort", () => {
+                    current.subscribers--;
+                    if (!current.subscribers && inflight.get(key) === current) {
+                        inflight.delete(key);
+                        current.controller.abort();
+                    }
+                }, { once: true });
+            }
+            return current.promise;
+        }
+
+        function ledgerVersion({ fresh = false } = {}) {
+            if (fresh || !lastVersion || Date.now() - lastVersion.at > VERSION_TTL) {
+                lastVersion = {
+                    at: Date.now(),
+                    promise: rpc("/web/dataset/call_kw/account.move.line/get_ledger_version", {
+                        model: "account.move.line",
+                        method: "get_ledger_version",
+                        args: [],
+                        kwargs: {},
+                    }),
+                };
+                lastVersion.promise.catch(() => (lastVersion = null));
+            }
+            return lastVersion.promise;
+        }
+
+        function isCacheable(payload) {
+            return payload && !payload.error && payload.success !== false;
+        }
+
+        async function fetchAndStore(key, fetchFresh, signal) {
+            // The version is read before the data: the stored payload is
+            // never newer than its version, so a change always invalidates it
+            const version = await ledgerVersion({ fresh: true });
+            const payload = await fetchFresh(signal);
+            if (isCacheable(payload)) {
+                reportCache.set(key, version, payload);
+            }
+            return payload;
+        }
+
+        function revalidate(key, entry, fetchFresh, onUpdate) {
+            if (revalidating.has(key)) {
+                return;
+            }
+            revalidating.add(key);
+            ledgerVersion()
+                .then(async (version) => {
+                    if (version !== entry.version) {
+                        const payload = await fetchAndStore(key, fetchFresh);
+                        if (isCacheable(payload) && onUpdate) {
+                            onUpdate();
+                        }
+                    }
+                })
+                .catch((error) => console.warn("Report revalidation failed:", error))
+                .finally(() => revalidating.delete(key));
+        }
+
+        async function cached(key, fetchFresh, { signal, onUpdate, refresh = false } = {}) {
+            const entry = refresh ? null : await reportCache.get(key);
+            if (entry) {
+                revalidate(key, entry, fetchFresh, onUpdate);
+                return entry.payload;
+            }
+            return fetchAndStore(key, fetchFresh, signal);
+        }
+
+        function callRpc(route, params = {}, { signal, cache = false, onUpdate, refresh } = {}) {
+            const key = stableStringify(["rpc", route, params]);
+            const fetchFresh = (fetchSignal) => shared(key, (sharedSignal) => {
+                const request = rpc(route, params);
+                sharedSignal.addEventListener("abort", () => request.abort(false), { once: true });
+                return request;
+            }, fetchSignal);
+            return cache ? cached(key, fetchFresh, { signal, onUpdate, refresh }) : fetchFresh(signal);
+        }
+
+        /**
+         * Line-heavy report of /account/reports: columnar payload when enabled
+         * on the server (`account_columnar_reports` of the session), regular
+         * JSON otherwise; both get the companies selected in the switcher.
+         */
+        async function columnar(report, kwargs, { signal, groupKey, childKey, cache = false, onUpdate, refresh } = {}) {
+            // Raw payloads are shared and cached; each caller decodes its own copy
+            const companyIds = user.context.allowed_company_ids;
+            const key = stableStringify(["columnar", report, kwargs, companyIds]);
+            const fetchFresh = session.account_columnar_reports
+                ? (fetchSignal) => shared(key, (sharedSignal) =>
+                    fetchColumnarReport(report, kwargs, { companyIds, signal: sharedSignal }), fetchSignal)
+                : (fetchSignal) => shared(key, (sharedSignal) => {
+                    const request = rpc(`/account/reports/data/${report}`, { kwargs, company_ids: companyIds });
+                    sharedSignal.addEventListener("abort", () => request.abort(false), { once: true });
+                    return request;
+                }, fetchSignal);
+            const payload = await (cache ? cached(key, fetchFresh, { signal, onUpdate, refresh }) : fetchFresh(signal));
+            return decodeReport(payload, groupKey, childKey);
+        }
+
+        function dispatchLedgerDelta(payload) {
+            // The ledger changed: the next revalidation must re-read the version
+            lastVersion = null;
+            for (const callback of deltaListeners) {
+                callback(payload);
+            }
+        }
+
+        function onLedgerDelta(callback) {
+            if (!deltaListeners.size) {
+                bus_service.addChannel(LEDGER_DELTA_CHANNEL);
+                bus_service.subscribe(LEDGER_DELTA_NOTIFICATION, dispatchLedgerDelta);
+            }
+            deltaListeners.add(callback);
+            return () => {
+                deltaListeners.delete(callback);
+                if (!deltaListeners.size) {
+                    bus_service.unsubscribe(LEDGER_DELTA_NOTIFICATION, dispatchLedgerDelta);
+                    bus_service.deleteChannel(LEDGER_DELTA_CHANNEL);
+                }
+            };
+        }
+
+        function createLoader({ delay = DEFAULT_DELAY } = {}) {
+            const keepLast = new KeepLast();
+            let timer = null;
+            let controller = null;
+            let started = false;
+            return {
+                /**
+                 * Run request(signal) after the debounce delay. Only the latest
+                 * call settles; superseded calls never resolve. The first load
+                 * runs at once since nothing is on screen yet.
+                 */
+                load(request) {
+                    clearTimeout(timer);
+                    if (controller) {
+                        controller.abort();
+                    }
+                    const current = new AbortController();
+                    controller = current;
+                    const wait = started ? delay : 0;
+                    started = true;
+                    const promise = new Promise((resolve) => {
+                        timer = setTimeout(resolve, wait);
+                    }).then(() => request(current.signal));
+                    return keepLast.add(promise);
+                },
+                cancel() {
+                    clearTimeout(timer);
+                    if (controller) {
+                        controller.abort();
+                        controller = null;
+                    }
+                },
+            };
+        }
+
+        return { rpc: callRpc, columnar, createLoader, ledgerVersion, onLedgerDelta };
+    },
+};
+
+/**
+ * Loader bound to the component: pending requests are aborted on unmount.
+ */
+export function useReportLoader(options) {
+    const loader = useService("report_data").createLoader(options);
+    onWillUnmount(() => loader.cancel());
+    return loader;
+}
+
+/**
+ * Call `callback(payload)` with the ledger deltas of the component's company
+ * while it is mounted.
+ */
+export function useLedgerDeltas(callback) {
+    const reportData = useService("report_data");
+    let unsubscribe = null;
+    onMounted(() => {
+        unsubscribe = reportData.onLedgerDelta(callback);
+    });
+    onWillUnmount(() => unsubscribe && unsubscribe());
+}
+
+registry.category("services").add("report_data", reportDataService);
@@ -0,0 +1,96 @@
+/** @odoo-module **/
+
+/**
+ * Lazy decoder for the columnar report payload (see tools/columnar.py).
+ *
+ * Rows are only materialized when a group is first expanded, so a ledger with
+ * thousands of accounts costs nothing until the user unfolds one of them.
+ */
+export class ColumnarTable {
+    constructor(table) {
+        this.length = table.length || 0;
+        this.columns = table.columns || {};
+        this.dicts = table.dicts || {};
+        this.names = Object.keys(this.columns);
+    }
+
+    row(index) {
+        const row = {};
+        for (const name of this.names) {
+            const value = this.columns[name][index];
+            const dict = this.dicts[name];
+            row[name] = dict ? dict[value] : value;
+        }
+        return row;
+    }
+
+    slice(start, count) {
+        const end = Math.min(start + count, this.length);
+        const rows = [];
+        for (let i = start; i < end; i++) {
+            rows.push(this.row(i));
+        }
+        return rows;
+    }
+}
+
+/**
+ * Give every group a lazy `childKey` getter decoding its slice of the shared table.
+ */
+export function decodeGroups(groups, childKey, table) {
+    const columnar = new ColumnarTable(table);
+    for (const group of groups) {
+        const offset = group[`${childKey}_offset`] || 0;
+        const count = group[`${childKey}_count`] || 0;
+        let decoded = null;
+        Object.defineProperty(group, childKey, {
+            configurable: true,
+            enumerable: true,
+            get() {
+                if (!decoded) {
+                    decoded = columnar.slice(offset, count);
+                }
+                return decoded;
+            },
+        });
+    }
+    return groups;
+}
+
+/**
+ * Fetch a report from the gzip-compressed columnar route and decode it lazily.
+ *
+ * A GET carries no user context: the allowed companies are sent explicitly.
+ */
+export async function fetchColumnarReport(report, kwargs, { companyIds, groupKey, childKey, signal } = {}) {
+    const query = new URLSearchParams({ kwargs: JSON.stringify(kwargs) });
+    if (companyIds) {
+        query.set("company_ids", JSON.stringify(companyIds));
+    }
+    const response = await fetch(`/account/reports/columnar/${report}?${query}`, {
+        method: "GET",
+        credentials: "same-origin",
+        headers: { Accept: "application/json" },
+        signal,
+    });
+    if (!response.ok) {
+        // Error responses of the route carry {error}; proxies may answer HTML
+        const payload = await response.json().catch(() => ({}));
+        throw new Error(payload.error || `${response.status} ${response.statusText}`);
+    }
+    const payload = await response.json();
+    return decodeReport(payload, groupKey, childKey);
+}
+
+/**
+ * Decode a columnar payload without mutating it, so raw payloads can be cached.
+ */
+export function decodeReport(payload, groupKey, childKey) {
+    if (payload.format !== "columnar" || !groupKey || !childKey) {
+        return payload;
+    }
+    const { [`${childKey}_table`]: table, ...report } = payload;
+    report[groupKey] = (payload[groupKey] || []).map((group) => ({ ...group }));
+    decodeGroups(report[groupKey], childKey, table || {});
+    return report;
+}
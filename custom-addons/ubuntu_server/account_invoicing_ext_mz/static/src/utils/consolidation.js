@@ -0,0 +1,14 @@
+/** @odoo-module **/
+
+/**
+ * Consolidation filter of the statement reports: the companies selected in the
+ * switcher are only consolidated once the user asks for it, in the currency
+ * picked (the one of the current company by default).
+ */
+export async function loadConsolidationCurrencies(orm, companyId) {
+    const [currencies, [company]] = await Promise.all([
+        orm.searchRead("res.currency", [], ["id", "name", "symbol"], { order: "name" }),
+        orm.read("res.company", [companyId], ["currency_id"]),
+    ]);
+    return { currencies, currencyId: company.currency_id[0] };
+}
@@ -0,0 +1,103 @@
+/** @odoo-module **/
+
+/**
+ * In-place patching of the aged reports with the ledger deltas published on
+ * the bus when entries are posted or reset to draft, or items are reconciled
+ * or unreconciled (see account.move._get_ledger_deltas and
+ * _get_reconcile_deltas). Mirrors the bucketing of
+ * get_aged_receivable_data / get_aged_payable_data.
+ */
+
+const DAY = 24 * 3600 * 1000;
+const AGED_COLUMNS = ["invoice_date", "at_date", "period_1", "period_2", "period_3", "period_4", "older", "total"];
+
+function parseDate(value) {
+    return Date.parse(`${value}T00:00:00Z`);
+}
+
+function formatDate(value) {
+    const [year, month, day] = value.split("-");
+    return `${day}/${month}/${year}`;
+}
+
+export function agedColumn(daysOverdue, periodLength) {
+    if (daysOverdue <= 0) {
+        return "at_date";
+    }
+    for (let period = 1; period <= 4; period++) {
+        if (daysOverdue <= periodLength * period) {
+            return `period_${period}`;
+        }
+    }
+    return "older";
+}
+
+/**
+ * Apply the `partner_items` of a ledger delta to `data` ({partners, totals}).
+ *
+ * `signOf(item)` returns the report sign of the item balance, or 0 when the
+ * report does not list its account. Items of posted entries add a detail
+ * line, items of entries reset to draft or fully reconciled (`sign` < 0)
+ * remove it; items whose reconciliation was removed come back (`sign` > 0).
+ * Returns whether the report changed.
+ */
+export function applyAgedDelta(data, items, { asOfDate, periodLength, partnerIds, signOf }) {
+    let changed = false;
+    for (const item of items) {
+        const sign = signOf(item);
+        if (!sign || item.date > asOfDate) {
+            continue;
+        }
+        if (partnerIds && partnerIds.length && !partnerIds.includes(item.partner_id)) {
+            continue;
+        }
+        const partnerId = `partner_${item.partner_id || 0}`;
+        let partner = data.partners.find((p) => p.id === partnerId);
+        if (!partner) {
+            if (item.sign < 0) {
+                continue;
+            }
+            partner = {
+                id: partnerId,
+                name: item.partner_id ? item.partner_name : "Unknown Partner",
+                ref: item.partner_ref,
+                has_children: true,
+                expanded: false,
+                lines: [],
+            };
+            for (const column of AGED_COLUMNS) {
+                partner[column] = 0.0;
+            }
+            data.partners.push(partner);
+            data.partners.sort((a, b) => a.name.localeCompare(b.name));
+        }
+
+        const amount = sign * item.balance;
+        const daysOverdue = Math.round((parseDate(asOfDate) - parseDate(item.date)) / DAY);
+        for (const column of [agedColumn(daysOverdue, periodLength), "invoice_date", "total"]) {
+            partner[column] += amount;
+            data.totals[column] += amount;
+        }
+
+        const lineId = `line_${item.line_id}`;
+        if (item.sign > 0) {
+            partner.lines.push({
+                id: lineId,
+                date: formatDate(item.date),
+                move_name: item.move_name,
+                ref: item.ref,
+                account_code: item.account_code,
+                account_name: item.account_name,
+                amount,
+                days_overdue: daysOverdue,
+            });
+        } else {
+            partner.lines = partner.lines.filter((line) => line.id !== lineId);
+            if (!partner.lines.length) {
+                data.partners.splice(data.partners.indexOf(partner), 1);
+            }
+        }
+        changed = true;
+    }
+    return changed;
+}
@@ -0,0 +1,6 @@
+from . import test_rate_table
+from . import test_account_groups
+from . import test_report_presets
+from . import test_reconcile_matching
+from . import test_aggregate_window_shift
+from . import test_fx_revaluation
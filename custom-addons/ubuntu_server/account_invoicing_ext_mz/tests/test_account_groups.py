@@ -0,0 +1,80 @@
+from odoo.tests import tagged
+from odoo.tests.common import BaseCase
+
+from ..tools.account_groups import GroupIndex
+
+# (id, parent_id, code_prefix_start, code_prefix_end, name)
+GROUPS = [
+    (1, False, '1', '1', 'Assets'),
+    (2, 1, '10', '11', 'Current Assets'),
+    (3, 2, '101', '101', 'Cash'),
+    (4, False, '4', '4', 'Liabilities'),
+    # Parent outside the chart: becomes a root
+    (5, 99, '5', '5', 'Equity'),
+    # No prefix: ignored
+    (6, False, False, False, 'Unused'),
+]
+
+
+@tagged('post_install', '-at_install')
+class TestAccountGroups(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+        self.index = GroupIndex(GROUPS)
+        self.rows = [
+            {'id': 'account_10', 'code': '101000', 'balance': 10.0},
+            {'id': 'account_11', 'code': '110000', 'balance': 5.0},
+            {'id': 'account_40', 'code': '400000', 'balance': -7.0},
+            {'id': 'account_90', 'code': '900000', 'balance': 1.0},
+        ]
+
+    def test_find(self):
+        self.assertEqual(self.index.find('101000'), 3)
+        # Inside the range of the group, not at its start
+        self.assertEqual(self.index.find('110000'), 2)
+        self.assertEqual(self.index.find('120000'), 1)
+        self.assertEqual(self.index.find('400100'), 4)
+        self.assertEqual(self.index.find('500000'), 5)
+        self.assertIsNone(self.index.find('900000'))
+        self.assertIsNone(self.index.find(''))
+        self.assertIsNone(self.index.find(None))
+
+    def test_parents(self):
+        self.assertEqual(self.index.parents(3), [2, 1])
+        self.assertEqual(self.index.parents(1), [])
+        self.assertEqual(self.index.parents(5), [])
+        self.assertNotIn(6, self.index.groups)
+
+    def test_rollup(self):
+        totals, members = self.index.rollup(self.rows, ['balance'])
+        self.assertEqual(totals, {
+            1: {'balance': 15.0},
+            2: {'balance': 15.0},
+            3: {'balance': 10.0},
+            4: {'balance': -7.0},
+        })
+        self.assertEqual([row['code'] for row in members[2]], ['110000'])
+        self.assertEqual([row['code'] for row in members[None]], ['900000'])
+
+    def test_tree(self):
+        lines = self.index.tree(self.rows, ['balance'], level=1)
+        self.assertEqual([(line['id'], line['level'], line['balance']) for line in lines], [
+            ('group_1', 1, 15.0),
+            ('group_4', 1, -7.0),
+            ('account_90', 1, 1.0),
+        ])
+        assets = lines[0]
+        self.assertTrue(assets['is_group'])
+        self.assertEqual(assets['name'], '1 Assets')
+        current = assets['children'][0]
+        # Sub-groups first, then the accounts of the group itself
+        self.assertEqual([(line['id'], line['level']) for line in current['children']], [
+            ('group_3', 3),
+            ('account_11', 3),
+        ])
+        self.assertEqual([(line['id'], line['level']) for line in current['children'][0]['children']], [
+            ('account_10', 4),
+        ])
+        # Rows are copied, not modified
+        self.assertNotIn('level', self.rows[0])
@@ -0,0 +1,114 @@
+from datetime import date
+from unittest.mock import patch
+
+from odoo.tests import tagged
+from odoo.tests.common import TransactionCase
+
+AMOUNT_FIELDS = ('initial_balance', 'debit', 'credit', 'balance', 'end_balance')
+FILTERS = {'states': ('posted',), 'journal_ids': None, 'analytic_account_ids': None}
+
+# (account_id, date, debit, credit)
+LEDGER = [
+    (1, date(2024, 1, 5), 100.0, 0.0),
+    (2, date(2024, 1, 31), 0.0, 60.0),
+    (1, date(2024, 2, 1), 0.0, 15.0),
+    (1, date(2024, 2, 10), 0.0, 40.0),
+    (2, date(2024, 2, 15), 0.0, 100.0),
+    (1, date(2024, 3, 15), 60.0, 0.0),
+    (2, date(2024, 3, 31), 30.0, 0.0),
+    (3, date(2024, 4, 2), 25.0, 0.0),
+]
+
+
+def ledger_aggregate(date_from, date_to, slice_only=False):
+    """What ACCOUNT_AGGREGATE_QUERY returns for LEDGER"""
+    aggregate = {}
+    for account_id, day, debit, credit in LEDGER:
+        if (date_to and day > date_to) or (slice_only and date_from and day < date_from):
+            continue
+        row = aggregate.setdefault(account_id, dict(dict.fromkeys(AMOUNT_FIELDS, 0.0), account_id=account_id))
+        if date_from and day < date_from:
+            row['initial_balance'] += debit - credit
+        else:
+            row['debit'] += debit
+            row['credit'] += credit
+            row['balance'] += debit - credit
+    for row in aggregate.values():
+        row['end_balance'] = row['initial_balance'] + row['balance']
+    return aggregate
+
+
+@tagged('post_install', '-at_install')
+class TestAggregateWindowShift(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Aggregate = cls.env['account.report.aggregate']
+
+    def setUp(self):
+        super().setUp()
+        self.slices = []
+
+        def query_account_aggregate(model, company_id, date_from, date_to, states, journal_ids,
+                                    analytic_account_ids, slice_only=False, ledger_version=None):
+            self.slices.append((date_from, date_to, slice_only))
+            return ledger_aggregate(date_from, date_to, slice_only)
+
+        patcher = patch.object(type(self.Aggregate), '_query_account_aggregate', query_account_aggregate)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _shift(self, old_window, new_window):
+        entry = {
+            'date_from': old_window[0],
+            'date_to': old_window[1],
+            'aggregate': ledger_aggregate(*old_window),
+        }
+        return self.Aggregate._shift_account_aggregate(entry, self.env.company.id, *new_window, **FILTERS)
+
+    def assertShifted(self, old_window, new_window):
+        shifted = self._shift(old_window, new_window)
+        self.assertIsNotNone(shifted, f"{old_window} -> {new_window} should be shifted")
+        expected = ledger_aggregate(*new_window)
+        for account_id in set(shifted) | set(expected):
+            for field in AMOUNT_FIELDS:
+                self.assertAlmostEqual(
+                    shifted.get(account_id, {}).get(field, 0.0), expected.get(account_id, {}).get(field, 0.0),
+                    msg=f"{old_window} -> {new_window}: {field} of account {account_id}")
+        # Only the changed slices were read
+        self.assertTrue(self.slices)
+        self.assertTrue(all(slice_only for _date_from, _date_to, slice_only in self.slices))
+
+    def test_shift_forward(self):
+        self.assertShifted((date(2024, 2, 1), date(2024, 3, 31)), (date(2024, 2, 15), date(2024, 4, 5)))
+        self.assertEqual(self.slices, [
+            (date(2024, 2, 1), date(2024, 2, 14), True),
+            (date(2024, 4, 1), date(2024, 4, 5), True),
+        ])
+
+    def test_shift_backward(self):
+        self.assertShifted((date(2024, 2, 1), date(2024, 3, 31)), (date(2024, 1, 20), date(2024, 3, 20)))
+
+    def test_shrink_and_grow(self):
+        self.assertShifted((date(2024, 2, 1), date(2024, 3, 31)), (date(2024, 2, 2), date(2024, 3, 30)))
+        self.assertShifted((date(2024, 2, 2), date(2024, 3, 30)), (date(2024, 1, 31), date(2024, 4, 2)))
+
+    def test_shift_end_only(self):
+        self.assertShifted((date(2024, 2, 1), date(2024, 3, 31)), (date(2024, 2, 1), date(2024, 2, 29)))
+        self.assertShifted((None, date(2024, 2, 29)), (None, date(2024, 3, 31)))
+
+    def test_same_window(self):
+        entry = {'date_from': date(2024, 2, 1), 'date_to': date(2024, 3, 31), 'aggregate': {}}
+        self.assertIs(self.Aggregate._shift_account_aggregate(
+            entry, self.env.company.id, date(2024, 2, 1), date(2024, 3, 31), **FILTERS), entry['aggregate'])
+        self.assertFalse(self.slices)
+
+    def test_full_query_cheaper(self):
+        # Windows that do not overlap
+        self.assertIsNone(self._shift((date(2024, 2, 1), date(2024, 2, 29)), (date(2024, 4, 1), date(2024, 4, 30))))
+        # Slices as long as the window
+        self.assertIsNone(self._shift((date(2024, 3, 1), date(2024, 3, 10)), (date(2024, 2, 1), date(2024, 3, 10))))
+        # Open-ended and bounded windows
+        self.assertIsNone(self._shift((date(2024, 2, 1), None), (date(2024, 2, 1), date(2024, 3, 31))))
+        self.assertFalse(self.slices)
@@ -0,0 +1,103 @@
+from datetime import date
+
+from odoo import Command
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+from odoo.exceptions import AccessError
+from odoo.tests import tagged
+
+
+@tagged('post_install', '-at_install')
+class TestFxRevaluation(AccountTestInvoicingCommon):
+    """Revaluation of open foreign-currency items; Gold is at 3.0 in 2016, 2.0 from 2017 (per company unit)"""
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        cls.gold = cls.currency_data['currency']
+        cls.receivable = cls.company_data['default_account_receivable']
+        cls.payable = cls.company_data['default_account_payable']
+        cls.revaluation_date = date(2017, 6, 30)
+
+    def _post_entry(self, day, account, amount_currency, balance, counterpart=None):
+        """Post an entry in Gold on ``account``; returns its line on that account"""
+        counterpart = counterpart or self.company_data['default_account_revenue']
+        move = self.env['account.move'].create({
+            'move_type': 'entry',
+            'date': day,
+            'journal_id': self.company_data['default_journal_misc'].id,
+            'line_ids': [
+                Command.create({
+                    'account_id': account.id,
+                    'partner_id': self.partner_a.id,
+                    'currency_id': self.gold.id,
+                    'amount_currency': amount_currency,
+                    'balance': balance,
+                }),
+                Command.create({
+                    'account_id': counterpart.id,
+                    'partner_id': self.partner_a.id,
+                    'currency_id': self.gold.id,
+                    'amount_currency': -amount_currency,
+                    'balance': -balance,
+                }),
+            ],
+        })
+        move.action_post()
+        return move.line_ids.filtered(lambda line: line.account_id == account)
+
+    def _compute(self):
+        wizard = self.env['account.fx.revaluation'].create({
+            'company_id': self.env.company.id,
+            'date': self.revaluation_date,
+        })
+        wizard.action_compute()
+        return {line.account_id: line for line in wizard.line_ids}
+
+    def test_receivable_and_payable(self):
+        self._post_entry(date(2016, 6, 1), self.receivable, 300.0, 100.0)
+        self._post_entry(date(2016, 6, 1), self.payable, -600.0, -200.0,
+                         counterpart=self.company_data['default_account_expense'])
+
+        lines = self._compute()
+        self.assertRecordValues(lines[self.receivable], [{
+            'foreign_currency_id': self.gold.id,
+            'item_count': 1,
+            'residual_currency': 300.0,
+            'residual': 100.0,
+            'revalued': 150.0,
+            'adjustment': 50.0,
+        }])
+        self.assertRecordValues(lines[self.payable], [{
+            'foreign_currency_id': self.gold.id,
+            'item_count': 1,
+            'residual_currency': -600.0,
+            'residual': -200.0,
+            'revalued': -300.0,
+            'adjustment': -100.0,
+        }])
+
+    def test_partial_reconciled_after_date(self):
+        invoice_line = self._post_entry(date(2016, 6, 1), self.receivable, 300.0, 100.0)
+        # Paid after the revaluation date: the item was fully open on that date
+        payment_line = self._post_entry(date(2017, 7, 15), self.receivable, -120.0, -60.0,
+                                        counterpart=self.company_data['default_journal_bank'].default_account_id)
+        (invoice_line + payment_line).reconcile()
+        self.assertEqual(invoice_line.amount_residual_currency, 180.0)
+
+        lines = self._compute()
+        self.assertRecordValues(lines[self.receivable], [{
+            'item_count': 1,
+            'residual_currency': 300.0,
+            'residual': 100.0,
+            'revalued': 150.0,
+            'adjustment': 50.0,
+        }])
+
+    def test_company_access(self):
+        other_company = self.env['res.company'].sudo().create({'name': 'Company Without Access'})
+        wizard = self.env['account.fx.revaluation'].create({
+            'company_id': other_company.id,
+            'date': self.revaluation_date,
+        })
+        with self.assertRaises(AccessError):
+            wizard.action_compute()
@@ -0,0 +1,66 @@
+from datetime import date
+
+from odoo.tests import tagged
+from odoo.tests.common import BaseCase
+
+from ..tools import rate_table
+
+
+@tagged('post_install', '-at_install')
+class TestRateTable(BaseCase):
+
+    def test_rate_at(self):
+        rates = [(date(2024, 1, 1), 2.0), (date(2024, 3, 1), 4.0)]
+        self.assertEqual(rate_table.rate_at([], date(2024, 1, 1)), 1.0)
+        # Before the first rate, the first rate applies
+        self.assertEqual(rate_table.rate_at(rates, date(2023, 6, 1)), 2.0)
+        self.assertEqual(rate_table.rate_at(rates, date(2024, 1, 1)), 2.0)
+        self.assertEqual(rate_table.rate_at(rates, date(2024, 2, 29)), 2.0)
+        self.assertEqual(rate_table.rate_at(rates, date(2024, 3, 1)), 4.0)
+        self.assertEqual(rate_table.rate_at(rates, date(2030, 1, 1)), 4.0)
+
+    def test_conversion_segments(self):
+        from_rates = [(date(2024, 1, 15), 2.0)]
+        to_rates = [(date(2024, 1, 1), 1.0), (date(2024, 2, 1), 3.0)]
+        # Same factor until the second rate of the target currency: merged
+        self.assertEqual(rate_table.conversion_segments(from_rates, to_rates), [
+            (date.min, date(2024, 2, 1), 0.5),
+            (date(2024, 2, 1), date.max, 1.5),
+        ])
+
+    def test_conversion_segments_without_rates(self):
+        self.assertEqual(rate_table.conversion_segments([], []), [(date.min, date.max, 1.0)])
+        self.assertEqual(rate_table.conversion_segments([(date(2024, 1, 1), 4.0)], []), [(date.min, date.max, 0.25)])
+
+    def test_segments_cover_every_date(self):
+        segments = rate_table.conversion_segments(
+            [(date(2024, 1, 1), 2.0), (date(2024, 3, 1), 4.0), (date(2024, 5, 1), 5.0)],
+            [(date(2024, 2, 1), 8.0), (date(2024, 3, 1), 8.0)],
+        )
+        self.assertEqual(segments[0][0], date.min)
+        self.assertEqual(segments[-1][1], date.max)
+        for previous, segment in zip(segments, segments[1:]):
+            self.assertEqual(previous[1], segment[0])
+            self.assertNotEqual(previous[2], segment[2])
+
+    def test_segment_arrays(self):
+        segments = {
+            1: [(date.min, date(2024, 2, 1), 0.5), (date(2024, 2, 1), date.max, 1.5)],
+            2: [(date.min, date.max, 1.0)],
+        }
+        self.assertEqual(rate_table.segment_arrays(segments), (
+            [1, 1, 2],
+            [date.min, date(2024, 2, 1), date.min],
+            [date(2024, 2, 1), date.max, date.max],
+            [0.5, 1.5, 1.0],
+        ))
+
+    def test_rate_table_convert(self):
+        table = rate_table.RateTable(rate_table.conversion_segments(
+            [(date(2024, 1, 15), 2.0)],
+            [(date(2024, 1, 1), 1.0), (date(2024, 2, 1), 3.0)],
+        ))
+        self.assertEqual(table.factor(date.min), 0.5)
+        self.assertEqual(table.convert(100.0, date(2024, 1, 31)), 50.0)
+        self.assertEqual(table.convert(100.0, date(2024, 2, 1)), 150.0)
+        self.assertEqual(table.convert(-10.0, date(2099, 12, 31)), -15.0)
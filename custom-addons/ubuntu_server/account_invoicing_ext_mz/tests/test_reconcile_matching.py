@@ -0,0 +1,107 @@
+from odoo.tests import tagged
+from odoo.tests.common import BaseCase
+
+from ..tools.reconcile_matching import (
+    ReconcileMatcher, document_references, find_subset, normalize_reference, reference_tokens,
+)
+
+CURRENCY = 1
+
+
+def item(item_id, partner_id, amount, *references):
+    return {
+        'id': item_id,
+        'partner_id': partner_id,
+        'currency_id': CURRENCY,
+        'amount': amount,
+        'references': document_references(*references),
+    }
+
+
+def line(partner_id, amount, *references):
+    return {
+        'partner_id': partner_id,
+        'currency_id': CURRENCY,
+        'amount': amount,
+        'tokens': reference_tokens(*references),
+    }
+
+
+@tagged('post_install', '-at_install')
+class TestReconcileMatching(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+        # Oldest first; amounts in cents
+        self.matcher = ReconcileMatcher([
+            item(1, 10, 10000, 'INV/2024/0001'),
+            item(2, 10, 5000, 'INV/2024/0002', 'RF18 5390'),
+            item(3, 20, 10000, 'INV/2024/0003'),
+            item(4, 10, 2500, 'INV/2024/0004'),
+            item(5, 10, 2500, 'INV/2024/0005'),
+            item(6, 30, -4000, 'BILL/2024/0001'),
+        ])
+
+    def test_references(self):
+        self.assertEqual(normalize_reference('inv/2024-0012'), 'INV20240012')
+        self.assertEqual(normalize_reference(None), '')
+        self.assertEqual(document_references('INV/2024/0012', None, ''), {'INV20240012'})
+        tokens = reference_tokens('Payment INV/2024/0012, thanks', None)
+        self.assertTrue({'PAYMENT', 'INV20240012', 'THANKS', 'PAYMENTINV20240012THANKS'} <= tokens)
+        self.assertNotIn('', tokens)
+
+    def test_find_subset(self):
+        indexes = find_subset([500, 300, 200, 100], 600, 3)
+        self.assertEqual(sum([500, 300, 200, 100][index] for index in indexes), 600)
+        self.assertLessEqual(len(indexes), 3)
+        self.assertEqual(sorted(find_subset([-300, -100, -200], -400, 2)), [0, 1])
+        self.assertIsNone(find_subset([500, 300], 600, 2))
+        self.assertIsNone(find_subset([300, 100], 400, 1))
+        # Candidates of the other sign are not combined
+        self.assertIsNone(find_subset([500, -100], 400, 2))
+        # Bounded search
+        self.assertIsNone(find_subset([5, 4, 3, 2], 9, 4, max_nodes=1))
+
+    def test_match_reference(self):
+        item_ids, rule = self.matcher.match(line(10, 15000, 'Payment INV/2024/0001 INV/2024/0002'))
+        self.assertEqual((sorted(item_ids), rule), ([1, 2], 'reference'))
+        # Consumed: the same reference does not match twice
+        self.assertIsNone(self.matcher.match(line(10, 10000, 'INV/2024/0001')))
+
+    def test_match_payment_reference(self):
+        self.assertEqual(self.matcher.match(line(10, 5000, 'RF18 5390')), ([2], 'reference'))
+
+    def test_match_one_exact_reference(self):
+        # Two items referenced, only one paid exactly
+        self.assertEqual(self.matcher.match(line(10, 2500, 'INV/2024/0001 INV/2024/0004')), ([4], 'reference'))
+
+    def test_reference_of_another_partner(self):
+        # INV/2024/0003 belongs to partner 20; without a reference match
+        # partner 30 has no item of that amount either
+        self.assertIsNone(self.matcher.match(line(30, 10000, 'INV/2024/0003')))
+        self.assertEqual(self.matcher.match(line(None, 10000, 'INV/2024/0003')), ([3], 'reference'))
+
+    def test_free_text_words_do_not_match(self):
+        # '2024' and 'PAYMENT' are words of every reference, not references
+        self.assertIsNone(self.matcher.match(line(None, 7777, 'PAYMENT 2024')))
+
+    def test_match_amount(self):
+        self.assertEqual(self.matcher.match(line(20, 10000, 'transfer')), ([3], 'amount'))
+        self.assertEqual(self.matcher.match(line(30, -4000)), ([6], 'amount'))
+        # Oldest item of the partner first
+        self.assertEqual(self.matcher.match(line(10, 2500)), ([4], 'amount'))
+        self.assertEqual(self.matcher.match(line(10, 2500)), ([5], 'amount'))
+
+    def test_match_amount_without_partner(self):
+        self.assertEqual(self.matcher.match(line(None, 5000)), ([2], 'amount'))
+        # 100.00 is open on two partners: ambiguous
+        self.assertIsNone(self.matcher.match(line(None, 10000)))
+
+    def test_match_subset(self):
+        self.assertEqual(self.matcher.match(line(10, 7500)), ([2, 4], 'subset'))
+        self.assertEqual(self.matcher.match(line(10, 12500)), ([1, 5], 'subset'))
+        self.assertIsNone(self.matcher.match(line(10, 7500)))
+        self.assertIsNone(self.matcher.match(line(10, 7500), max_subset_size=1))
+
+    def test_zero_amount(self):
+        self.assertIsNone(self.matcher.match(line(10, 0, 'INV/2024/0001')))
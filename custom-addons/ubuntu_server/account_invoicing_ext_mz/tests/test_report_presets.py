@@ -0,0 +1,42 @@
+from datetime import date
+
+from odoo.tests import tagged
+from odoo.tests.common import BaseCase
+
+from ..tools.report_presets import preset_of, resolve_preset
+
+TODAY = date(2024, 5, 15)
+
+
+@tagged('post_install', '-at_install')
+class TestReportPresets(BaseCase):
+
+    def test_preset_of(self):
+        self.assertEqual(preset_of(date(2024, 1, 1), TODAY, TODAY), 'year_start:today')
+        self.assertEqual(preset_of(date(2024, 5, 1), TODAY, TODAY), 'month_start:today')
+        self.assertEqual(preset_of(date(2024, 4, 1), date(2024, 4, 30), TODAY), 'month_start:last_month_end')
+        self.assertEqual(preset_of(date(2023, 1, 1), date(2023, 12, 31), TODAY), 'year_start:last_year_end')
+        self.assertEqual(preset_of(None, date(2023, 12, 31), TODAY), 'all:last_year_end')
+        self.assertEqual(preset_of(None, TODAY, TODAY), 'all:today')
+
+    def test_preset_of_custom_windows(self):
+        self.assertIsNone(preset_of(date(2024, 3, 3), TODAY, TODAY))
+        self.assertIsNone(preset_of(date(2024, 1, 1), date(2024, 5, 10), TODAY))
+        # Start rules are relative to the end of the window
+        self.assertIsNone(preset_of(date(2024, 1, 1), date(2023, 12, 31), TODAY))
+        self.assertIsNone(preset_of(date(2024, 1, 1), None, TODAY))
+
+    def test_resolve_preset(self):
+        self.assertEqual(resolve_preset('year_start:today', TODAY), (date(2024, 1, 1), TODAY))
+        self.assertEqual(resolve_preset('all:last_year_end', TODAY), (None, date(2023, 12, 31)))
+        # A month preset used in May is last month again in March of a leap year
+        self.assertEqual(resolve_preset('month_start:last_month_end', date(2024, 3, 10)),
+                         (date(2024, 2, 1), date(2024, 2, 29)))
+        self.assertEqual(resolve_preset('year_start:last_month_end', date(2024, 1, 20)),
+                         (date(2023, 1, 1), date(2023, 12, 31)))
+
+    def test_round_trip(self):
+        for preset in ('year_start:today', 'month_start:today', 'all:today', 'month_start:last_month_end',
+                       'year_start:last_month_end', 'year_start:last_year_end', 'all:last_year_end'):
+            date_from, date_to = resolve_preset(preset, TODAY)
+            self.assertEqual(preset_of(date_from, date_to, TODAY), preset)
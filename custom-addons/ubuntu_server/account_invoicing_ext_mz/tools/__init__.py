@@ -0,0 +1,5 @@
+from . import account_groups
+from . import columnar
+from . import rate_table
+from . import report_presets
+from . import reconcile_matching
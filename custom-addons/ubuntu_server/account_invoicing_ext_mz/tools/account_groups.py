@@ -0,0 +1,127 @@
+"""Prefix index over an ``account.group`` chart, and subtotals through it.
+
+An account belongs to the deepest group whose prefix range holds the first
+``n`` characters of its code, ``n`` being the length of the group prefixes
+(``code_prefix_start <= code[:n] <= code_prefix_end``). Ranges of the same
+length never overlap, so one bisection per prefix length finds the group.
+
+Subtotals are summed into the group of each row, then pushed to the parent
+groups deepest first: every level is computed in one pass over the rows and
+one over the groups.
+"""
+from bisect import bisect_right
+
+
+class GroupIndex:
+    """Immutable index of one chart; built once per company and cached"""
+
+    def __init__(self, groups):
+        """``groups``: ``(id, parent_id, code_prefix_start, code_prefix_end, name)`` tuples"""
+        self.groups = {}
+        ranges = {}
+        for group_id, parent_id, start, end, name in sorted(groups, key=lambda group: group[2] or ''):
+            if not start:
+                continue
+            self.groups[group_id] = (parent_id, start, name)
+            ranges.setdefault(len(start), []).append((start, end or start, group_id))
+        for group_id, (parent_id, start, name) in list(self.groups.items()):
+            if parent_id not in self.groups:
+                self.groups[group_id] = (False, start, name)
+
+        self.lengths = tuple(sorted(ranges, reverse=True))
+        self.starts = {length: tuple(start for start, _end, _id in rows) for length, rows in ranges.items()}
+        self.ranges = {length: tuple(rows) for length, rows in ranges.items()}
+
+        children = {}
+        for group_id, (parent_id, _start, _name) in self.groups.items():
+            children.setdefault(parent_id, []).append(group_id)
+        # Groups were inserted by prefix, so siblings are already in code order
+        self.children = {parent_id: tuple(group_ids) for parent_id, group_ids in children.items()}
+        depth = {}
+        for group_id in self.groups:
+            depth[group_id] = len(self.parents(group_id))
+        self.depth = depth
+        self.bottom_up = tuple(sorted(self.groups, key=lambda group_id: -depth[group_id]))
+
+    def parents(self, group_id):
+        """Ancestors of a group, nearest first"""
+        parents = []
+        parent_id = self.groups[group_id][0]
+        while parent_id and parent_id not in parents:
+            parents.append(parent_id)
+            parent_id = self.groups[parent_id][0]
+        return parents
+
+    def find(self, code):
+        """Deepest group of an account code, or None"""
+        if not code:
+            return None
+        for length in self.lengths:
+            if len(code) < length:
+                continue
+            prefix = code[:length]
+            index = bisect_right(self.starts[length], prefix) - 1
+            if index >= 0:
+                _start, end, group_id = self.ranges[length][index]
+                if prefix <= end:
+                    return group_id
+        return None
+
+    def rollup(self, rows, fields, code_key='code'):
+        """
+        Subtotals of ``fields`` per group, bottom-up
+
+        Returns ``(totals, members)``: ``{group_id: {field: amount}}`` for the
+        groups holding at least one row (directly or below), and the rows
+        directly in each group (``None`` for rows outside the chart).
+        """
+        totals = {}
+        members = {}
+        for row in rows:
+            group_id = self.find(row.get(code_key))
+            members.setdefault(group_id, []).append(row)
+            if group_id is None:
+                continue
+            group_totals = totals.setdefault(group_id, dict.fromkeys(fields, 0.0))
+            for field in fields:
+                group_totals[field] += row[field] or 0.0
+        for group_id in self.bottom_up:
+            parent_id = self.groups[group_id][0]
+            if group_id not in totals or not parent_id:
+                continue
+            parent_totals = totals.setdefault(parent_id, dict.fromkeys(fields, 0.0))
+            for field in fields:
+                parent_totals[field] += totals[group_id][field]
+        return totals, members
+
+    def tree(self, rows, fields, level=0, id_prefix='group', code_key='code'):
+        """
+        Nested report lines: groups holding rows, with their subtotals
+
+        Group lines have ``children`` (sub-groups, then rows), rows are
+        copied with their ``level``. Rows outside the chart come last, at
+        ``level``.
+        """
+        totals, members = self.rollup(rows, fields, code_key=code_key)
+
+        def build(group_ids, depth):
+            lines = []
+            for group_id in group_ids:
+                if group_id not in totals:
+                    continue
+                _parent_id, start, name = self.groups[group_id]
+                children = build(self.children.get(group_id, ()), depth + 1)
+                children += [dict(row, level=level + depth + 1) for row in members.get(group_id, [])]
+                lines.append(dict(
+                    totals[group_id],
+                    id=f'{id_prefix}_{group_id}',
+                    code=start,
+                    name=f'{start} {name}',
+                    level=level + depth,
+                    unfoldable=True,
+                    is_group=True,
+                    children=children,
+                ))
+            return lines
+
+        return build(self.children.get(False, ()), 0) + [dict(row, level=level) for row in members.get(None, [])]
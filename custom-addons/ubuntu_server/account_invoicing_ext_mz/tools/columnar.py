@@ -0,0 +1,51 @@
+"""Columnar encoding for line-heavy report payloads.
+
+A table is encoded as ``{'length': n, 'columns': {name: [values]}, 'dicts': {name: [distinct values]}}``.
+Columns listed in ``dicts`` hold indexes into their dictionary instead of the
+repeated value (account codes, partner names, dates...).
+"""
+
+
+def encode_table(rows, dict_columns=()):
+    """Encode a list of dicts as column arrays, dictionary-encoding ``dict_columns``"""
+    names = []
+    seen = set()
+    for row in rows:
+        for name in row:
+            if name not in seen:
+                seen.add(name)
+                names.append(name)
+
+    columns = {}
+    dicts = {}
+    for name in names:
+        values = [row.get(name) for row in rows]
+        if name in dict_columns:
+            index = {}
+            columns[name] = [index.setdefault(value, len(index)) for value in values]
+            dicts[name] = list(index)
+        else:
+            columns[name] = values
+    return {'length': len(rows), 'columns': columns, 'dicts': dicts}
+
+
+def encode_grouped(groups, child_key, dict_columns=()):
+    """Move the ``child_key`` lists of every group into one shared columnar table.
+
+    Each group keeps its own fields plus ``<child_key>_offset`` and
+    ``<child_key>_count`` pointing into the shared table.
+    """
+    children = []
+    for group in groups:
+        group_children = group.pop(child_key, None) or []
+        group[f'{child_key}_offset'] = len(children)
+        group[f'{child_key}_count'] = len(group_children)
+        children.extend(group_children)
+    return encode_table(children, dict_columns)
+
+
+def encode_report(payload, group_key, child_key, dict_columns=()):
+    """Return ``payload`` with its grouped lines converted to the columnar format"""
+    payload[f'{child_key}_table'] = encode_grouped(payload.get(group_key) or [], child_key, dict_columns)
+    payload['format'] = 'columnar'
+    return payload
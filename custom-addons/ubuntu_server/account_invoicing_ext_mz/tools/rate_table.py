@@ -0,0 +1,74 @@
+"""Piecewise-constant currency conversion factors, for converting in SQL.
+
+Odoo rates are expressed against the company currency of the rate table: an
+amount in currency ``C`` is worth ``amount * rate(R) / rate(C)`` in ``R`` at a
+given date, where ``rate(X)`` is the latest rate of ``X`` on or before that
+date (the earliest one before the first rate, 1.0 without any rate).
+
+The factors only change at the dates where either currency has a rate, so a
+conversion is fully described by a few ``(date_start, date_stop, factor)``
+segments that a grouped query can join on.
+"""
+from bisect import bisect_right
+from datetime import date
+
+
+def rate_at(rates, day):
+    """Rate in effect on ``day`` from a date-sorted list of ``(date, rate)``"""
+    if not rates:
+        return 1.0
+    index = bisect_right([rate_date for rate_date, _rate in rates], day)
+    return rates[max(index - 1, 0)][1]
+
+
+def conversion_segments(from_rates, to_rates):
+    """
+    Segments ``[(date_start, date_stop, factor)]`` covering every date
+
+    ``date_start`` is inclusive and ``date_stop`` exclusive; the first and last
+    segments are bounded by ``date.min`` and ``date.max``. Consecutive
+    segments with the same factor are merged.
+    """
+    breakpoints = sorted({rate_date for rate_date, _rate in from_rates} | {rate_date for rate_date, _rate in to_rates})
+    starts = [date.min] + breakpoints
+    stops = breakpoints + [date.max]
+    segments = []
+    for start, stop in zip(starts, stops):
+        if start == stop:
+            continue
+        factor = rate_at(to_rates, start) / rate_at(from_rates, start)
+        if segments and segments[-1][2] == factor:
+            segments[-1] = (segments[-1][0], stop, factor)
+        else:
+            segments.append((start, stop, factor))
+    return segments
+
+
+def segment_arrays(segments_by_key):
+    """
+    Flatten ``{key: segments}`` into parallel arrays for ``unnest()``
+
+    Returns ``(keys, date_starts, date_stops, factors)``.
+    """
+    keys, starts, stops, factors = [], [], [], []
+    for key, segments in segments_by_key.items():
+        for start, stop, factor in segments:
+            keys.append(key)
+            starts.append(start)
+            stops.append(stop)
+            factors.append(factor)
+    return keys, starts, stops, factors
+
+
+class RateTable:
+    """Date-indexed conversion factors of one currency pair, for converting in Python"""
+
+    def __init__(self, segments):
+        self.starts = [start for start, _stop, _factor in segments]
+        self.factors = [factor for _start, _stop, factor in segments]
+
+    def factor(self, day):
+        return self.factors[bisect_right(self.starts, day) - 1]
+
+    def convert(self, amount, day):
+        return amount * self.factor(day)
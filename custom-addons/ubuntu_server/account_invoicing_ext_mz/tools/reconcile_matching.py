@@ -0,0 +1,176 @@
+"""Batch matching of bank statement lines against open receivable/payable items.
+
+Amounts are compared as signed integers in the smallest currency unit, so an
+inbound payment of 100.00 matches a receivable residual of 100.00 and an
+outbound payment of -100.00 a payable residual of -100.00. Every open item
+is matched at most once per run. For each statement line, in order:
+
+1. ``reference``: items whose number or payment reference appears in the
+   line reference, of the line partner when the line has one, and whose
+   residuals sum to the line amount;
+2. ``amount``: the oldest item of the line partner with the same amount, or
+   the only item with that amount when the line has no partner;
+3. ``subset``: several items of the line partner summing to the amount,
+   found by a depth-first search bounded in items per match, candidates per
+   partner and explored nodes.
+"""
+import re
+
+# Bounds of the subset search, per statement line
+SUBSET_MAX_CANDIDATES = 24
+SUBSET_MAX_NODES = 20000
+
+_TOKEN_SPLIT = re.compile(r'[\s,;]+')
+_NON_ALNUM = re.compile(r'[^0-9A-Z]')
+
+
+def normalize_reference(reference):
+    """Upper-case alphanumerics of a reference ('INV/2024/0012' -> 'INV20240012')"""
+    return _NON_ALNUM.sub('', (reference or '').upper())
+
+
+def document_references(*references):
+    """Normalized references identifying a document (its number, its payment reference)"""
+    return {normalize_reference(reference) for reference in references} - {''}
+
+
+def reference_tokens(*references):
+    """Normalized words of free-text references, plus each reference as a whole"""
+    tokens = set()
+    for reference in references:
+        if not reference:
+            continue
+        tokens.add(normalize_reference(reference))
+        tokens.update(normalize_reference(word) for word in _TOKEN_SPLIT.split(reference))
+    tokens.discard('')
+    return tokens
+
+
+def find_subset(candidates, target, max_size, max_nodes=SUBSET_MAX_NODES):
+    """
+    Indexes of at most ``max_size`` of ``candidates`` (amounts, same sign as
+    ``target``) summing exactly to ``target``, or None
+
+    Candidates are explored largest first so that overshooting branches are
+    cut early; the search gives up after ``max_nodes`` nodes.
+    """
+    sign = 1 if target > 0 else -1
+    order = sorted(range(len(candidates)), key=lambda index: -candidates[index] * sign)
+    amounts = [candidates[index] * sign for index in order]
+    target *= sign
+    if any(amount <= 0 for amount in amounts):
+        return None
+    # suffix[i]: sum of the amounts from i on, to cut branches that cannot reach the target
+    suffix = [0] * (len(amounts) + 1)
+    for index in range(len(amounts) - 1, -1, -1):
+        suffix[index] = suffix[index + 1] + amounts[index]
+
+    nodes = 0
+    chosen = []
+
+    def search(start, remaining):
+        nonlocal nodes
+        if remaining == 0:
+            return True
+        if len(chosen) == max_size or suffix[start] < remaining:
+            return False
+        for index in range(start, len(amounts)):
+            nodes += 1
+            if nodes > max_nodes:
+                return False
+            if amounts[index] > remaining:
+                continue
+            chosen.append(index)
+            if search(index + 1, remaining - amounts[index]):
+                return True
+            chosen.pop()
+        return False
+
+    if search(0, target):
+        return [order[index] for index in chosen]
+    return None
+
+
+class ReconcileMatcher:
+    """Hash indexes over the open items of one run; consumes items as they match"""
+
+    def __init__(self, items):
+        """
+        ``items``: dicts with ``id``, ``partner_id``, ``currency_id``,
+        ``amount`` (int, smallest unit) and ``references`` (see
+        document_references), in matching priority order (oldest first)
+        """
+        self.items = {item['id']: item for item in items}
+        self.used = set()
+        self.by_reference = {}
+        self.by_partner_amount = {}
+        self.by_amount = {}
+        self.by_partner = {}
+        for item in items:
+            for reference in item['references']:
+                self.by_reference.setdefault((item['currency_id'], reference), []).append(item['id'])
+            self.by_partner_amount.setdefault(
+                (item['partner_id'], item['currency_id'], item['amount']), []).append(item['id'])
+            self.by_amount.setdefault((item['currency_id'], item['amount']), []).append(item['id'])
+            if item['partner_id']:
+                self.by_partner.setdefault((item['partner_id'], item['currency_id']), []).append(item['id'])
+
+    def _available(self, item_ids):
+        return [item_id for item_id in item_ids if item_id not in self.used]
+
+    def match(self, line, max_subset_size=4):
+        """
+        ``(item_ids, rule)`` for a statement line (``partner_id``,
+        ``currency_id``, ``amount``, ``tokens`` (see reference_tokens)), or
+        None; the items are consumed
+        """
+        if not line['amount']:
+            return None
+        result = (self._match_reference(line)
+                  or self._match_amount(line)
+                  or self._match_subset(line, max_subset_size))
+        if result:
+            self.used.update(result[0])
+        return result
+
+    def _match_reference(self, line):
+        item_ids = []
+        for token in line['tokens']:
+            for item_id in self._available(self.by_reference.get((line['currency_id'], token), ())):
+                if line['partner_id'] and self.items[item_id]['partner_id'] != line['partner_id']:
+                    continue
+                if item_id not in item_ids:
+                    item_ids.append(item_id)
+        if not item_ids:
+            return None
+        if sum(self.items[item_id]['amount'] for item_id in item_ids) == line['amount']:
+            return item_ids, 'reference'
+        # One referenced item may be paid exactly when the others are not
+        exact = [item_id for item_id in item_ids if self.items[item_id]['amount'] == line['amount']]
+        if len(exact) == 1:
+            return exact, 'reference'
+        return None
+
+    def _match_amount(self, line):
+        if line['partner_id']:
+            item_ids = self._available(
+                self.by_partner_amount.get((line['partner_id'], line['currency_id'], line['amount']), ()))
+            return ([item_ids[0]], 'amount') if item_ids else None
+        item_ids = self._available(self.by_amount.get((line['currency_id'], line['amount']), ()))
+        return ([item_ids[0]], 'amount') if len(item_ids) == 1 else None
+
+    def _match_subset(self, line, max_subset_size):
+        if not line['partner_id'] or max_subset_size < 2:
+            return None
+        sign = 1 if line['amount'] > 0 else -1
+        candidates = [
+            item_id for item_id in self._available(self.by_partner.get((line['partner_id'], line['currency_id']), ()))
+            if self.items[item_id]['amount'] * sign > 0
+        ][:SUBSET_MAX_CANDIDATES]
+        if len(candidates) < 2:
+            return None
+        indexes = find_subset([self.items[item_id]['amount'] for item_id in candidates],
+                              line['amount'], max_subset_size)
+        if not indexes:
+            return None
+        return [candidates[index] for index in sorted(indexes)], 'subset'
@@ -0,0 +1,45 @@
+"""Date windows relative to today, as opened from the report date filters.
+
+A preset names a window by its rules instead of its dates, e.g.
+``year_start:today`` (year to date) or ``month_start:last_month_end`` (last
+month), so that a window used yesterday can be computed again for today.
+Windows that match no rule have no preset.
+"""
+from datetime import date, timedelta
+
+
+def _end_rules(today):
+    first_of_month = today.replace(day=1)
+    return {
+        'today': today,
+        'last_month_end': first_of_month - timedelta(days=1),
+        'last_year_end': date(today.year - 1, 12, 31),
+    }
+
+
+def _start_rules(date_to):
+    return {
+        'month_start': date_to.replace(day=1),
+        'year_start': date(date_to.year, 1, 1),
+    }
+
+
+def preset_of(date_from, date_to, today):
+    """Preset of a ``(date_from, date_to)`` window, or None"""
+    if not date_to:
+        return None
+    end_rule = next((rule for rule, day in _end_rules(today).items() if day == date_to), None)
+    if not end_rule:
+        return None
+    if not date_from:
+        return f'all:{end_rule}'
+    start_rule = next((rule for rule, day in _start_rules(date_to).items() if day == date_from), None)
+    return f'{start_rule}:{end_rule}' if start_rule else None
+
+
+def resolve_preset(preset, today):
+    """``(date_from, date_to)`` of a preset on ``today``"""
+    start_rule, end_rule = preset.split(':')
+    date_to = _end_rules(today)[end_rule]
+    date_from = None if start_rule == 'all' else _start_rules(date_to)[start_rule]
+    return date_from, date_to
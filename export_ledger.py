@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Exporta a tabela de factos do razão (account.move.line) para Parquet/Arrow.
+
+Exemplos:
+    python export_ledger.py --db teste --user admin --password admin \
+        --date-from 2025-01-01 --date-to 2025-12-31 --out ledger_2025
+
+    # Append incremental: só linhas escritas desde a última exportação
+    python export_ledger.py --db teste --user admin --password admin --out ledger_2025 --incremental
+
+Parquet: cada execução escreve um novo ficheiro part-*.parquet dentro de --out,
+um row group por lote. Em notebooks: pyarrow.dataset.dataset("ledger_2025").
+Numa exportação incremental a mesma linha pode aparecer em mais de um ficheiro
+(foi alterada depois); manter a versão com maior write_date por id.
+"""
+import argparse
+import datetime
+import os
+import sys
+import xmlrpc.client
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    sys.exit("[ERRO] pyarrow não está instalado: pip install pyarrow")
+
+COLUMNS = [
+    ('id', pa.int64()),
+    ('move_id', pa.int64()),
+    ('move_name', pa.string()),
+    ('date', pa.date32()),
+    ('company_id', pa.int64()),
+    ('journal_id', pa.int64()),
+    ('journal_code', pa.string()),
+    ('account_id', pa.int64()),
+    ('account_code', pa.string()),
+    ('partner_id', pa.int64()),
+    ('partner_name', pa.string()),
+    ('currency_id', pa.int64()),
+    ('analytic_distribution', pa.string()),
+    ('parent_state', pa.string()),
+    ('debit', pa.float64()),
+    ('credit', pa.float64()),
+    ('balance', pa.float64()),
+    ('amount_currency', pa.float64()),
+    ('amount_residual', pa.float64()),
+    ('write_date', pa.timestamp('us')),
+]
+SCHEMA = pa.schema(COLUMNS)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export account.move.line to Parquet/Arrow")
+    parser.add_argument('--url', default='http://localhost:8069')
+    parser.add_argument('--db', required=True)
+    parser.add_argument('--user', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--company-id', type=int)
+    parser.add_argument('--date-from')
+    parser.add_argument('--date-to')
+    parser.add_argument('--journal-ids', help="Comma separated journal ids")
+    parser.add_argument('--include-draft', action='store_true')
+    parser.add_argument('--format', choices=['parquet', 'arrow'], default='parquet')
+    parser.add_argument('--batch-size', type=int, default=50000)
+    parser.add_argument('--out', required=True, help="Output directory")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only export lines written after the newest write_date already in --out")
+    return parser.parse_args()
+
+
+def to_record_batch(columns):
+    arrays = []
+    for name, arrow_type in COLUMNS:
+        values = [None if value is False else value for value in columns[name]]
+        if name == 'date':
+            values = [datetime.date.fromisoformat(v) if v else None for v in values]
+        elif name == 'write_date':
+            values = [datetime.datetime.fromisoformat(v) if v else None for v in values]
+        arrays.append(pa.array(values, type=arrow_type))
+    return pa.RecordBatch.from_arrays(arrays, schema=SCHEMA)
+
+
+def last_exported_write_date(out_dir, file_format):
+    """Newest write_date already present in the output directory"""
+    if not os.path.isdir(out_dir) or not os.listdir(out_dir):
+        return None
+    dataset = ds.dataset(out_dir, format='parquet' if file_format == 'parquet' else 'ipc', schema=SCHEMA)
+    table = dataset.to_table(columns=['write_date'])
+    if not table.num_rows:
+        return None
+    newest = pc.max(table['write_date']).as_py()
+    return newest.strftime('%Y-%m-%d %H:%M:%S') if newest else None
+
+
+def main():
+    args = parse_args()
+    common = xmlrpc.client.ServerProxy(f"{args.url}/xmlrpc/2/common")
+    uid = common.authenticate(args.db, args.user, args.password, {})
+    if not uid:
+        sys.exit("[ERRO] Falha na autenticação")
+    models = xmlrpc.client.ServerProxy(f"{args.url}/xmlrpc/2/object", allow_none=True)
+
+    since = last_exported_write_date(args.out, args.format) if args.incremental else None
+    if since:
+        print(f"[INFO] Exportação incremental desde {since}")
+
+    os.makedirs(args.out, exist_ok=True)
+    stamp = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
+    extension = 'parquet' if args.format == 'parquet' else 'arrow'
+    path = os.path.join(args.out, f"part-{stamp}.{extension}")
+
+    kwargs = {
+        'limit': args.batch_size,
+        'posted_only': not args.include_draft,
+    }
+    if args.company_id:
+        kwargs['company_id'] = args.company_id
+    if args.date_from:
+        kwargs['date_from'] = args.date_from
+    if args.date_to:
+        kwargs['date_to'] = args.date_to
+    if args.journal_ids:
+        kwargs['journal_ids'] = [int(j) for j in args.journal_ids.split(',')]
+    if since:
+        kwargs['since'] = since
+
+    writer = None
+    after_id = 0
+    total = 0
+    try:
+        while True:
+            batch = models.execute_kw(args.db, uid, args.password,
+                                      'account.ledger.export', 'read_fact_batch', [],
+                                      dict(kwargs, after_id=after_id))
+            if not batch['count']:
+                break
+            record_batch = to_record_batch(batch['columns'])
+            if writer is None:
+                writer = pq.ParquetWriter(path, SCHEMA) if args.format == 'parquet' else pa.ipc.new_file(path, SCHEMA)
+            if args.format == 'parquet':
+                writer.write_table(pa.Table.from_batches([record_batch]))
+            else:
+                writer.write_batch(record_batch)
+            total += batch['count']
+            after_id = batch['last_id']
+            print(f"[OK] {total} linhas exportadas (último id {after_id})")
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if total:
+        print(f"[SUCESSO] {total} linhas escritas em {path}")
+    else:
+        print("[INFO] Nenhuma linha nova para exportar")
+
+
+if __name__ == '__main__':
+    main()